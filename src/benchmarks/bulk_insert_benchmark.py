@@ -0,0 +1,77 @@
+"""Insert throughput of CardRepository.create + add_card_to_user (one
+commit per card) compared to create_many + add_cards_to_user_bulk
+(executemany in one transaction), under the 'default' (fsync on every
+commit) and 'wal' pragma profiles. The cards are created before the clock
+starts, so only the database writes are timed.
+
+Run from the project root with:
+
+    poetry run invoke benchmark --name bulk_insert_benchmark
+"""
+import os
+import tempfile
+import time
+from entities.user import User
+from repositories.card_repository import CardRepository
+from repositories.user_repository import UserRepository
+from utils.database.database_connection import create_connection
+from utils.database.initialize_database import create_tables
+from utils.test_utils import create_fake_magic_card
+
+
+CARDS = 5_000
+PROFILES = ("default", "wal")
+
+
+def fake_cards(count):
+    cards = []
+    for i in range(count):
+        card = create_fake_magic_card()
+        card.name = f"Card {i}"
+        cards.append(card)
+    return cards
+
+
+def single_inserts(repository, user_id, cards):
+    for card in cards:
+        repository.add_card_to_user(user_id, repository.create(card))
+
+
+def bulk_inserts(repository, user_id, cards):
+    repository.add_cards_to_user_bulk(user_id, repository.create_many(cards))
+
+
+def measure(insert, directory, profile):
+    path = os.path.join(directory, f"{insert.__name__}_{profile}.db")
+    connection = create_connection(path, profile)
+    create_tables(connection)
+    repository = CardRepository(connection)
+    user_id = UserRepository(connection).create(User("bench", "benchmark1234"))
+    cards = fake_cards(CARDS)
+
+    start = time.perf_counter()
+    insert(repository, user_id, cards)
+    elapsed = time.perf_counter() - start
+
+    repository.close()
+    connection.close()
+
+    return elapsed
+
+
+def main():
+    print(f"{CARDS} cards added into a collection")
+    print(f"{'profile':<8} {'single':>16} {'bulk':>16} {'speedup':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in PROFILES:
+            single = measure(single_inserts, directory, profile)
+            bulk = measure(bulk_inserts, directory, profile)
+            print(
+                f"{profile:<8} {CARDS / single:>9.0f} cards/s "
+                f"{CARDS / bulk:>9.0f} cards/s {single / bulk:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
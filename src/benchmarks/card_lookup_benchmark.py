@@ -0,0 +1,70 @@
+"""Lookup time of CardRepository.find_card_by_name_and_set for growing
+card catalogs, with and without the (name, set_code) index.
+
+Run from the project root with:
+
+    poetry run invoke benchmark --name card_lookup_benchmark
+"""
+import random
+import sqlite3
+import time
+import uuid
+from repositories.card_repository import CardRepository, INSERT_CARD_SQL, card_to_row
+from utils.database.initialize_database import create_tables
+from utils.test_utils import create_fake_magic_card
+
+
+SIZES = (1_000, 10_000, 100_000, 500_000)
+LOOKUPS = 2_000
+UNINDEXED_LOOKUPS = 50
+
+
+def create_catalog(size):
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    create_tables(connection)
+
+    card = create_fake_magic_card()
+    rows = []
+    for i in range(size):
+        card.name = f"Card {i}"
+        card.set_code = f"s{i % 500:03d}"
+        card.scryfall_id = str(uuid.UUID(int=i))
+        rows.append(card_to_row(card))
+
+    connection.executemany(INSERT_CARD_SQL, rows)
+    connection.commit()
+
+    return connection
+
+
+def measure(repository, size, lookups):
+    names = [(f"Card {i}", f"s{i % 500:03d}") for i in random.choices(range(size), k=lookups)]
+
+    start = time.perf_counter()
+    for card_name, set_code in names:
+        repository.find_card_by_name_and_set(card_name, set_code)
+
+    return (time.perf_counter() - start) / lookups
+
+
+def main():
+    print(f"{'rows':>8} {'indexed':>14} {'no index':>14}")
+
+    for size in SIZES:
+        connection = create_catalog(size)
+        repository = CardRepository(connection)
+
+        indexed = measure(repository, size, LOOKUPS)
+        connection.execute("DROP INDEX Cards_name_set_code_idx")
+        unindexed = measure(repository, size, UNINDEXED_LOOKUPS)
+
+        print(
+            f"{size:>8} {indexed * 1e6:>11.1f} us {unindexed * 1e6:>11.1f} us"
+        )
+        repository.close()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Color and keyword filter time for growing card catalogs: json_each
+over the JSON array columns of Cards compared to the CardColors and
+CardKeywords side tables, which card_query compiles filters into.
+Every filter counts all matching cards, so the whole filter is evaluated.
+
+Run from the project root with:
+
+    poetry run invoke benchmark --name color_filter_benchmark
+"""
+import random
+import sqlite3
+import time
+from repositories.card_repository import INSERT_CARD_SQL, card_to_row
+from services.card_query import CardQueryCompiler
+from utils.database.initialize_database import create_tables
+from utils.test_utils import create_fake_magic_card
+
+
+SIZES = (10_000, 100_000)
+REPEATS = 10
+COLORS = ("W", "U", "B", "R", "G")
+# Common and rare keywords, a card has 0-2 of them
+KEYWORDS = ("Flying", "Trample", "Haste", "Vigilance", "Deathtouch", "Landfall", "Cascade")
+KEYWORD_WEIGHTS = (30, 20, 15, 10, 5, 2, 1)
+
+# The same filters compiled over the JSON columns, like before the side tables
+JSON_FILTERS = {
+    "c:g": (
+        "EXISTS (SELECT 1 FROM json_each(Cards.colors) WHERE value = 'G')"
+    ),
+    "c=rg": (
+        "(SELECT COUNT(*) FROM json_each(Cards.colors) WHERE value IN ('R', 'G')) = 2"
+        " AND json_array_length(Cards.colors) = 2"
+    ),
+    "kw:cascade": (
+        "EXISTS (SELECT 1 FROM json_each(Cards.keywords) WHERE value = 'Cascade')"
+    )
+}
+
+
+def card_rows(size):
+    random.seed(1)
+    card = create_fake_magic_card()
+
+    for i in range(size):
+        card.name = f"Card {i}"
+        card.set_code = f"s{i % 500:03d}"
+        card.scryfall_id = f"card-{i}"
+        card.stats.colors = random.sample(COLORS, random.choice((0, 1, 1, 1, 2)))
+        card.stats.color_identity = card.stats.colors
+        card.stats.keywords = list(set(
+            random.choices(KEYWORDS, KEYWORD_WEIGHTS, k=random.randint(0, 2))
+        ))
+        yield card_to_row(card)
+
+
+def create_catalog(size):
+    connection = sqlite3.connect(":memory:")
+    create_tables(connection)
+    connection.executemany(INSERT_CARD_SQL, card_rows(size))
+    connection.commit()
+
+    return connection
+
+
+def measure(connection, where, parameters=()):
+    sql = f"SELECT COUNT(*) FROM Cards WHERE {where}"
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        matches = connection.execute(sql, parameters).fetchone()[0]
+
+    return (time.perf_counter() - start) / REPEATS, matches
+
+
+def main():
+    compiler = CardQueryCompiler()
+
+    print("ms/query")
+    print(f"{'cards':>8} {'filter':<12} {'matches':>8} {'json_each':>10} {'tables':>8}")
+
+    for size in SIZES:
+        connection = create_catalog(size)
+        for query, json_where in JSON_FILTERS.items():
+            compiled = compiler.compile(query)
+            json_time, matches = measure(connection, json_where)
+            table_time, table_matches = measure(
+                connection, compiled.where, compiled.parameters
+            )
+            assert matches == table_matches
+            print(
+                f"{size:>8} {query:<12} {matches:>8} "
+                f"{json_time * 1000:>10.2f} {table_time * 1000:>8.2f}"
+            )
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
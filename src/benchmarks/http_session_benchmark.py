@@ -0,0 +1,81 @@
+"""Per-request latency of bare requests.get versus the pooled HttpClient.
+
+Run from the project root with:
+
+    poetry run invoke benchmark --name http_session_benchmark
+"""
+import sqlite3
+import statistics
+import time
+import requests
+from benchmarks.stub_server import StubServer
+from repositories.card_repository import CardRepository
+from utils.http.http_client import HttpClient
+from utils.database.initialize_database import create_tables
+
+
+REQUESTS = 200
+HANDSHAKE_DELAY = 0.005
+
+
+def measure(function):
+    latencies = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+
+    return latencies
+
+
+def report(title, latencies, connections):
+    latencies = sorted(latencies)
+    print(
+        f"{title:<22} "
+        f"mean {statistics.mean(latencies) * 1000:7.3f} ms  "
+        f"p50 {latencies[len(latencies) // 2] * 1000:7.3f} ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.3f} ms  "
+        f"connections {connections}"
+    )
+
+
+def main():
+    print(
+        f"{REQUESTS} requests, simulated handshake "
+        f"{HANDSHAKE_DELAY * 1000:.1f} ms per new connection"
+    )
+
+    with StubServer(handshake_delay=HANDSHAKE_DELAY) as server:
+        url = f"{server.url}/cards/named"
+        params = {"exact": "Lightning Bolt", "set": "m10"}
+
+        def bare_get():
+            requests.get(url, params=params, timeout=10).json()
+
+        latencies = measure(bare_get)
+        report("before: requests.get", latencies, server.connections)
+
+    # The card is looked up from the (empty) local catalog first,
+    # so the repository needs the tables
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    create_tables(connection)
+
+    with StubServer(handshake_delay=HANDSHAKE_DELAY) as server:
+        repository = CardRepository(
+            connection,
+            # Without throttling, so the latency is the pooling only
+            http_client=HttpClient(rate_limiter=None),
+            api_url=server.url
+        )
+
+        def pooled_get():
+            repository.fetch_card_by_name_and_set("Lightning Bolt", "m10")
+
+        latencies = measure(pooled_get)
+        repository.close()
+        report("after: HttpClient", latencies, server.connections)
+
+
+if __name__ == "__main__":
+    main()
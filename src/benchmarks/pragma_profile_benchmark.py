@@ -0,0 +1,64 @@
+"""Insert throughput of CardRepository.create (one commit per card)
+under every database pragma profile, alone and while a reader holds
+a read transaction open.
+
+Run from the project root with:
+
+    poetry run invoke benchmark --name pragma_profile_benchmark
+"""
+import os
+import sqlite3
+import tempfile
+import time
+from repositories.card_repository import CardRepository
+from utils.database.database_connection import PRAGMA_PROFILES, create_connection
+from utils.database.initialize_database import create_tables
+from utils.test_utils import create_fake_magic_card
+
+
+CARDS = 500
+
+
+def measure(profile, directory, with_reader):
+    path = os.path.join(directory, f"{profile}_{with_reader}.db")
+    connection = create_connection(path, profile)
+    create_tables(connection)
+    repository = CardRepository(connection)
+
+    # A reader in the middle of a read transaction, e.g. the card view
+    reader = sqlite3.connect(path, timeout=0.1)
+    if with_reader:
+        reader.execute("BEGIN")
+        reader.execute("SELECT COUNT(*) FROM Cards").fetchone()
+
+    card = create_fake_magic_card()
+    start = time.perf_counter()
+    try:
+        for i in range(CARDS):
+            card.name = f"Card {i}"
+            repository.create(card)
+        result = f"{CARDS / (time.perf_counter() - start):.0f} cards/s"
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        result = f"blocked ({e.__cause__ or e})"
+
+    reader.close()
+    repository.close()
+    connection.close()
+
+    return result
+
+
+def main():
+    print(f"{CARDS} single-card commits per profile")
+    print(f"{'profile':<8} {'alone':>16} {'with reader':>30}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in PRAGMA_PROFILES:
+            print(
+                f"{profile:<8} {measure(profile, directory, False):>16} "
+                f"{measure(profile, directory, True):>30}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Relayout cost of the card grid for a burst of window resize events
+with 5,000 cards: the old layout (grid_forget + grid for every label on
+every "<Configure>" event) compared to CardListView, which is resized
+like a window dragged by the user. The debouncer of CardListView
+coalesces the burst, its time is read from 'layout_stats', which covers
+the whole _refresh_card_layout: moving the cells, the scrollregion update
+and drawing the cells, which came into view.
+
+Needs a display, the window is kept withdrawn. The collection is
+synthetic, so the cards are drawn with placeholders.
+
+Run from the project root with:
+
+    poetry run invoke benchmark --name relayout_benchmark
+"""
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+from tkinter import Tk, PhotoImage, TclError, ttk
+from services.magic_service import magic_service
+from ui.magic_card_view import CardListView
+
+
+CARDS = 5_000
+THUMBNAIL_SIZE = (100, 140)
+PADDING = 2
+VIEW_HEIGHT = 700
+# A window dragged from 700 to 900 pixels wide
+RESIZE_BURST = list(range(700, 900, 10))
+# Longer than the debounce delay of CardListView
+SETTLE_SECONDS = 1.0
+
+
+def old_relayout(labels, width):
+    """The layout before debouncing and virtualization."""
+
+    for label in labels:
+        label.grid_forget()
+
+    thumb_width = THUMBNAIL_SIZE[0] + 2*PADDING
+    max_columns = max(1, (width - 40) // thumb_width)
+    row = 0
+    col = 0
+
+    for label in labels:
+        label.grid(row=row, column=col, padx=PADDING, pady=PADDING)
+        col += 1
+        if col >= max_columns:
+            col = 0
+            row += 1
+
+
+def measure_old(root):
+    photo = PhotoImage(master=root, width=THUMBNAIL_SIZE[0], height=THUMBNAIL_SIZE[1])
+    frame = ttk.Frame(root)
+    frame.pack()
+    labels = [ttk.Label(frame, image=photo) for _ in range(CARDS)]
+
+    start = time.perf_counter()
+    for width in RESIZE_BURST:
+        old_relayout(labels, width)
+        root.update_idletasks()
+    elapsed = time.perf_counter() - start
+
+    frame.destroy()
+
+    return elapsed
+
+
+def create_card_list_view(root):
+    user = SimpleNamespace(user_id=1)
+    cards = [(i, f"card_{i:05}_TST.png") for i in range(CARDS)]
+
+    with patch.object(magic_service, "get_current_user", return_value=user), \
+            patch.object(magic_service, "get_user_card_images", return_value=cards):
+        view = CardListView(root)
+
+    view.pack()
+    root.geometry(f"{RESIZE_BURST[0]}x{VIEW_HEIGHT}")
+    settle(root)
+
+    return view
+
+
+def settle(root):
+    deadline = time.perf_counter() + SETTLE_SECONDS
+    while time.perf_counter() < deadline:
+        root.update()
+
+
+def measure_new(root, view):
+    """Resizes the window like a drag and returns the time spent in
+    relayouts and their number."""
+
+    view.layout_stats.update(relayouts=0, moved_cells=0, seconds=0.0)
+
+    for width in RESIZE_BURST:
+        root.geometry(f"{width}x{VIEW_HEIGHT}")
+        root.update()
+    settle(root)
+
+    return view.layout_stats["seconds"], view.layout_stats["relayouts"]
+
+
+def main():
+    try:
+        root = Tk()
+    except TclError:
+        print("No display, the benchmark needs one for Tk")
+        return
+
+    root.withdraw()
+    print(f"{CARDS} cards, burst of {len(RESIZE_BURST)} resize events")
+
+    old = measure_old(root)
+    view = create_card_list_view(root)
+    new, relayouts = measure_new(root, view)
+    view.destroy()
+    root.destroy()
+
+    print(f"{'old':<6} {old * 1000:>10.2f} ms, {len(RESIZE_BURST)} relayouts")
+    print(f"{'new':<6} {new * 1000:>10.2f} ms, {relayouts} relayouts")
+
+
+if __name__ == "__main__":
+    main()
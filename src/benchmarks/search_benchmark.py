@@ -0,0 +1,112 @@
+"""Search time over a 100,000 card catalog: SearchRepository.search_cards
+(FTS5 index, ranked, first page of 50) compared to a LIKE scan over the
+name, type line, oracle text and flavor text columns (ordered by name,
+first page of 50).
+
+Card texts are generated from a vocabulary with a Zipf-like word
+distribution, so common words match a large share of the catalog
+like in real oracle texts.
+
+Run from the project root with:
+
+    poetry run invoke benchmark --name search_benchmark
+"""
+import random
+import sqlite3
+import time
+import uuid
+from repositories.card_repository import INSERT_CARD_SQL, card_to_row
+from repositories.search_repository import SearchRepository, to_match_query
+from utils.database.initialize_database import create_tables
+from utils.test_utils import create_fake_magic_card
+
+
+CARDS = 100_000
+QUERIES = ("flying dragon", "destroy target artifact", "goblin", "draw card", "lifelink angel")
+REPEATS = 20
+KEYWORDS = (
+    "target", "creature", "card", "player", "flying", "draw", "destroy",
+    "damage", "artifact", "counter", "trample", "haste", "lifelink"
+)
+WORDS = KEYWORDS + tuple(f"word{i}" for i in range(3_000))
+# Zipf-like: the n:th word is used in proportion to 1 / n
+WORD_WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+TYPES = ("Dragon", "Angel", "Goblin", "Elf", "Zombie", "Wizard", "Soldier", "Beast") + tuple(
+    f"Type{i}" for i in range(200)
+)
+
+
+def card_rows():
+    random.seed(1)
+    card = create_fake_magic_card()
+
+    for i in range(CARDS):
+        card.name = f"{random.choice(TYPES)} {i}"
+        card.set_code = f"s{i % 500:03d}"
+        card.scryfall_id = str(uuid.UUID(int=i))
+        card.stats.type_line = f"Creature — {random.choice(TYPES)}"
+        card.oracle_text = " ".join(random.choices(WORDS, WORD_WEIGHTS, k=25))
+        card.flavor_text = " ".join(random.choices(WORDS, WORD_WEIGHTS, k=10))
+        yield card_to_row(card)
+
+
+def create_catalog():
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    create_tables(connection)
+    connection.executemany(INSERT_CARD_SQL, card_rows())
+    connection.commit()
+
+    return connection
+
+
+def like_search(connection, query):
+    """Search without the index: every word in any of the text columns."""
+
+    conditions = []
+    parameters = []
+    for word in query.split():
+        conditions.append(
+            "(name LIKE ? OR type_line LIKE ? OR oracle_text LIKE ? OR flavor_text LIKE ?)"
+        )
+        parameters.extend([f"%{word}%"] * 4)
+
+    return connection.execute(
+        f"SELECT * FROM Cards WHERE {' AND '.join(conditions)} ORDER BY name LIMIT 50",
+        parameters
+    ).fetchall()
+
+
+def measure(search, query):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        search(query)
+
+    return (time.perf_counter() - start) / REPEATS
+
+
+def count_matches(connection, query):
+    return connection.execute(
+        "SELECT COUNT(*) FROM CardsSearch WHERE CardsSearch MATCH ?",
+        (to_match_query(query),)
+    ).fetchone()[0]
+
+
+def main():
+    connection = create_catalog()
+    repository = SearchRepository(connection)
+
+    print(f"{CARDS} cards, first page of 50 results, ms/query")
+    print(f"{'query':<26} {'matches':>8} {'LIKE scan':>10} {'FTS5':>8}")
+
+    for query in QUERIES:
+        fts = measure(repository.search_cards, query)
+        like = measure(lambda text: like_search(connection, text), query)
+        print(
+            f"{query:<26} {count_matches(connection, query):>8} "
+            f"{like * 1000:>10.2f} {fts * 1000:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
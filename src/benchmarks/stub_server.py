@@ -0,0 +1,82 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubScryfallHandler(BaseHTTPRequestHandler):
+    """Request handler which answers every request with a small card json.
+
+    Keep-alive is enabled (HTTP/1.1), so a client can reuse the connection.
+    Every new connection sleeps for 'handshake_delay' seconds before it is
+    served, which simulates the TCP+TLS handshake cost of a real HTTPS host.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately, without TCP_NODELAY
+        # a kept alive connection would stall on delayed ACKs
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        time.sleep(self.server.handshake_delay)
+        self.server.connections += 1
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.server.requests += 1
+        body = json.dumps({"object": "card", "name": "Lightning Bolt"}).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class StubServer:
+    """Local stub HTTP server for benchmarks, runs in a daemon thread.
+
+    Attributes:
+        url (str): Base url of the server.
+    """
+
+    def __init__(self, handshake_delay=0.0, handler=StubScryfallHandler):
+        """Class constructor. Creates a stub server on a free local port.
+
+        Args:
+            handshake_delay (float):
+                Seconds every new connection waits before it is served.
+            handler:
+                Request handler class.
+        """
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._server.handshake_delay = handshake_delay
+        self._server.connections = 0
+        self._server.requests = 0
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            daemon=True
+        )
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def connections(self):
+        return self._server.connections
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
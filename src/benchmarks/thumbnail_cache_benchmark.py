@@ -0,0 +1,65 @@
+"""Time to load the thumbnails of a 3,000 card collection: decoding and
+resizing every card image (the old CardListView) compared to a cold
+and a warm ThumbnailCache. Card images are 146x204 JPEGs like the
+'small' images of Scryfall.
+
+Run from the project root with:
+
+    poetry run invoke benchmark --name thumbnail_cache_benchmark
+"""
+import os
+import tempfile
+import time
+from PIL import Image
+from utils.thumbnail_cache import ThumbnailCache
+
+
+CARDS = 3_000
+THUMBNAIL_SIZE = (100, 140)
+
+
+def create_images(directory):
+    paths = []
+    for i in range(CARDS):
+        image = Image.effect_noise((146, 204), 20 + i % 50).convert("RGB")
+        path = os.path.join(directory, f"card_{i}.png")
+        image.save(path, "JPEG")
+        paths.append(path)
+
+    return paths
+
+
+def without_cache(paths):
+    for path in paths:
+        with Image.open(path) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+
+
+def with_cache(cache, paths):
+    for path in paths:
+        cache.get(path, THUMBNAIL_SIZE)
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        images_dir = os.path.join(directory, "images")
+        os.makedirs(images_dir)
+        paths = create_images(images_dir)
+        cache = ThumbnailCache(os.path.join(directory, "thumbnails"))
+
+        print(f"{CARDS} card thumbnails")
+        print(f"{'no cache':<12} {measure(without_cache, paths):>8.3f} s")
+        print(f"{'cold cache':<12} {measure(with_cache, cache, paths):>8.3f} s")
+        print(f"{'warm cache':<12} {measure(with_cache, cache, paths):>8.3f} s")
+        print(f"cache size   {cache.size() / 1024 / 1024:>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,4 +6,36 @@ dirname = os.path.dirname(__file__)
 load_dotenv(dotenv_path=os.path.join(dirname, "..", ".env"))
 
 DATABASE_PATH = os.getenv("DATABASE_PATH") or "./data/default.db"
+DATABASE_PRAGMA_PROFILE = os.getenv("DATABASE_PRAGMA_PROFILE") or "wal"
 USER_AGENT = os.getenv("USER_AGENT") or "MagicArchive"
+
+SCRYFALL_API_URL = os.getenv("SCRYFALL_API_URL") or "https://api.scryfall.com"
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT") or 10)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS") or 4)
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE") or 4)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES") or 5)
+SCRYFALL_RATE_LIMIT = float(os.getenv("SCRYFALL_RATE_LIMIT") or 10)
+HTTP_CACHE_MAX_BYTES = int(
+    float(os.getenv("HTTP_CACHE_SIZE_MB") or 32) * 1024 * 1024
+)
+HTTP_CACHE_MEMORY_MAX_BYTES = int(
+    float(os.getenv("HTTP_CACHE_MEMORY_MB") or 4) * 1024 * 1024
+)
+HTTP_CACHE_CARDS_TTL = float(os.getenv("HTTP_CACHE_CARDS_TTL_HOURS") or 24) * 60 * 60
+
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS") or 2)
+IMAGE_DOWNLOAD_WORKERS = int(os.getenv("IMAGE_DOWNLOAD_WORKERS") or 4)
+IMAGE_DOWNLOAD_RETRIES = int(os.getenv("IMAGE_DOWNLOAD_RETRIES") or 3)
+IMAGE_DOWNLOAD_RETRY_DELAY = float(os.getenv("IMAGE_DOWNLOAD_RETRY_DELAY") or 2)
+
+THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR") or "./data/thumbnails"
+THUMBNAIL_CACHE_MAX_BYTES = int(
+    float(os.getenv("THUMBNAIL_CACHE_SIZE_MB") or 256) * 1024 * 1024
+)
+THUMBNAIL_DECODE_WORKERS = int(os.getenv("THUMBNAIL_DECODE_WORKERS") or 4)
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE") or 50)
+QUERY_PLAN_CACHE_SIZE = int(os.getenv("QUERY_PLAN_CACHE_SIZE") or 256)
+SETS_CACHE_TTL = float(os.getenv("SETS_CACHE_TTL_HOURS") or 24) * 60 * 60
+PHOTO_CACHE_MAX_BYTES = int(
+    float(os.getenv("PHOTO_CACHE_SIZE_MB") or 64) * 1024 * 1024
+)
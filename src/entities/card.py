@@ -32,12 +32,13 @@ class Card:
         flavor_text (str): Flavor text.
         prices (dict): Prices.
         card_id (int): Id (primary key) in database. Defaults to None.
+        scryfall_id (str): Id of the card in api.scryfall.com. Defaults to None.
     """
 
-    def __init__(self, name, released_at, layout, stats, oracle_text,
+    def __init__(self, name, released_at, layout, stats, oracle_text,  # pylint: disable=too-many-locals
                  card_faces, all_parts, image_uris,
                  set_code, set_name, rarity, flavor_text,
-                 prices, card_id=None):
+                 prices, card_id=None, scryfall_id=None):
         """Class Constructor, creates a new card object.
 
         Attributes:
@@ -55,6 +56,7 @@ class Card:
             flavor_text (str): Flavor text.
             prices (dict): Prices.
             card_id (int): Id (primary key) in database. Defaults to None.
+            scryfall_id (str): Id of the card in api.scryfall.com. Defaults to None.
         """
 
         self.name = name
@@ -71,6 +73,7 @@ class Card:
         self.flavor_text = flavor_text
         self.prices = prices
         self.card_id = card_id
+        self.scryfall_id = scryfall_id
 
     @classmethod
     def from_scryfall_json(cls, data):
@@ -109,7 +112,8 @@ class Card:
             set_name=data.get("set_name"),
             rarity=data.get("rarity"),
             flavor_text=data.get("flavor_text"),
-            prices=data.get("prices")
+            prices=data.get("prices"),
+            scryfall_id=data.get("id")
         )
 
     @classmethod
@@ -149,5 +153,38 @@ class Card:
             rarity=data["rarity"],
             flavor_text=data["flavor_text"],
             prices=json.loads(data["prices"]),
-            card_id=data["id"]
+            card_id=data["id"],
+            scryfall_id=data["scryfall_id"]
         )
+
+    def to_scryfall_json(self):
+        """Returns the card in the same dict format as card data fetched
+        from api.scryfall.com, see from_scryfall_json().
+
+        Returns:
+            Card fields in dict.
+        """
+
+        return {
+            "id": self.scryfall_id,
+            "name": self.name,
+            "released_at": self.released_at,
+            "layout": self.layout,
+            "mana_cost": self.stats.mana_cost,
+            "cmc": self.stats.cmc,
+            "power": self.stats.power,
+            "toughness": self.stats.toughness,
+            "colors": self.stats.colors,
+            "color_identity": self.stats.color_identity,
+            "type_line": self.stats.type_line,
+            "keywords": self.stats.keywords,
+            "oracle_text": self.oracle_text,
+            "card_faces": self.card_faces,
+            "all_parts": self.all_parts,
+            "image_uris": self.image_uris,
+            "set": self.set_code,
+            "set_name": self.set_name,
+            "rarity": self.rarity,
+            "flavor_text": self.flavor_text,
+            "prices": self.prices
+        }
@@ -0,0 +1,39 @@
+import sys
+from repositories.catalog_repository import catalog_repository
+from utils.database.initialize_database import migrate_database
+
+
+def import_catalog(path):
+    imported = catalog_repository.import_bulk_data(path)
+
+    print(f"{imported} cards imported into card catalog.")
+
+
+def sync_catalog(path):
+    report = catalog_repository.sync_bulk_data(path)
+
+    print(
+        f"Card catalog synced in {report.elapsed:.2f} s "
+        f"(writes {report.write_elapsed:.2f} s): "
+        f"{report.inserted} inserted, {report.updated} updated, "
+        f"{report.deleted} deleted, {report.unchanged} unchanged, "
+        f"{report.skipped} skipped, {report.kept} kept in collections."
+    )
+
+
+def main(args):
+    if len(args) not in (1, 2) or args[1:] not in ([], ["--sync"]):
+        print("Usage: python3 src/import_catalog.py <bulk data file> [--sync]")
+        sys.exit(1)
+
+    # The catalog tables and columns are created by the migrations
+    migrate_database()
+
+    if args[1:] == ["--sync"]:
+        sync_catalog(args[0])
+    else:
+        import_catalog(args[0])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
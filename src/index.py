@@ -1,8 +1,11 @@
 from tkinter import Tk
 from ui.ui import UI
+from utils.database.initialize_database import migrate_database
 
 
 def main():
+    migrate_database()
+
     window = Tk()
     window.title("Magic archive")
 
@@ -1,11 +1,17 @@
 from sqlite3 import DatabaseError
+from collections import Counter
+from itertools import islice
+import hashlib
 import json
 import os
+import tempfile
 import requests
 from entities.card import Card
 from utils.database.database_connection import get_database_connection
+from utils.http.http_client import HttpClient, is_transient_error, scryfall_http_client
+from utils.http.response_cache import response_cache as default_response_cache
 from utils.card_utils import card_name_to_png_filename
-from config import USER_AGENT
+from config import SCRYFALL_API_URL
 
 
 class IncorrectNameOrSetError(Exception):
@@ -16,6 +22,10 @@ class SetsNotFoundError(Exception):
     pass
 
 
+class ScryfallUnavailableError(Exception):
+    pass
+
+
 class DatabaseCreateError(Exception):
     pass
 
@@ -36,6 +46,73 @@ class CardImageWriteError(Exception):
     pass
 
 
+# api.scryfall.com accepts at most 75 identifiers in one collection request
+COLLECTION_BATCH_SIZE = 75
+
+# Number of rows serialised and written with one executemany() call
+BULK_CHUNK_SIZE = 500
+
+# Card images are streamed to disk in chunks of this size
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_IMAGES_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "images")
+)
+
+CARD_COLUMNS = (
+    "name", "released_at", "layout", "mana_cost", "cmc",
+    "colors", "color_identity", "type_line", "oracle_text", "keywords",
+    "card_faces", "all_parts", "power", "toughness", "image_uris",
+    "set_name", "set_code", "rarity", "flavor_text", "prices",
+    "scryfall_id", "content_hash"
+)
+
+INSERT_CARD_SQL = f"""
+    INSERT INTO Cards ({", ".join(CARD_COLUMNS)})
+    VALUES ({", ".join("?" for _ in CARD_COLUMNS)})
+    ON CONFLICT DO NOTHING
+    """
+
+
+def card_to_row(card):
+    """Converts a Card -object into a tuple of values in CARD_COLUMNS order.
+    The last value is a hash of the others, which tells whether the
+    stored card has changed.
+
+    Args:
+        card: Card -object
+    Returns:
+        Tuple of column values, lists and dicts serialized as json.
+    """
+
+    values = (
+        card.name,
+        card.released_at,
+        card.layout,
+        card.stats.mana_cost,
+        card.stats.cmc,
+        json.dumps(card.stats.colors),
+        json.dumps(card.stats.color_identity),
+        card.stats.type_line,
+        card.oracle_text,
+        json.dumps(card.stats.keywords),
+        json.dumps(card.card_faces),
+        json.dumps(card.all_parts),
+        card.stats.power,
+        card.stats.toughness,
+        json.dumps(card.image_uris),
+        card.set_name,
+        card.set_code,
+        card.rarity,
+        card.flavor_text,
+        json.dumps(card.prices),
+        card.scryfall_id
+    )
+    content_hash = hashlib.sha1(json.dumps(values).encode("utf-8")).hexdigest()
+
+    return (*values, content_hash)
+
+
 class CardRepository:
     """Class responsible for fetching Magic cards from api.scryfall.com
     and storing them into database and images to disk.
@@ -43,27 +120,122 @@ class CardRepository:
     Attributes:
         connection:
             Connection -object for the database connection.
+        http_client:
+            HttpClient -object, pooled session for all HTTP traffic.
+        api_url (str):
+            Base url of the Scryfall API.
+        images_dir (str):
+            Directory of the card images.
+        response_cache:
+            ResponseCache -object for Scryfall JSON responses, or None.
     """
 
-    def __init__(self, connection):
+    def __init__(
+        self,
+        connection,
+        http_client=None,
+        api_url=SCRYFALL_API_URL,
+        images_dir=DEFAULT_IMAGES_DIR,
+        response_cache=None
+    ):
         """Class constructor. Creates a new card repository.
 
         Args:
             connection:
                 Connection -object for the database connection.
+            http_client:
+                HttpClient -object, pooled session for all HTTP traffic.
+                Defaults to a new HttpClient.
+            api_url (str):
+                Base url of the Scryfall API.
+            images_dir (str):
+                Directory of the card images.
+            response_cache:
+                ResponseCache -object, which serves repeated requests
+                without network traffic. Defaults to None (no caching).
         """
 
         self._connection = connection
+        self._http = http_client or HttpClient()
+        self._api_url = api_url.rstrip("/")
+        self._images_dir = images_dir
+        self._response_cache = response_cache
 
-        # api.scryfall.com requires these headers
+        # api.scryfall.com requires these headers, User-Agent is set
+        # by the HttpClient for every request
         self._headers = {
-            "User-Agent": USER_AGENT,
             "Accept": "application/json"
         }
 
+    def close(self):
+        """Closes the pooled HTTP connections."""
+
+        self._http.close()
+
+    def http_metrics(self):
+        """Returns request, retry and rate limiter wait counters
+        of the HTTP client.
+
+        Returns:
+            Metrics in dict format.
+        """
+
+        return self._http.metrics()
+
+    def response_cache_stats(self):
+        """Returns hit, miss and eviction counters of the response cache.
+
+        Returns:
+            Counters in dict format, or None if responses aren't cached.
+        """
+
+        if self._response_cache is None:
+            return None
+
+        return self._response_cache.stats()
+
+    def _get_json(self, url, params=None):
+        """Sends a GET request and returns its JSON content. Cached responses
+        are returned without a request.
+
+        Raises:
+            requests.exceptions.RequestException:
+        """
+
+        if self._response_cache:
+            content = self._response_cache.get(url, params)
+            if content is not None:
+                return content
+
+        response = self._http.get(url, params=params, headers=self._headers)
+        response.raise_for_status()
+        content = response.json()
+
+        if self._response_cache:
+            self._response_cache.put(url, params, content)
+
+        return content
+
+    def transaction(self):
+        """Opens a unit of work: database changes made inside it are
+        committed once at the end, or rolled back if an exception is raised.
+        Transactions can be nested, a failed inner transaction only rolls
+        back its own changes.
+
+        Usage:
+            with card_repository.transaction():
+                ...
+
+        Returns:
+            Context manager of the transaction.
+        """
+
+        return self._connection.transaction()
+
     def fetch_card_by_name_and_set(self, card_name, set_code):
-        """Fetches a specific card from api.scryfall.com
-        based on card name and set code.
+        """Fetches a specific card based on card name and set code. The local
+        card catalog is searched first and api.scryfall.com is used only
+        if the card isn't found there.
 
         Args:
             card_name (str):
@@ -72,59 +244,130 @@ class CardRepository:
             Card data in dict format.
         Raises:
             IncorrectNameOrSetError:
+            ScryfallUnavailableError:
+                Temporary failure, which didn't go away with retries.
+            DatabaseFindError:
         """
 
-        url = "https://api.scryfall.com/cards/named"
+        card = self.find_card_by_name_and_set(card_name, set_code)
+        if card:
+            return card.to_scryfall_json()
+
+        url = f"{self._api_url}/cards/named"
 
         try:
-            response = requests.get(
+            return self._get_json(
                 url,
                 params={
                     "exact": card_name,
                     "set": set_code
-                },
-                headers=self._headers,
-                timeout=10
+                }
             )
-            response.raise_for_status()
         except requests.exceptions.RequestException as e:
+            if is_transient_error(e):
+                raise ScryfallUnavailableError(
+                    "api.scryfall.com is not available, try again later."
+                ) from e
             raise IncorrectNameOrSetError(
                 "Incorrect card name or set."
             ) from e
 
-        return response.json()
-
-    def fetch_all_sets(self):
-        """Fetches all available card sets from
-        api.scryfall.com
+    def fetch_cards_by_names_and_sets(self, identifiers):
+        """Fetches several cards based on card names and set codes. Cards
+        missing from the local card catalog are fetched from api.scryfall.com
+        with the /cards/collection endpoint, 75 cards per request.
 
+        Args:
+            identifiers (list):
+                List of tuples: (card_name, set_code).
         Returns:
-            All card sets in dict format.
+            List in the same order as 'identifiers'. Every item is
+            a Card -object for a card in database, card data in dict
+            format for a card from api.scryfall.com, or an
+            IncorrectNameOrSetError -object, if the card wasn't found.
         Raises:
-            SetsNotFoundError:
+            DatabaseFindError:
+            ScryfallUnavailableError:
+                Temporary failure, which didn't go away with retries.
+            IncorrectNameOrSetError:
+                The request was rejected.
         """
 
-        url = "https://api.scryfall.com/sets"
+        identifiers = list(identifiers)
+        results = [None] * len(identifiers)
+        missing = []
+
+        for index, (card_name, set_code) in enumerate(identifiers):
+            card = self.find_card_by_name_and_set(card_name, set_code)
+            if card:
+                results[index] = card
+            else:
+                missing.append(index)
+
+        for start in range(0, len(missing), COLLECTION_BATCH_SIZE):
+            batch = missing[start:start + COLLECTION_BATCH_SIZE]
+            fetched = self._fetch_collection([identifiers[i] for i in batch])
+            for index, card_data in zip(batch, fetched):
+                results[index] = card_data
+
+        return results
+
+    def _fetch_collection(self, batch):
+        url = f"{self._api_url}/cards/collection"
 
         try:
-            response = requests.get(
+            response = self._http.post(
                 url,
-                headers=self._headers,
-                timeout=10
+                json={
+                    "identifiers": [
+                        {"name": card_name, "set": set_code}
+                        for card_name, set_code in batch
+                    ]
+                },
+                headers=self._headers
             )
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
-            raise SetsNotFoundError("All sets couldn't be loaded") from e
+            if is_transient_error(e):
+                raise ScryfallUnavailableError(
+                    "api.scryfall.com is not available, try again later."
+                ) from e
+            raise IncorrectNameOrSetError(
+                "Incorrect card names or sets."
+            ) from e
+
+        content = response.json()
 
-        return response.json()
+        # Found cards are returned in the same order as they were asked,
+        # so the rest of the identifiers map to them one by one
+        not_found = Counter(
+            (item.get("name", "").casefold(), item.get("set", "").casefold())
+            for item in content.get("not_found", [])
+        )
+        found = iter(content.get("data", []))
+        results = []
+
+        for card_name, set_code in batch:
+            key = (card_name.casefold(), set_code.casefold())
+            card_data = None
+            if not_found[key] > 0:
+                not_found[key] -= 1
+            else:
+                card_data = next(found, None)
+            results.append(card_data or IncorrectNameOrSetError(
+                f"Incorrect card name or set: {card_name} ({set_code})."
+            ))
+
+        return results
 
     def create(self, card):
-        """Save a new card into database.
+        """Save a new card into database. If the card (same name and set,
+        or same Scryfall id) is in database already, nothing is written.
 
         Args:
             card: Card -object
         Returns:
-            Id (primary key) of the card.
+            Id (primary key) of the new or the existing card.
         Raises:
             DatabaseCreateError:
         """
@@ -132,36 +375,19 @@ class CardRepository:
         cursor = self._connection.cursor()
 
         try:
-            cursor.execute("""
-                INSERT INTO Cards (
-                    name, released_at, layout, mana_cost, cmc,
-                    colors, color_identity, type_line, oracle_text, keywords,
-                    card_faces, all_parts, power, toughness, image_uris,
-                    set_name, set_code, rarity, flavor_text, prices
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                card.name,
-                card.released_at,
-                card.layout,
-                card.stats.mana_cost,
-                card.stats.cmc,
-                json.dumps(card.stats.colors),
-                json.dumps(card.stats.color_identity),
-                card.stats.type_line,
-                card.oracle_text,
-                json.dumps(card.stats.keywords),
-                json.dumps(card.card_faces),
-                json.dumps(card.all_parts),
-                card.stats.power,
-                card.stats.toughness,
-                json.dumps(card.image_uris),
-                card.set_name,
-                card.set_code,
-                card.rarity,
-                card.flavor_text,
-                json.dumps(card.prices)
-            )
+            cursor.execute(
+                f"{INSERT_CARD_SQL} RETURNING id",
+                card_to_row(card)
             )
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(
+                    """SELECT id FROM Cards
+                    WHERE (name = ? COLLATE NOCASE AND set_code = ?)
+                    OR scryfall_id = ?""",
+                    (card.name, card.set_code, card.scryfall_id)
+                )
+                row = cursor.fetchone()
         except DatabaseError as e:
             raise DatabaseCreateError(
                 "Saving card into database failed."
@@ -169,7 +395,75 @@ class CardRepository:
 
         self._connection.commit()
 
-        return cursor.lastrowid
+        return row[0]
+
+    def create_many(self, cards, chunk_size=BULK_CHUNK_SIZE):
+        """Saves several cards into database in one transaction. Cards are
+        serialised and written 'chunk_size' cards at a time with
+        executemany(), so 'cards' can be a generator of any length. Cards
+        in database already (same name and set, or same Scryfall id)
+        aren't written, like in create().
+
+        Args:
+            cards: Iterable of Card -objects.
+            chunk_size (int): Number of cards written at a time.
+        Returns:
+            List of ids (primary keys) of the new or existing cards,
+            in the same order as 'cards'.
+        Raises:
+            DatabaseCreateError:
+        """
+
+        cards = iter(cards)
+        card_ids = []
+
+        try:
+            with self.transaction():
+                cursor = self._connection.cursor()
+                while True:
+                    chunk = list(islice(cards, chunk_size))
+                    if not chunk:
+                        break
+                    cursor.executemany(
+                        INSERT_CARD_SQL,
+                        [card_to_row(card) for card in chunk]
+                    )
+                    card_ids.extend(self._find_card_ids(cursor, chunk))
+        except DatabaseError as e:
+            raise DatabaseCreateError(
+                "Saving cards into database failed."
+            ) from e
+
+        return card_ids
+
+    def _find_card_ids(self, cursor, cards):
+        """Returns database ids of the saved cards with one query.
+
+        Args:
+            cursor: Database cursor.
+            cards: List of Card -objects.
+        Returns:
+            List of ids in the same order as 'cards'.
+        """
+
+        # Identifiers are passed as one json parameter, because SQLite
+        # limits the number of parameters in one statement
+        identifiers = json.dumps([
+            [card.name, card.set_code, card.scryfall_id] for card in cards
+        ])
+        cursor.execute(
+            """SELECT wanted.key, MIN(Cards.id)
+            FROM json_each(?) AS wanted
+            JOIN Cards ON (
+                Cards.name = json_extract(wanted.value, '$[0]') COLLATE NOCASE
+                AND Cards.set_code = json_extract(wanted.value, '$[1]')
+            ) OR Cards.scryfall_id = json_extract(wanted.value, '$[2]')
+            GROUP BY wanted.key""",
+            (identifiers,)
+        )
+        card_ids = dict(cursor.fetchall())
+
+        return [card_ids[index] for index in range(len(cards))]
 
     def find_card_by_name_and_set(self, card_name, set_code):
         """Returns a specific card based on name and set code.
@@ -188,7 +482,7 @@ class CardRepository:
         try:
             cursor.execute(
                 """SELECT * FROM Cards
-                WHERE name = ? AND set_code = ?""",
+                WHERE name = ? COLLATE NOCASE AND set_code = ?""",
                 (card_name, set_code)
             )
         except DatabaseError as e:
@@ -203,8 +497,36 @@ class CardRepository:
 
         return None
 
+    def get_card_names(self, after_id=0):
+        """Returns names of the cards in database, which have a larger id
+        than 'after_id'. Used for building a card name index incrementally.
+
+        Args:
+            after_id (int): Database id (primary key) of the last known card.
+        Returns:
+            List of tuples: (card_id, card_name) ordered by card_id.
+        Raises:
+            DatabaseFindError:
+        """
+
+        cursor = self._connection.cursor()
+
+        try:
+            cursor.execute(
+                "SELECT id, name FROM Cards WHERE id > ? ORDER BY id",
+                (after_id,)
+            )
+        except DatabaseError as e:
+            raise DatabaseFindError(
+                "Getting card names from database failed."
+            ) from e
+
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+
     def add_card_to_user(self, user_id, card_id):
-        """Add a new card into database for current user.
+        """Add a new card into database for current user. The insert
+        is ignored if the user has the card already, so checking and
+        adding is one statement.
 
         Args:
             user_id (int):
@@ -212,7 +534,7 @@ class CardRepository:
             card_id (int):
                 Database id (primary key) for card.
         Returns:
-            True if success.
+            True if success, False if the card is in the collection already.
         Raises:
             DatabaseCreateError:
         """
@@ -222,8 +544,11 @@ class CardRepository:
         try:
             cursor.execute("""
                 INSERT INTO UserCards (user_id, card_id)
-                VALUES (?, ?)""", (user_id, card_id)
+                VALUES (?, ?)
+                ON CONFLICT DO NOTHING
+                RETURNING card_id""", (user_id, card_id)
                            )
+            added = cursor.fetchone() is not None
         except DatabaseError as e:
             raise DatabaseCreateError(
                 "Saving card for current user in database failed."
@@ -231,7 +556,48 @@ class CardRepository:
 
         self._connection.commit()
 
-        return True
+        return added
+
+    def add_cards_to_user_bulk(self, user_id, card_ids, chunk_size=BULK_CHUNK_SIZE):
+        """Adds several cards to the collection of a user in one transaction.
+        Cards already in the collection are skipped.
+
+        Args:
+            user_id (int):
+                Database id (primary key) for user.
+            card_ids:
+                Iterable of database ids (primary keys) for cards.
+            chunk_size (int):
+                Number of cards written at a time.
+        Returns:
+            Number of cards added.
+        Raises:
+            DatabaseCreateError:
+        """
+
+        card_ids = iter(card_ids)
+        added = 0
+
+        try:
+            with self.transaction():
+                cursor = self._connection.cursor()
+                while True:
+                    chunk = list(islice(card_ids, chunk_size))
+                    if not chunk:
+                        break
+                    cursor.executemany(
+                        """INSERT INTO UserCards (user_id, card_id)
+                        VALUES (?, ?)
+                        ON CONFLICT DO NOTHING""",
+                        [(user_id, card_id) for card_id in chunk]
+                    )
+                    added += cursor.rowcount
+        except DatabaseError as e:
+            raise DatabaseCreateError(
+                "Saving cards for current user in database failed."
+            ) from e
+
+        return added
 
     def delete_card_from_user(self, card_id, user_id):
         """Delete card from table UserCards.
@@ -264,16 +630,15 @@ class CardRepository:
 
         return True
 
-    def get_user_card_names_and_set_codes(self, user_id):
-        """Gets card names and set codes of the cards
+    def get_user_card_ids_names_and_set_codes(self, user_id):
+        """Gets card ids, names and set codes of the cards
         owned by the current user.
 
         Args:
             user_id (int):
                 Database id (primary key) for user.
         Returns:
-            List of tuples: (card_name, set_code).
-            None if not found.
+            List of tuples: (card_id, card_name, set_code).
         Raises:
             DatabaseFindError:
         """
@@ -282,9 +647,9 @@ class CardRepository:
 
         try:
             cursor.execute(
-                """SELECT c.name, c.set_code
+                """SELECT c.id, c.name, c.set_code
                 FROM Cards c
-                LEFT JOIN UserCards uc ON c.id = uc.card_id
+                JOIN UserCards uc ON c.id = uc.card_id
                 WHERE uc.user_id = ?""",
                 (user_id,)
             )
@@ -293,12 +658,71 @@ class CardRepository:
                 "Getting users card names from database failed."
             ) from e
 
-        rows = cursor.fetchall()
+        return [(row[0], row[1], row[2]) for row in cursor.fetchall()]
 
-        if rows:
-            return rows
+    def get_user_card_image_uris(self, user_id):
+        """Gets names, set codes and small image uris of the cards owned by
+        the user. Only these columns are read, the cards aren't decoded.
+        For double sided cards the image of the first face is used.
 
-        return None
+        Args:
+            user_id (int):
+                Database id (primary key) for user.
+        Returns:
+            List of tuples: (card_name, set_code, image_uri), image_uri
+            is None if the card has no image.
+        Raises:
+            DatabaseFindError:
+        """
+
+        cursor = self._connection.cursor()
+
+        try:
+            cursor.execute(
+                """SELECT c.name, c.set_code, COALESCE(
+                    json_extract(c.image_uris, '$.small'),
+                    json_extract(c.card_faces, '$[0].image_uris.small')
+                )
+                FROM Cards c
+                JOIN UserCards uc ON c.id = uc.card_id
+                WHERE uc.user_id = ?""",
+                (user_id,)
+            )
+        except DatabaseError as e:
+            raise DatabaseFindError(
+                "Getting users card images from database failed."
+            ) from e
+
+        return [(row[0], row[1], row[2]) for row in cursor.fetchall()]
+
+    def get_user_cards(self, user_id):
+        """Gets the cards owned by the current user.
+
+        Args:
+            user_id (int):
+                Database id (primary key) for user.
+        Returns:
+            List of Card -objects.
+        Raises:
+            DatabaseFindError:
+        """
+
+        cursor = self._connection.cursor()
+
+        try:
+            cursor.execute(
+                """SELECT c.*
+                FROM Cards c
+                JOIN UserCards uc ON c.id = uc.card_id
+                WHERE uc.user_id = ?""",
+                (user_id,)
+            )
+        except DatabaseError as e:
+            raise DatabaseFindError(
+                "Getting users cards from database failed."
+            ) from e
+
+        return [Card.from_database(row) for row in cursor.fetchall()]
 
     def user_has_card(self, user_id, card_id):
         """Returns true of false based on whether current
@@ -334,6 +758,24 @@ class CardRepository:
 
         return False
 
+    def _image_path(self, card_name, set_code):
+        filename = card_name_to_png_filename(card_name, set_code)
+
+        return os.path.join(self._images_dir, filename)
+
+    def card_image_exists(self, card_name, set_code):
+        """Returns true or false based on whether the card image
+        is already saved on disk.
+
+        Args:
+            card_name (str): Name of the Magic card.
+            set_code (str): The code for card set.
+        Returns:
+            True or false.
+        """
+
+        return os.path.exists(self._image_path(card_name, set_code))
+
     def save_card_image(self, image_uri, card_name, set_code):
         """Saves card image into /images -folder. There are FOUR special
         layouts of Magic the Gathering cards: 'split', 'flip', 'transform' and 'modal_dfc'.
@@ -350,23 +792,45 @@ class CardRepository:
             CardImageWriteError:
         """
 
-        filename = card_name_to_png_filename(card_name, set_code)
-        dirname = os.path.dirname(__file__)
-        image_path = os.path.abspath(
-            os.path.join(dirname, "..", "..", "images", filename)
-        )
+        image_path = self._image_path(card_name, set_code)
+        temp_path = None
 
         try:
-            response = requests.get(image_uri, timeout=10)
-            response.raise_for_status()
-            with open(image_path, "wb") as f:
-                f.write(response.content)
+            # NOTE: The image server isn't rate limited like the api
+            response = self._http.get(image_uri, stream=True, throttle=False)
+            try:
+                response.raise_for_status()
+                # The image is streamed into a temporary file, which is renamed
+                # only when complete, so a failed download never leaves
+                # a broken image behind
+                with tempfile.NamedTemporaryFile(
+                    dir=self._images_dir,
+                    suffix=".part",
+                    delete=False
+                ) as f:
+                    temp_path = f.name
+                    for chunk in response.iter_content(IMAGE_CHUNK_SIZE):
+                        f.write(chunk)
+            finally:
+                response.close()
+            os.replace(temp_path, image_path)
         except requests.exceptions.RequestException as e:
+            self._remove_temp_file(temp_path)
             raise CardImageNotFoundError("Fetching card image failed.") from e
         except OSError as e:
+            self._remove_temp_file(temp_path)
             raise CardImageWriteError(
                 "Writing card image to disk failed."
             ) from e
 
+    @staticmethod
+    def _remove_temp_file(path):
+        if path and os.path.exists(path):
+            os.remove(path)
+
 
-card_repository = CardRepository(get_database_connection())
+card_repository = CardRepository(
+    get_database_connection(),
+    http_client=scryfall_http_client,
+    response_cache=default_response_cache
+)
@@ -0,0 +1,405 @@
+from sqlite3 import DatabaseError
+from dataclasses import dataclass, field
+from itertools import islice
+import time
+from entities.card import Card
+from utils.database.database_connection import get_database_connection
+from utils.bulk_data import iter_bulk_data_file
+from repositories.card_repository import (
+    BULK_CHUNK_SIZE,
+    CARD_COLUMNS,
+    INSERT_CARD_SQL,
+    card_to_row,
+    DatabaseFindError
+)
+
+
+class CatalogImportError(Exception):
+    pass
+
+
+_ASSIGNMENTS = ", ".join(f"{column} = ?" for column in CARD_COLUMNS)
+
+# Cards added before the catalog existed don't have scryfall_id
+UPDATE_CARD_BY_NAME_SQL = f"""
+    UPDATE OR IGNORE Cards SET {_ASSIGNMENTS}
+    WHERE name = ? COLLATE NOCASE AND set_code = ?
+    AND (scryfall_id IS NULL OR scryfall_id = ?)
+    """
+
+UPDATE_CARD_BY_ID_SQL = f"UPDATE OR IGNORE Cards SET {_ASSIGNMENTS} WHERE id = ?"
+
+
+def name_key(name, set_code):
+    """Returns the key, which identifies a card by name and set like the
+    unique index of table Cards: like COLLATE NOCASE, only ASCII letters
+    are case insensitive."""
+
+    return name.encode("utf-8").lower(), set_code
+
+
+@dataclass
+class SyncReport:
+    """Result of a catalog sync.
+
+    Attributes:
+        inserted (int): New cards.
+        updated (int): Changed cards.
+        deleted (int): Cards missing from the bulk data.
+        unchanged (int): Cards with the same content hash.
+        skipped (int): Other printings of a card already in the set.
+        kept (int): Cards missing from the bulk data, but kept
+            because they are in a collection.
+        elapsed (float): Total duration in seconds.
+        write_elapsed (float): Time spent in database writes in seconds.
+    """
+
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    kept: int = 0
+    elapsed: float = 0.0
+    write_elapsed: float = 0.0
+
+
+@dataclass
+class _SyncState:
+    """Stored cards during a catalog sync.
+
+    Attributes:
+        stored (dict): Scryfall id -> (card_id, content_hash, name key).
+        owners (dict): Name key -> Scryfall id of the card stored with
+            the name and set (None for cards without Scryfall id).
+        seen (set): Scryfall ids found in the bulk data.
+        inserts (list): Rows of new cards, which haven't been written yet.
+        skipped (dict): Name key -> the first skipped printing (Card -object)
+            of a card stored with another Scryfall id. Inserted after all,
+            if the stored printing is deleted.
+    """
+
+    stored: dict = field(default_factory=dict)
+    owners: dict = field(default_factory=dict)
+    seen: set = field(default_factory=set)
+    inserts: list = field(default_factory=list)
+    skipped: dict = field(default_factory=dict)
+
+
+class CatalogRepository:
+    """Class responsible for the local card catalog, which is built
+    from Scryfall bulk data files. The catalog is stored in table Cards,
+    so cards in the catalog can be added to a collection without
+    any api.scryfall.com requests.
+
+    Attributes:
+        connection:
+            Connection -object for the database connection.
+    """
+
+    def __init__(self, connection):
+        """Class constructor. Creates a new catalog repository.
+
+        Args:
+            connection:
+                Connection -object for the database connection.
+        """
+
+        self._connection = connection
+
+    def import_bulk_data(self, path, batch_size=1000):
+        """Imports cards from a Scryfall bulk data file (e.g. 'default_cards')
+        into the catalog. The file is read as a stream, so only 'batch_size'
+        cards are in memory at a time. Existing cards are updated.
+
+        NOTE: The application identifies cards by name and set, so only the
+        first printing of a card in a set is imported (e.g. basic lands have
+        several printings in one set).
+
+        Args:
+            path (str): Path to the bulk data json file.
+            batch_size (int): Number of cards written at a time.
+        Returns:
+            Number of cards imported.
+        Raises:
+            CatalogImportError:
+        """
+
+        cards = iter_bulk_data_file(path)
+        imported = 0
+
+        try:
+            while True:
+                batch = list(islice(cards, batch_size))
+                if not batch:
+                    break
+                imported += self._write_batch(batch)
+        except (OSError, ValueError, DatabaseError) as e:
+            self._connection.rollback()
+            raise CatalogImportError(
+                "Importing bulk data into card catalog failed."
+            ) from e
+
+        self._connection.commit()
+
+        return imported
+
+    def sync_bulk_data(self, path):
+        """Syncs the catalog with a newer Scryfall bulk data file. Cards are
+        matched by Scryfall id and only cards whose content hash has changed
+        are written, so the cost depends on the number of changes instead of
+        the size of the catalog. Cards missing from the file are deleted,
+        unless they are in a collection. Everything is done in one transaction.
+
+        Args:
+            path (str): Path to the bulk data json file.
+        Returns:
+            SyncReport -object.
+        Raises:
+            CatalogImportError:
+        """
+
+        start = time.perf_counter()
+        report = SyncReport()
+        cursor = self._connection.cursor()
+
+        try:
+            state = self._load_sync_state(cursor)
+
+            for card_data in iter_bulk_data_file(path):
+                self._sync_card(cursor, Card.from_scryfall_json(card_data), state, report)
+
+            written_at = time.perf_counter()
+            self._insert_new_cards(cursor, state, report)
+            self._delete_missing(cursor, state, report)
+            self._insert_skipped(cursor, state, report)
+            report.write_elapsed += time.perf_counter() - written_at
+        except (OSError, ValueError, DatabaseError) as e:
+            self._connection.rollback()
+            raise CatalogImportError(
+                "Syncing bulk data into card catalog failed."
+            ) from e
+
+        self._connection.commit()
+        report.elapsed = time.perf_counter() - start
+
+        return report
+
+    @staticmethod
+    def _load_sync_state(cursor):
+        cursor.execute("SELECT scryfall_id, id, content_hash, name, set_code FROM Cards")
+        state = _SyncState()
+
+        for scryfall_id, card_id, content_hash, name, set_code in cursor.fetchall():
+            key = name_key(name, set_code)
+            state.owners[key] = scryfall_id
+            if scryfall_id is not None:
+                state.stored[scryfall_id] = (card_id, content_hash, key)
+
+        return state
+
+    def _sync_card(self, cursor, card, state, report):
+        """Writes the card, if it's new or its content hash has changed.
+        New cards are inserted in batches of BULK_CHUNK_SIZE. Other printings
+        of a card already stored in the set are skipped without database
+        access.
+
+        Args:
+            cursor: Database cursor.
+            card: Card -object
+            state: _SyncState -object, which is updated.
+            report: SyncReport -object, which is updated.
+        """
+
+        state.seen.add(card.scryfall_id)
+        key = name_key(card.name, card.set_code)
+        existing = state.stored.get(card.scryfall_id)
+        # Cards without Scryfall id are updated by the first printing
+        owner = state.owners.get(key, card.scryfall_id)
+
+        if not existing and owner not in (None, card.scryfall_id):
+            self._skip_card(key, card, state, report)
+            return
+
+        row = card_to_row(card)
+        if existing and existing[1] == row[-1]:
+            report.unchanged += 1
+            return
+
+        if not existing and key not in state.owners:
+            self._queue_new_card(cursor, card, row, state, report)
+            return
+
+        written_at = time.perf_counter()
+        # Writes are applied in the order of the bulk data
+        self._insert_new_cards(cursor, state, report)
+        written = self._write_synced_card(cursor, card, row, existing, report)
+        report.write_elapsed += time.perf_counter() - written_at
+
+        if written:
+            if existing and state.owners.get(existing[2]) == card.scryfall_id:
+                del state.owners[existing[2]]
+            state.owners[key] = card.scryfall_id
+
+    @staticmethod
+    def _skip_card(key, card, state, report):
+        # The stored printing may be missing from the bulk data,
+        # see _insert_skipped()
+        state.skipped.setdefault(key, card)
+        report.skipped += 1
+
+    def _queue_new_card(self, cursor, card, row, state, report):
+        state.inserts.append(row)
+        state.owners[name_key(card.name, card.set_code)] = card.scryfall_id
+        report.inserted += 1
+
+        if len(state.inserts) >= BULK_CHUNK_SIZE:
+            written_at = time.perf_counter()
+            self._insert_new_cards(cursor, state, report)
+            report.write_elapsed += time.perf_counter() - written_at
+
+    def _write_synced_card(self, cursor, card, row, existing, report):
+        """Updates the stored card or inserts a new card.
+
+        Returns:
+            True if the card was written.
+        """
+
+        if not existing:
+            written = self._write_card(cursor, card, row)
+            if written:
+                report.inserted += 1
+            else:
+                report.skipped += 1
+            return written
+
+        cursor.execute(UPDATE_CARD_BY_ID_SQL, (*row, existing[0]))
+        # Ignored, if the new name and set belong to another card
+        if cursor.rowcount > 0:
+            report.updated += 1
+            return True
+
+        report.skipped += 1
+        return False
+
+    @staticmethod
+    def _insert_new_cards(cursor, state, report):
+        if not state.inserts:
+            return
+
+        cursor.executemany(INSERT_CARD_SQL, state.inserts)
+        # Counted as inserted already, unless a unique index ignored the row
+        ignored = len(state.inserts) - cursor.rowcount
+        report.inserted -= ignored
+        report.skipped += ignored
+        state.inserts.clear()
+
+    def _delete_missing(self, cursor, state, report):
+        missing = {
+            card_id: scryfall_id
+            for scryfall_id, (card_id, _, _) in state.stored.items()
+            if scryfall_id not in state.seen
+        }
+        card_ids = list(missing)
+
+        # NOTE: SQLite limits the number of parameters in one statement
+        for start in range(0, len(card_ids), 500):
+            batch = card_ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in batch)
+            cursor.execute(
+                f"""DELETE FROM Cards
+                WHERE id IN ({placeholders})
+                AND id NOT IN (SELECT card_id FROM UserCards)
+                RETURNING id""",
+                batch
+            )
+            deleted = cursor.fetchall()
+            report.deleted += len(deleted)
+            report.kept += len(batch) - len(deleted)
+
+            # Names of deleted cards are free for other printings
+            for (card_id,) in deleted:
+                key = state.stored[missing[card_id]][2]
+                if state.owners.get(key) == missing[card_id]:
+                    del state.owners[key]
+
+    def _insert_skipped(self, cursor, state, report):
+        """Inserts the skipped printing of a card, whose stored printing
+        was deleted as missing from the bulk data."""
+
+        for key, card in state.skipped.items():
+            if key in state.owners:
+                continue
+            if self._write_card(cursor, card, card_to_row(card)):
+                state.owners[key] = card.scryfall_id
+                report.skipped -= 1
+                report.inserted += 1
+
+    def _write_batch(self, batch):
+        """Writes the batch with two executemany() calls: cards stored with
+        the same name and set are updated and the others inserted. Other
+        printings of a card already in the catalog are ignored by both.
+
+        Returns:
+            Number of cards written.
+        """
+
+        cursor = self._connection.cursor()
+        cards = [Card.from_scryfall_json(card_data) for card_data in batch]
+        rows = [card_to_row(card) for card in cards]
+
+        cursor.executemany(
+            UPDATE_CARD_BY_NAME_SQL,
+            [
+                (*row, card.name, card.set_code, card.scryfall_id)
+                for card, row in zip(cards, rows)
+            ]
+        )
+        written = cursor.rowcount
+        cursor.executemany(INSERT_CARD_SQL, rows)
+
+        return written + cursor.rowcount
+
+    def _write_card(self, cursor, card, row):
+        """Updates the card with the same name and set, or inserts a new card.
+
+        Returns:
+            True if the card was written, false if another printing
+            of the card is already in the catalog.
+        """
+
+        cursor.execute(
+            UPDATE_CARD_BY_NAME_SQL,
+            (*row, card.name, card.set_code, card.scryfall_id)
+        )
+        if cursor.rowcount > 0:
+            return True
+
+        cursor.execute(INSERT_CARD_SQL, row)
+
+        return cursor.rowcount > 0
+
+    def count(self):
+        """Returns the number of cards in the catalog.
+
+        Returns:
+            Number of cards with a Scryfall id.
+        Raises:
+            DatabaseFindError:
+        """
+
+        cursor = self._connection.cursor()
+
+        try:
+            cursor.execute(
+                "SELECT COUNT(*) FROM Cards WHERE scryfall_id IS NOT NULL"
+            )
+        except DatabaseError as e:
+            raise DatabaseFindError(
+                "Counting catalog cards failed."
+            ) from e
+
+        return cursor.fetchone()[0]
+
+
+catalog_repository = CatalogRepository(get_database_connection())
@@ -0,0 +1,151 @@
+from sqlite3 import DatabaseError
+import re
+from entities.card import Card
+from utils.database.database_connection import get_database_connection
+from repositories.card_repository import DatabaseFindError
+from config import SEARCH_PAGE_SIZE
+
+
+# Relative weights of the CardsSearch columns in ranking:
+# name, type_line, oracle_text, flavor_text
+RANK_WEIGHTS = (10.0, 5.0, 1.0, 0.5)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def to_match_query(text):
+    """Converts free text into a FTS5 query, which matches cards containing
+    all the words. The last word is matched as a prefix, so a partially
+    written word finds results. Punctuation is ignored, so the text can't
+    contain FTS5 syntax.
+
+    Args:
+        text (str): Search text, e.g. "flying dragon".
+    Returns:
+        FTS5 query, e.g. '"flying" "dragon"*', or None if the text
+        contains no words.
+    """
+
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        return None
+
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+
+    return " ".join(terms)
+
+
+class SearchRepository:
+    """Class responsible for full-text search of the card catalog. The
+    name, type line, oracle text and flavor text of the cards are indexed
+    in the FTS5 table CardsSearch, which triggers keep in sync with Cards.
+
+    Attributes:
+        connection:
+            Connection -object for the database connection.
+    """
+
+    def __init__(self, connection):
+        """Class constructor. Creates a new search repository.
+
+        Args:
+            connection:
+                Connection -object for the database connection.
+        """
+
+        self._connection = connection
+
+    def search_cards(self, text, user_id=None, limit=SEARCH_PAGE_SIZE, offset=0):
+        """Searches cards by words in their name, type line, oracle text
+        or flavor text. Matches in the name rank highest.
+
+        Args:
+            text (str): Search text, e.g. "flying dragon".
+            user_id (int): Search only the collection of the user.
+                Defaults to None (whole catalog).
+            limit (int): Maximum number of results.
+            offset (int): Number of results skipped, for paging.
+        Returns:
+            List of Card -objects, best match first.
+        Raises:
+            DatabaseFindError:
+        """
+
+        match_query = to_match_query(text)
+        if match_query is None:
+            return []
+
+        weights = ", ".join(map(str, RANK_WEIGHTS))
+        collection_join = ""
+        parameters = [match_query]
+        if user_id is not None:
+            collection_join = """JOIN UserCards
+                ON UserCards.card_id = CardsSearch.rowid AND UserCards.user_id = ?"""
+            parameters.insert(0, user_id)
+
+        cursor = self._connection.cursor()
+
+        # The page is ranked and cut in the index first, so only the rows
+        # on the page are read from Cards
+        try:
+            cursor.execute(
+                f"""SELECT Cards.* FROM (
+                    SELECT CardsSearch.rowid AS card_id,
+                        bm25(CardsSearch, {weights}) AS score
+                    FROM CardsSearch
+                    {collection_join}
+                    WHERE CardsSearch MATCH ?
+                    ORDER BY score
+                    LIMIT ? OFFSET ?
+                ) AS hits
+                JOIN Cards ON Cards.id = hits.card_id
+                ORDER BY hits.score""",
+                (*parameters, limit, offset)
+            )
+        except DatabaseError as e:
+            raise DatabaseFindError("Searching cards failed.") from e
+
+        return [Card.from_database(row) for row in cursor.fetchall()]
+
+    def find_cards(self, query, user_id=None, limit=SEARCH_PAGE_SIZE, offset=0):
+        """Returns the cards matching a compiled query. Filtering is done
+        in the database, with the indexes of the filtered columns.
+
+        Args:
+            query: CompiledQuery -object.
+            user_id (int): Filter only the collection of the user.
+                Defaults to None (whole catalog).
+            limit (int): Maximum number of results.
+            offset (int): Number of results skipped, for paging.
+        Returns:
+            List of Card -objects ordered by name.
+        Raises:
+            DatabaseFindError:
+        """
+
+        collection_join = ""
+        parameters = list(query.parameters)
+        if user_id is not None:
+            collection_join = """JOIN UserCards
+                ON UserCards.card_id = Cards.id AND UserCards.user_id = ?"""
+            parameters.insert(0, user_id)
+
+        cursor = self._connection.cursor()
+
+        try:
+            cursor.execute(
+                f"""SELECT Cards.* FROM Cards
+                {collection_join}
+                WHERE {query.where}
+                ORDER BY Cards.name COLLATE NOCASE, Cards.id
+                LIMIT ? OFFSET ?""",
+                (*parameters, limit, offset)
+            )
+        except DatabaseError as e:
+            raise DatabaseFindError("Filtering cards failed.") from e
+
+        return [Card.from_database(row) for row in cursor.fetchall()]
+
+
+search_repository = SearchRepository(get_database_connection())
@@ -0,0 +1,194 @@
+from sqlite3 import DatabaseError
+import time
+import requests
+from utils.database.database_connection import get_database_connection
+from utils.http.http_client import HttpClient, scryfall_http_client
+from repositories.card_repository import (
+    SetsNotFoundError,
+    DatabaseCreateError,
+    DatabaseFindError
+)
+from config import SCRYFALL_API_URL
+
+
+class SetRepository:
+    """Class responsible for the list of Magic card sets. The sets are saved
+    into database, so they are available immediately and offline, and
+    revalidated against api.scryfall.com with conditional requests.
+
+    Attributes:
+        connection:
+            Connection -object for the database connection.
+        http_client:
+            HttpClient -object, pooled session for all HTTP traffic.
+        api_url (str):
+            Base url of the Scryfall API.
+    """
+
+    def __init__(self, connection, http_client=None, api_url=SCRYFALL_API_URL):
+        """Class constructor. Creates a new set repository.
+
+        Args:
+            connection:
+                Connection -object for the database connection.
+            http_client:
+                HttpClient -object, pooled session for all HTTP traffic.
+                Defaults to a new HttpClient.
+            api_url (str):
+                Base url of the Scryfall API.
+        """
+
+        self._connection = connection
+        self._http = http_client or HttpClient()
+        self._api_url = api_url.rstrip("/")
+
+    def close(self):
+        """Closes the pooled HTTP connections."""
+
+        self._http.close()
+
+    def find_all(self):
+        """Returns the saved card sets.
+
+        Returns:
+            List of card sets in dict format (code, name, released_at
+            and set_type), ordered by name. Empty if the sets haven't
+            been fetched yet.
+        Raises:
+            DatabaseFindError:
+        """
+
+        cursor = self._connection.cursor()
+
+        try:
+            cursor.execute(
+                """SELECT code, name, released_at, set_type
+                FROM CardSets ORDER BY name"""
+            )
+        except DatabaseError as e:
+            raise DatabaseFindError(
+                "Getting card sets from database failed."
+            ) from e
+
+        return [dict(row) for row in cursor.fetchall()]
+
+    def fetched_at(self):
+        """Returns when the saved sets were last fetched or revalidated.
+
+        Returns:
+            Seconds since the epoch or None if the sets haven't been fetched.
+        Raises:
+            DatabaseFindError:
+        """
+
+        return self._get_validators()["fetched_at"]
+
+    def _get_validators(self):
+        cursor = self._connection.cursor()
+
+        try:
+            cursor.execute(
+                """SELECT etag, last_modified, fetched_at
+                FROM CardSetsCache WHERE id = 1"""
+            )
+        except DatabaseError as e:
+            raise DatabaseFindError(
+                "Getting card sets from database failed."
+            ) from e
+
+        row = cursor.fetchone()
+
+        return dict(row) if row else {
+            "etag": None, "last_modified": None, "fetched_at": None
+        }
+
+    def revalidate(self):
+        """Fetches the sets from api.scryfall.com, if they have changed since
+        the last fetch, and saves them into database. The request is
+        conditional (If-None-Match / If-Modified-Since), so unchanged sets
+        are answered with an empty "304 Not Modified" response.
+
+        Returns:
+            True if the saved sets changed, otherwise False.
+        Raises:
+            SetsNotFoundError:
+            DatabaseCreateError:
+        """
+
+        validators = self._get_validators()
+        response = self._fetch(validators)
+
+        try:
+            with self._connection.transaction():
+                cursor = self._connection.cursor()
+                changed = False
+                if response.status_code != 304:
+                    changed = self._replace(cursor, response.json()["data"])
+                    validators["etag"] = response.headers.get("ETag")
+                    validators["last_modified"] = response.headers.get("Last-Modified")
+
+                validators["fetched_at"] = time.time()
+                cursor.execute(
+                    """INSERT INTO CardSetsCache (id, etag, last_modified, fetched_at)
+                    VALUES (1, :etag, :last_modified, :fetched_at)
+                    ON CONFLICT (id) DO UPDATE SET
+                        etag = excluded.etag,
+                        last_modified = excluded.last_modified,
+                        fetched_at = excluded.fetched_at""",
+                    validators
+                )
+        except DatabaseError as e:
+            raise DatabaseCreateError(
+                "Saving card sets into database failed."
+            ) from e
+
+        return changed
+
+    def _fetch(self, validators):
+        headers = {"Accept": "application/json"}
+        if validators["etag"]:
+            headers["If-None-Match"] = validators["etag"]
+        if validators["last_modified"]:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        try:
+            response = self._http.get(f"{self._api_url}/sets", headers=headers)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise SetsNotFoundError("All sets couldn't be loaded") from e
+
+        return response
+
+    @staticmethod
+    def _replace(cursor, sets):
+        """Replaces the saved sets.
+
+        Returns:
+            True if the sets differ from the saved ones.
+        """
+
+        rows = sorted(
+            (card_set["code"], card_set["name"],
+             card_set.get("released_at"), card_set.get("set_type"))
+            for card_set in sets
+        )
+        cursor.execute(
+            "SELECT code, name, released_at, set_type FROM CardSets ORDER BY code"
+        )
+        if [tuple(row) for row in cursor.fetchall()] == rows:
+            return False
+
+        cursor.execute("DELETE FROM CardSets")
+        cursor.executemany(
+            """INSERT OR REPLACE INTO CardSets (code, name, released_at, set_type)
+            VALUES (?, ?, ?, ?)""",
+            rows
+        )
+
+        return True
+
+
+set_repository = SetRepository(
+    get_database_connection(),
+    http_client=scryfall_http_client
+)
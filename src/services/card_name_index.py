@@ -0,0 +1,189 @@
+import re
+import unicodedata
+
+
+def normalize_card_name(name):
+    """Normalizes a card name for matching: accents, punctuation and case
+    are removed, e.g. "Hunter's Talent" -> "hunters talent".
+
+    Args:
+        name (str):
+    Returns:
+        Normalized name.
+    """
+
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = name.casefold().replace("-", " ")
+    name = re.sub(r"[^\w\s]", "", name)
+
+    return " ".join(name.split())
+
+
+def edit_distance(first, second, max_distance):
+    """Returns the edit distance (insertions, deletions, substitutions and
+    transpositions of adjacent characters) between two strings, or
+    max_distance + 1 if the distance is larger than max_distance."""
+
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+
+    two_rows_back = previous_row = []
+    row = list(range(len(second) + 1))
+
+    for i in range(1, len(first) + 1):
+        previous_row, row = row, [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            row[j] = min(row[j - 1] + 1, previous_row[j] + 1, previous_row[j - 1] + cost)
+            if (i > 1 and j > 1 and first[i - 1] == second[j - 2]
+                    and first[i - 2] == second[j - 1]):
+                row[j] = min(row[j], two_rows_back[j - 2] + 1)
+        two_rows_back = previous_row
+        if min(row) > max_distance:
+            return max_distance + 1
+
+    return row[-1]
+
+
+class CardNameIndex:
+    """In-memory index of card names, which resolves loosely typed names
+    (case, punctuation and one typo) into precise card names without
+    api.scryfall.com. Typos are found with precomputed single character
+    deletions of every name ("symmetric delete"), so a lookup only does
+    a few dictionary lookups.
+
+    Attributes:
+        max_distance (int): Maximum edit distance of a typo.
+        min_fuzzy_length (int): Names shorter than this must match exactly.
+    """
+
+    def __init__(self, max_distance=1, min_fuzzy_length=4):
+        """Class constructor. Creates a new empty card name index.
+
+        Args:
+            max_distance (int): Maximum edit distance of a typo.
+            min_fuzzy_length (int): Names shorter than this must match exactly.
+        """
+
+        self.max_distance = max_distance
+        self.min_fuzzy_length = min_fuzzy_length
+        self._names = {}
+        self._deletes = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, card_name):
+        """Adds a card name into the index. The front face of a double sided
+        card ("Delver of Secrets // Insectile Aberration") resolves into the
+        full name as well.
+
+        Args:
+            card_name (str): Precise card name.
+        """
+
+        keys = [normalize_card_name(card_name)]
+        if " // " in card_name:
+            keys.append(normalize_card_name(card_name.split(" // ")[0]))
+
+        for key in keys:
+            names = self._names.get(key)
+            if names is None:
+                self._names[key] = card_name
+                self._add_deletes(key)
+            elif isinstance(names, str):
+                if names != card_name:
+                    self._names[key] = {names, card_name}
+            else:
+                names.add(card_name)
+
+    def _add_deletes(self, key):
+        if len(key) < self.min_fuzzy_length:
+            return
+
+        for delete in self._single_deletes(key):
+            keys = self._deletes.get(delete)
+            # Most deletes belong to one name, a tuple is used only for the
+            # rest to keep the index small
+            if keys is None:
+                self._deletes[delete] = key
+            elif isinstance(keys, str):
+                if keys != key:
+                    self._deletes[delete] = (keys, key)
+            elif key not in keys:
+                self._deletes[delete] = (*keys, key)
+
+    @staticmethod
+    def _single_deletes(key):
+        return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+    def resolve(self, card_name):
+        """Resolves a loosely typed card name (case, punctuation and accents)
+        into a precise card name. Typos aren't corrected, see resolve_typo().
+
+        Args:
+            card_name (str):
+        Returns:
+            Precise card name, or None if the name isn't in the index
+            or matches several names.
+        """
+
+        names = self._names.get(normalize_card_name(card_name))
+
+        if isinstance(names, str):
+            return names
+
+        return None
+
+    def resolve_typo(self, card_name):
+        """Resolves a card name with one typo into a precise card name.
+        A valid card name can be one typo away from another card (e.g.
+        "Hush" and "Gush"), so this is meant only for names, which weren't
+        found as such.
+
+        Args:
+            card_name (str):
+        Returns:
+            Precise card name, or None if no name or several names
+            are one typo away.
+        """
+
+        key = normalize_card_name(card_name)
+
+        if len(key) < self.min_fuzzy_length:
+            return None
+
+        return self._resolve_typo(key)
+
+    def _resolve_typo(self, key):
+        candidates = set()
+        deletes = self._single_deletes(key)
+
+        for variant in (key, *deletes):
+            keys = self._deletes.get(variant)
+            if isinstance(keys, str):
+                candidates.add(keys)
+            elif keys:
+                candidates.update(keys)
+            if variant in self._names and variant != key:
+                candidates.add(variant)
+
+        matches = [
+            candidate for candidate in candidates
+            if edit_distance(key, candidate, self.max_distance) <= self.max_distance
+        ]
+        names = {
+            name
+            for match in matches
+            for name in self._as_set(self._names[match])
+        }
+
+        if len(names) == 1:
+            return names.pop()
+
+        return None
+
+    @staticmethod
+    def _as_set(names):
+        return {names} if isinstance(names, str) else names
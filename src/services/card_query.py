@@ -0,0 +1,416 @@
+from dataclasses import dataclass
+import operator
+import re
+from utils.lru_cache import LRUCache
+from config import QUERY_PLAN_CACHE_SIZE
+
+
+class InvalidQueryError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Term:
+    """A single filter, e.g. "cmc<=3".
+
+    Attributes:
+        key (str): Field name, None for a card name word.
+        operator (str): One of ":", "=", "!=", "<", "<=", ">", ">=".
+        value (str): Value to compare with.
+    """
+
+    key: str
+    operator: str
+    value: str
+
+
+@dataclass(frozen=True)
+class Not:
+    child: object
+
+
+@dataclass(frozen=True)
+class And:
+    children: tuple
+
+
+@dataclass(frozen=True)
+class Or:
+    children: tuple
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    """A query compiled into SQL.
+
+    Attributes:
+        where (str): Parameterised SQL condition over the Cards table.
+        parameters (tuple): Values of the parameters.
+    """
+
+    where: str
+    parameters: tuple
+
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<open>\() | (?P<close>\)) | (?P<negate>-)(?=[(\w"]) |
+        (?:(?P<key>[a-zA-Z]+)(?P<operator><=|>=|!=|:|<|>|=))?
+        (?P<value>"[^"]*"|[^\s()"]+)
+    )
+""", re.VERBOSE)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# A key and an operator without a value, e.g. "t:"
+KEY_WITHOUT_VALUE_PATTERN = re.compile(r"([a-zA-Z]+)(?:<=|>=|!=|:|<|>|=)")
+
+COLORS = {
+    "w": "W", "white": "W",
+    "u": "U", "blue": "U",
+    "b": "B", "black": "B",
+    "r": "R", "red": "R",
+    "g": "G", "green": "G"
+}
+
+RARITIES = ("common", "uncommon", "rare", "mythic")
+RARITY_ALIASES = {rarity[0]: rarity for rarity in RARITIES}
+
+KEY_ALIASES = {
+    "c": "color", "color": "color",
+    "id": "identity", "identity": "identity", "ci": "identity",
+    "t": "type", "type": "type",
+    "o": "oracle", "oracle": "oracle",
+    "cmc": "cmc", "mv": "cmc", "manavalue": "cmc",
+    "r": "rarity", "rarity": "rarity",
+    "s": "set", "set": "set", "e": "set", "edition": "set",
+    "kw": "keyword", "keyword": "keyword",
+    "name": "name"
+}
+
+NUMERIC_OPERATORS = {":": "=", "=": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+ORDER_COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+FULL_TEXT_SQL = "Cards.id IN (SELECT rowid FROM CardsSearch WHERE CardsSearch MATCH ?)"
+
+
+def parse_query(text):
+    """Parses a Scryfall style query, e.g. "c:r cmc<=3 t:creature -r:common".
+    Terms are combined with AND, "or" combines alternatives, "-" negates
+    a term and parentheses group terms. A word without a key matches
+    the card name.
+
+    Args:
+        text (str): Query text.
+    Returns:
+        Syntax tree of Term, Not, And and Or -objects, or None for
+        an empty query.
+    Raises:
+        InvalidQueryError:
+    """
+
+    return _Parser(_tokenize(text)).parse()
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.strip()
+
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if not match or match.end() == position:
+            raise InvalidQueryError(f"Invalid query near: {text[position:]}")
+        position = match.end()
+
+        if match["open"] or match["close"] or match["negate"]:
+            tokens.append(match.group(match.lastgroup))
+            continue
+
+        value = match["value"]
+        quoted = value.startswith('"')
+        value = value.strip('"')
+
+        if not quoted:
+            _check_value_given(match.group(0).strip())
+
+        if match["key"] is None and not quoted and value.casefold() in ("or", "and"):
+            tokens.append(value.casefold())
+        else:
+            tokens.append(Term(match["key"], match["operator"] or ":", value))
+
+    return tokens
+
+
+def _check_value_given(word):
+    """Raises an error for a known key without a value, which would
+    otherwise be matched as a card name (e.g. "t:") or take a part of
+    the operator as its value (e.g. "cmc>=")."""
+
+    match = KEY_WITHOUT_VALUE_PATTERN.fullmatch(word)
+    if match and match[1].casefold() in KEY_ALIASES:
+        raise InvalidQueryError(f"Missing value for '{word}' in query.")
+
+
+class _Parser:
+    """Recursive descent parser:
+
+        expression = conjunction ("or" conjunction)*
+        conjunction = unary ("and"? unary)*
+        unary = "-" unary | "(" expression ")" | Term
+    """
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._position = 0
+
+    def _peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def _next(self):
+        token = self._peek()
+        self._position += 1
+        return token
+
+    def parse(self):
+        if not self._tokens:
+            return None
+
+        node = self._expression()
+        if self._peek() is not None:
+            raise InvalidQueryError(f"Unexpected '{self._peek()}' in query.")
+
+        return node
+
+    def _expression(self):
+        children = [self._conjunction()]
+        while self._peek() == "or":
+            self._next()
+            children.append(self._conjunction())
+
+        return children[0] if len(children) == 1 else Or(tuple(children))
+
+    def _conjunction(self):
+        children = [self._unary()]
+        while self._peek() not in (None, "or", ")"):
+            if self._peek() == "and":
+                self._next()
+            children.append(self._unary())
+
+        return children[0] if len(children) == 1 else And(tuple(children))
+
+    def _unary(self):
+        token = self._next()
+
+        if token == "-":
+            return Not(self._unary())
+        if token == "(":
+            node = self._expression()
+            if self._next() != ")":
+                raise InvalidQueryError("Missing ')' in query.")
+            return node
+        if isinstance(token, Term):
+            return token
+
+        raise InvalidQueryError(f"Unexpected '{token or 'end of query'}' in query.")
+
+
+def _full_text(column, value, prefix=False):
+    words = WORD_PATTERN.findall(value)
+    if not words:
+        raise InvalidQueryError(f"Missing words in '{value}'.")
+
+    phrase = f'{column} : "{" ".join(words)}"'
+
+    return FULL_TEXT_SQL, (phrase + "*" if prefix else phrase,)
+
+
+def _compile_colors(table, term):
+    """Compiles a color filter over CardColors or CardColorIdentity. Cards
+    with given colors are found from the primary key of the table, without
+    reading the other cards."""
+
+    value = term.value.casefold()
+    own_colors = f"SELECT 1 FROM {table} WHERE {table}.card_id = Cards.id"
+    total = f"(SELECT COUNT(*) FROM {table} WHERE {table}.card_id = Cards.id)"
+
+    if value in ("c", "colorless"):
+        return f"NOT EXISTS ({own_colors})", ()
+    if value in ("m", "multicolor"):
+        return f"{total} >= 2", ()
+
+    if value in COLORS:
+        colors = (COLORS[value],)
+    elif all(letter in COLORS for letter in value):
+        colors = tuple(sorted({COLORS[letter] for letter in value}))
+    else:
+        raise InvalidQueryError(f"Unknown color '{term.value}'.")
+
+    count = len(colors)
+    with_color = " INTERSECT ".join(
+        f"SELECT card_id FROM {table} WHERE color = ?" for _ in colors
+    )
+    contains_all = f"Cards.id IN ({with_color})"
+    only_these = (
+        f"NOT EXISTS ({own_colors} AND {table}.color NOT IN "
+        f"({', '.join('?' for _ in colors)}))"
+    )
+    conditions = {
+        ":": contains_all,
+        ">=": contains_all,
+        "=": f"{contains_all} AND {total} = {count}",
+        "!=": f"NOT ({contains_all} AND {total} = {count})",
+        ">": f"{contains_all} AND {total} > {count}",
+        "<=": only_these,
+        "<": f"{only_these} AND {total} < {count}"
+    }
+
+    return conditions[term.operator], colors
+
+
+def _compile_cmc(term):
+    try:
+        value = float(term.value)
+    except ValueError as e:
+        raise InvalidQueryError(f"Mana value must be a number: '{term.value}'.") from e
+
+    return f"Cards.cmc {NUMERIC_OPERATORS[term.operator]} ?", (value,)
+
+
+def _compile_rarity(term):
+    value = term.value.casefold()
+    rarity = RARITY_ALIASES.get(value, value)
+    if rarity not in RARITIES:
+        raise InvalidQueryError(f"Unknown rarity '{term.value}'.")
+
+    sql_operator = NUMERIC_OPERATORS[term.operator]
+    if sql_operator in ("=", "!="):
+        return f"Cards.rarity {sql_operator} ?", (rarity,)
+
+    # Rarities are ordered, e.g. "r>=rare" matches rare and mythic cards
+    compare = ORDER_COMPARISONS[sql_operator]
+    matching = tuple(
+        other for other in RARITIES
+        if compare(RARITIES.index(other), RARITIES.index(rarity))
+    )
+    if not matching:
+        return "0", ()
+
+    return f"Cards.rarity IN ({', '.join('?' for _ in matching)})", matching
+
+
+def _compile_set(term):
+    if term.operator not in (":", "=", "!="):
+        raise InvalidQueryError(f"Set can't be compared with '{term.operator}'.")
+
+    sql_operator = "!=" if term.operator == "!=" else "="
+
+    return f"Cards.set_code {sql_operator} ? COLLATE NOCASE", (term.value,)
+
+
+def _compile_keyword(term):
+    if term.operator != ":":
+        raise InvalidQueryError(f"Keyword can't be compared with '{term.operator}'.")
+
+    return "Cards.id IN (SELECT card_id FROM CardKeywords WHERE keyword = ?)", (term.value,)
+
+
+def _compile_term(term):
+    key = "name" if term.key is None else KEY_ALIASES.get(term.key.casefold())
+
+    if key is None:
+        raise InvalidQueryError(f"Unknown keyword '{term.key}'.")
+    if key not in ("color", "identity", "cmc", "rarity", "set") and term.operator != ":":
+        raise InvalidQueryError(f"'{term.key}' can't be compared with '{term.operator}'.")
+
+    compilers = {
+        "name": lambda: _full_text("name", term.value, prefix=term.key is None),
+        "type": lambda: _full_text("type_line", term.value, prefix=True),
+        "oracle": lambda: _full_text("oracle_text", term.value),
+        "color": lambda: _compile_colors("CardColors", term),
+        "identity": lambda: _compile_colors("CardColorIdentity", term),
+        "cmc": lambda: _compile_cmc(term),
+        "rarity": lambda: _compile_rarity(term),
+        "set": lambda: _compile_set(term),
+        "keyword": lambda: _compile_keyword(term)
+    }
+
+    return compilers[key]()
+
+
+def compile_node(node):
+    """Compiles a syntax tree into a parameterised SQL condition.
+
+    Args:
+        node: Term, Not, And or Or -object.
+    Returns:
+        Tuple (SQL condition, parameters).
+    Raises:
+        InvalidQueryError:
+    """
+
+    if isinstance(node, Term):
+        return _compile_term(node)
+    if isinstance(node, Not):
+        sql, parameters = compile_node(node.child)
+        return f"NOT ({sql})", parameters
+
+    parts = [compile_node(child) for child in node.children]
+    separator = " AND " if isinstance(node, And) else " OR "
+
+    return (
+        separator.join(f"({sql})" for sql, _ in parts),
+        tuple(value for _, parameters in parts for value in parameters)
+    )
+
+
+class CardQueryCompiler:
+    """Compiles Scryfall style queries into SQL conditions, which are run
+    in the database. Compiled queries are kept in a least recently used
+    cache, so repeated queries, e.g. when paging, are parsed only once.
+
+    Attributes:
+        cache_size (int): Maximum number of cached compiled queries.
+    """
+
+    def __init__(self, cache_size=QUERY_PLAN_CACHE_SIZE):
+        """Class constructor. Creates a new query compiler.
+
+        Args:
+            cache_size (int): Maximum number of cached compiled queries.
+        """
+
+        self.cache_size = cache_size
+        self._plans = LRUCache(cache_size)
+
+    def compile(self, text):
+        """Compiles a query.
+
+        Args:
+            text (str): Query text, e.g. "c:r cmc<=3 t:creature".
+        Returns:
+            CompiledQuery -object. An empty query matches all cards.
+        Raises:
+            InvalidQueryError:
+        """
+
+        key = " ".join(text.split())
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+
+        tree = parse_query(key)
+        plan = CompiledQuery("1", ()) if tree is None else CompiledQuery(*compile_node(tree))
+        self._plans.put(key, plan)
+
+        return plan
+
+    def stats(self):
+        """Returns hit and miss counters of the compiled query cache."""
+
+        return self._plans.stats()
+
+
+card_query_compiler = CardQueryCompiler()
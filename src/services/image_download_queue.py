@@ -0,0 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+from repositories.card_repository import (
+    CardImageNotFoundError,
+    CardImageWriteError
+)
+from utils.http.http_client import is_transient_error
+from config import (
+    IMAGE_DOWNLOAD_WORKERS,
+    IMAGE_DOWNLOAD_RETRIES,
+    IMAGE_DOWNLOAD_RETRY_DELAY
+)
+
+
+def is_permanent_failure(error):
+    """Returns true if the image server answered with an error, which
+    doesn't go away by retrying, e.g. "404 Not Found"."""
+
+    cause = error.__cause__
+    if getattr(cause, "response", None) is None:
+        return False
+
+    return not is_transient_error(cause)
+
+
+class ImageDownloadQueue:  # pylint: disable=too-many-instance-attributes
+    """Downloads card images in the background, so saving a card doesn't
+    wait for its image. At most 'max_workers' images are downloaded at
+    a time and an image already in the queue isn't queued again. A failed
+    download is retried at most 'max_retries' times, waiting
+    'retry_delay' seconds before the first retry and twice as long
+    before every further retry.
+
+    Listeners are called in the download thread with arguments
+    (card_name, set_code, error), where error is None on success.
+
+    Attributes:
+        card_repository:
+            Repository, which downloads and saves the images.
+        max_workers (int):
+            Number of concurrent downloads.
+        max_retries (int):
+            How many times a failed download is retried.
+    """
+
+    def __init__(
+        self,
+        card_repository,
+        max_workers=IMAGE_DOWNLOAD_WORKERS,
+        max_retries=IMAGE_DOWNLOAD_RETRIES,
+        retry_delay=IMAGE_DOWNLOAD_RETRY_DELAY
+    ):
+        """Class constructor. Creates a new image download queue.
+
+        Args:
+            card_repository:
+                Repository, which downloads and saves the images.
+            max_workers (int):
+                Number of concurrent downloads.
+            max_retries (int):
+                How many times a failed download is retried.
+            retry_delay (float):
+                Seconds to wait before the first retry.
+        """
+
+        self._card_repository = card_repository
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self._retry_delay = retry_delay
+        # Set at shutdown, so downloads waiting for a retry stop waiting
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="image-download"
+        )
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._listeners = []
+        self.failed = 0
+
+    def add_listener(self, listener):
+        """Adds a function, which is called after every download."""
+
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def queue(self, image_uri, card_name, set_code):
+        """Adds an image into the download queue.
+
+        Args:
+            image_uri (str): Uri for downloading the card image.
+            card_name (str): Name of the Magic card.
+            set_code (str): The code for card set.
+        Returns:
+            Future -object of the download.
+        """
+
+        key = (card_name, set_code)
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(
+                    self._download, image_uri, card_name, set_code
+                )
+                self._pending[key] = future
+
+        return future
+
+    def _download(self, image_uri, card_name, set_code):
+        error = self._save_with_retries(image_uri, card_name, set_code)
+        if error:
+            with self._lock:
+                self.failed += 1
+
+        # The download stays pending until the listeners are called,
+        # so wait() also waits for the listeners
+        try:
+            for listener in list(self._listeners):
+                listener(card_name, set_code, error)
+        finally:
+            with self._lock:
+                self._pending.pop((card_name, set_code), None)
+
+    def _save_with_retries(self, image_uri, card_name, set_code):
+        """Saves the image, retrying failed downloads.
+
+        Returns:
+            Error of the last attempt or None on success.
+        """
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._card_repository.save_card_image(image_uri, card_name, set_code)
+                return None
+            except CardImageWriteError as e:
+                # Writing to disk isn't retried, it fails the same way again
+                return e
+            except CardImageNotFoundError as e:
+                error = e
+                if is_permanent_failure(e) or attempt == self.max_retries:
+                    break
+                if self._stopped.wait(self._retry_delay * 2 ** attempt):
+                    break
+
+        return error
+
+    def pending(self):
+        """Returns the number of queued and running downloads."""
+
+        with self._lock:
+            return len(self._pending)
+
+    def wait(self, timeout=None):
+        """Waits until all queued downloads are finished.
+
+        Args:
+            timeout (float): Maximum wait in seconds, None waits forever.
+        Returns:
+            True if all downloads finished.
+        """
+
+        with self._lock:
+            futures = list(self._pending.values())
+
+        _, not_done = wait(futures, timeout=timeout)
+
+        return not not_done
+
+    def shutdown(self):
+        """Drops queued downloads and waits for the running ones.
+        Downloads waiting for a retry aren't retried."""
+
+        self._stopped.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -1,12 +1,28 @@
+from dataclasses import dataclass
+import threading
+import time
 from repositories.user_repository import (
     user_repository as default_user_repository
 )
 from repositories.card_repository import (
-    card_repository as default_card_repository
+    card_repository as default_card_repository,
+    DatabaseCreateError,
+    DatabaseFindError,
+    IncorrectNameOrSetError
+)
+from repositories.set_repository import (
+    set_repository as default_set_repository
+)
+from repositories.search_repository import (
+    search_repository as default_search_repository
 )
 from entities.user import User
 from entities.card import Card
 from utils.card_utils import card_name_to_png_filename
+from services.card_name_index import CardNameIndex
+from services.image_download_queue import ImageDownloadQueue
+from services.card_query import card_query_compiler
+from config import SETS_CACHE_TTL, SEARCH_PAGE_SIZE
 
 
 class InvalidUsernameError(Exception):
@@ -37,7 +53,24 @@ class CardNotFoundError(Exception):
     pass
 
 
-class MagicService:
+@dataclass(frozen=True)
+class CollectionChange:
+    """A card added into or removed from the collection of a user.
+
+    Attributes:
+        action (str): "added" or "removed".
+        card_id (int): Card database id (primary key).
+        image_filename (str): Filename of the card image.
+        user_id (int): User database id (primary key) of the collection.
+    """
+
+    action: str
+    card_id: int
+    image_filename: str
+    user_id: int
+
+
+class MagicService:  # pylint: disable=too-many-instance-attributes
     """Class responsible for 'Magic archive' application logic.
 
     Attributes:
@@ -46,12 +79,21 @@ class MagicService:
         card_repository:
             Repository responsible for card operations: api.scryfall.com connection
             and database/disk actions.
+        image_download_queue:
+            Queue, which downloads card images in the background.
+        set_repository:
+            Repository responsible for the list of card sets.
+        search_repository:
+            Repository responsible for full-text search of cards.
     """
 
     def __init__(
         self,
         user_repository=default_user_repository,
-        card_repository=default_card_repository
+        card_repository=default_card_repository,
+        image_download_queue=None,
+        set_repository=default_set_repository,
+        search_repository=default_search_repository
     ):
         """Class constructor. Creates a new service for the application logic.
 
@@ -61,11 +103,27 @@ class MagicService:
             card_repository:
                 Repository responsible for card operations: api.scryfall.com connection
                 and database/disk actions.
+            image_download_queue:
+                Queue, which downloads card images in the background.
+                Defaults to a new ImageDownloadQueue for card_repository.
+            set_repository:
+                Repository responsible for the list of card sets.
+            search_repository:
+                Repository responsible for full-text search of cards.
         """
 
         self._user = None
         self._user_repository = user_repository
         self._card_repository = card_repository
+        self._set_repository = set_repository
+        self._search_repository = search_repository
+        self._image_download_queue = (
+            image_download_queue or ImageDownloadQueue(card_repository)
+        )
+        self._name_index = CardNameIndex()
+        self._name_index_last_id = 0
+        self._name_index_lock = threading.Lock()
+        self._collection_listeners = []
 
     def create_user(self, username, password):
         """Creates a new user. First validates that username
@@ -135,40 +193,206 @@ class MagicService:
 
         return user
 
-    def get_user_card_image_filenames(self, user_id):
-        """Gets the card image filenames of the current user.
+    def get_user_card_images(self, user_id):
+        """Gets the cards of the user with their image filenames.
 
         Args:
             user_id (int): User database id (primary key)
-
         Returns:
-            List: List of image filenames for users cards.
+            List of tuples (card_id, image_filename) ordered by filename.
         """
 
-        results = self._card_repository.get_user_card_names_and_set_codes(
+        results = self._card_repository.get_user_card_ids_names_and_set_codes(
             user_id
         )
 
-        if results:
-            return [card_name_to_png_filename(res[0], res[1]) for res in results]
-        return []
+        return sorted(
+            (
+                (card_id, card_name_to_png_filename(card_name, set_code))
+                for card_id, card_name, set_code in results
+            ),
+            key=lambda card: card[1]
+        )
+
+    def search_cards(self, query, user_id=None, limit=SEARCH_PAGE_SIZE, offset=0):
+        """Searches cards by words in their name, type line, oracle text
+        or flavor text, e.g. "flying dragon". Results are ranked, matches
+        in the card name first, and returned one page at a time.
+
+        Args:
+            query (str): Search text.
+            user_id (int): Search only the collection of the user.
+                Defaults to None (whole card catalog).
+            limit (int): Page size.
+            offset (int): Number of results skipped.
+        Returns:
+            List of Card -objects, best match first.
+        Raises:
+            DatabaseFindError:
+        """
+
+        return self._search_repository.search_cards(
+            query,
+            user_id=user_id,
+            limit=limit,
+            offset=offset
+        )
+
+    def filter_cards(self, query, user_id=None, limit=SEARCH_PAGE_SIZE, offset=0):
+        """Filters cards with a Scryfall style query, e.g.
+        "c:r cmc<=3 t:creature r:rare set:mh3". The query is compiled
+        into SQL and run in the database.
+
+        Args:
+            query (str): Query text.
+            user_id (int): Filter only the collection of the user.
+                Defaults to None (whole card catalog).
+            limit (int): Page size.
+            offset (int): Number of results skipped.
+        Returns:
+            List of Card -objects ordered by name.
+        Raises:
+            InvalidQueryError:
+            DatabaseFindError:
+        """
+
+        return self._search_repository.find_cards(
+            card_query_compiler.compile(query),
+            user_id=user_id,
+            limit=limit,
+            offset=offset
+        )
+
+    def get_card_sets(self):
+        """Returns the card sets saved in database, without a network request.
+
+        Returns:
+            Dict, with key = set name and value = set code.
+            Empty if the sets haven't been fetched yet.
+        """
+
+        return {
+            card_set["name"]: card_set["code"]
+            for card_set in self._set_repository.find_all()
+        }
+
+    def card_sets_are_stale(self, max_age=SETS_CACHE_TTL):
+        """Checks if the saved card sets should be revalidated.
+
+        Args:
+            max_age (float): Seconds the saved sets are considered fresh.
+        Returns:
+            True if the sets haven't been fetched or were fetched
+            more than 'max_age' seconds ago.
+        """
+
+        fetched_at = self._set_repository.fetched_at()
+
+        return fetched_at is None or time.time() - fetched_at > max_age
+
+    def refresh_card_sets(self):
+        """Revalidates the saved card sets against api.scryfall.com.
+        Blocks on the network, call from a background thread.
+
+        Returns:
+            Dict of the new sets (set name -> set code), or None
+            if the sets didn't change.
+        Raises:
+            SetsNotFoundError:
+        """
+
+        if self._set_repository.revalidate():
+            return self.get_card_sets()
+
+        return None
+
+    def add_collection_listener(self, listener):
+        """Adds a function, which is called with a CollectionChange -object
+        after a card is added into or removed from the collection. The
+        listener is called in the thread, which made the change."""
+
+        self._collection_listeners.append(listener)
+
+    def remove_collection_listener(self, listener):
+        if listener in self._collection_listeners:
+            self._collection_listeners.remove(listener)
+
+    def _notify_collection_change(self, action, card, user_id):
+        change = CollectionChange(
+            action,
+            card.card_id,
+            card_name_to_png_filename(card.name, card.set_code),
+            user_id
+        )
+        for listener in list(self._collection_listeners):
+            listener(change)
 
     def _assign_card_to_user(self, user_id, card_id):
-        """Assigns card to current user in database.
+        """Assigns card to the user in database.
 
         Args:
             user_id (int): User database id (primary key)
             card_id (int): Card database id (primary key)
+        Returns:
+            True if the card was assigned, False if the user has it already.
         """
 
-        self._card_repository.add_card_to_user(
+        return self._card_repository.add_card_to_user(
             user_id,
             card_id
         )
 
+    def _refresh_name_index(self):
+        """Adds names of the cards saved since the last refresh into
+        the card name index."""
+
+        for card_id, card_name in self._card_repository.get_card_names(
+            self._name_index_last_id
+        ):
+            self._name_index.add(card_name)
+            self._name_index_last_id = card_id
+
+    def _resolve_name(self, card_name, typo=False):
+        """Resolves a card name with the local card name index.
+
+        Args:
+            card_name (str):
+            typo (bool): Correct one typo, instead of case, punctuation
+                and accents only. Defaults to False.
+        Returns:
+            Precise card name or None.
+        """
+
+        # Cards can be fetched from several background threads at once
+        with self._name_index_lock:
+            self._refresh_name_index()
+            if typo:
+                return self._name_index.resolve_typo(card_name)
+            return self._name_index.resolve(card_name)
+
+    def _find_saved_card(self, card_name, set_code):
+        """Finds a card from database. The name is matched regardless of
+        case, punctuation and accents, but typos aren't corrected.
+
+        Returns:
+            Precise card name (or 'card_name' if not in the card name index)
+            and a Card -object, or None if not in database.
+        """
+
+        precise_name = self._resolve_name(card_name) or card_name
+        card = self._card_repository.find_card_by_name_and_set(
+            precise_name,
+            set_code
+        )
+
+        return precise_name, card
+
     def _get_card(self, card_name, set_code):
-        """Get card data from api.scryfall.com to get precise name
-        of the card. Then check if card exists in database already.
+        """Gets the card from database, if it's there already. Otherwise card
+        data is fetched from the local card catalog or api.scryfall.com.
+        A typo in the name is corrected with the local card name index only
+        if the name isn't found at all, because a valid card name can be one
+        typo away from another card.
 
         Args:
             card_name (card_name):
@@ -177,28 +401,49 @@ class MagicService:
         Returns:
             Card data in dict format and a Card -object if in database,
             else None.
+        Raises:
+            IncorrectNameOrSetError:
         """
-        card_data = self._card_repository.fetch_card_by_name_and_set(
-            card_name,
-            set_code
-        )
-        card_precise_name = card_data["name"]
+
+        precise_name, card = self._find_saved_card(card_name, set_code)
+        if card:
+            return card.to_scryfall_json(), card
+
+        try:
+            card_data = self._card_repository.fetch_card_by_name_and_set(
+                precise_name,
+                set_code
+            )
+        except IncorrectNameOrSetError:
+            typo_name = self._resolve_name(card_name, typo=True)
+            if not typo_name or typo_name == precise_name:
+                raise
+            card_data = self._card_repository.fetch_card_by_name_and_set(
+                typo_name,
+                set_code
+            )
+
         card = self._card_repository.find_card_by_name_and_set(
-            card_precise_name,
+            card_data["name"],
             set_code
         )
 
         return card_data, card
 
-    def fetch_card(self, card_name, set_code):
+    def fetch_card(self, card_name, set_code, user_id):
         """Fetches a new Magic card based on card name and set code.
-        First fetches the card data from api.scryfall.com, because the api
-        can handle different spellings for the card name, like exclude
-        commas and apostrophies (ie. hunters talent = Hunter's Talent). 
-
-        Then checks if the card already exists in local database and if so,
-        checks if the current user has it already. Lastly the card and its image
-        are saved if not in database and then assigned to current user.
+        First resolves the precise card name with the local card name index,
+        which handles different spellings of the name, like missing commas
+        and apostrophes (ie. hunters talent = Hunter's Talent). If the card
+        is in database already, it's used as such. Otherwise the card data is
+        read from the local card catalog, or from api.scryfall.com if not in
+        the catalog either. One typo in the name is corrected only if
+        the name isn't found in either.
+
+        Then the card is saved, if not in database, and assigned to the user.
+        The insert into the collection tells whether the user has the card
+        already, so there is no separate check. The card image is downloaded
+        in the background.
 
         NOTE: For double sided cards ie. 'transform' and 'modal_dfc' the card
         image uris are located in database column 'card_faces', because those cards
@@ -207,6 +452,7 @@ class MagicService:
         Args:
             card_name (str):
             set_code (str):
+            user_id (int): User database id (primary key) of the collection.
         Raises:
             CardExistsError:
                 Card already exists in database.
@@ -214,53 +460,183 @@ class MagicService:
 
         card_data, card = self._get_card(card_name, set_code)
 
-        if card:
-            card_id = card.card_id
-            if self._card_repository.user_has_card(self._user.user_id, card_id):
+        card = self._add_card_to_collection(card_data, card, user_id)
+        self._notify_collection_change("added", card, user_id)
+
+    def fetch_cards(self, cards, user_id):
+        """Fetches several Magic cards at once based on card names and set codes.
+        Card data is fetched from api.scryfall.com in batches of 75 cards,
+        after which every card is added to the collection like in fetch_card().
+
+        Args:
+            cards (list):
+                List of tuples: (card_name, set_code).
+            user_id (int):
+                User database id (primary key) of the collection.
+        Returns:
+            Dict of cards that couldn't be added, with key = (card_name, set_code)
+            and value = the error. Empty if all cards were added.
+        """
+
+        cards = list(cards)
+        results = self._card_repository.fetch_cards_by_names_and_sets(cards)
+        errors = {}
+        added = []
+
+        # All cards are saved in one transaction, a failed card only rolls
+        # back its own changes
+        with self._card_repository.transaction():
+            for identifier, result in zip(cards, results):
+                if isinstance(result, Exception):
+                    errors[identifier] = result
+                    continue
+
+                # Cards from api.scryfall.com aren't looked up again,
+                # create() returns the id of a card in database already
+                card, card_data = (
+                    (result, None) if isinstance(result, Card) else (None, result)
+                )
+
+                try:
+                    added.append(
+                        self._add_card_to_collection(card_data, card, user_id)
+                    )
+                except (
+                    CardExistsError,
+                    DatabaseCreateError,
+                    DatabaseFindError
+                ) as e:
+                    errors[identifier] = e
+
+        # Listeners are notified only after the cards are committed
+        for card in added:
+            self._notify_collection_change("added", card, user_id)
+
+        return errors
+
+    def _add_card_to_collection(self, card_data, card, user_id):
+        """Saves the card if not in database, then assigns the card to
+        the user. The card is committed right away and its image is
+        downloaded in the background, if not on disk already.
+
+        Args:
+            card_data (dict): Card data from api.scryfall.com.
+            card: Card -object if in database, else None.
+            user_id (int): User database id (primary key).
+        Returns:
+            Card -object of the added card.
+        Raises:
+            CardExistsError:
+                Card already exists in users collection.
+        """
+
+        with self._card_repository.transaction():
+            if not card:
+                card = Card.from_scryfall_json(card_data)
+                card.card_id = self._card_repository.create(card)
+
+            # The insert tells if the card is in the collection already,
+            # so no separate check is needed
+            if not self._assign_card_to_user(user_id, card.card_id):
                 raise CardExistsError(
                     f"Card '{card.name}' is already in collection"
                 )
-        else:
-            card = Card.from_scryfall_json(card_data)
-            card_id = self._card_repository.create(card)
-            image_uris = card.image_uris
-            if not image_uris:
-                # HACK: For double sided cards we load only one side (face)
-                first_face = card.card_faces[0]
-                image_uris = first_face["image_uris"]
-            self._card_repository.save_card_image(
-                image_uris["small"],
-                card.name,
-                card.set_code
-            )
 
-        self._assign_card_to_user(self._user.user_id, card_id)
+        # Cards imported into the card catalog have no image yet
+        if not self._card_repository.card_image_exists(card.name, card.set_code):
+            self._queue_card_image(card)
+
+        return card
+
+    def _queue_card_image(self, card):
+        """Queues the small image of the card for download.
+
+        Args:
+            card: Card -object
+        """
+
+        image_uris = card.image_uris
+        if not image_uris:
+            # HACK: For double sided cards we load only one side (face)
+            first_face = card.card_faces[0]
+            image_uris = first_face["image_uris"]
+        self._image_download_queue.queue(
+            image_uris["small"],
+            card.name,
+            card.set_code
+        )
 
-    def delete_usercard(self, card_name, set_code):
-        """Deletes card from current user, but not from database.
-        Deletion is based on card name and set.
+    def queue_missing_images(self, user_id):
+        """Queues downloads for the images of the user's cards, which aren't
+        on disk, e.g. because the downloads failed also after retries.
+        Only names, set codes and image uris of the cards are read, but
+        every card is checked on disk, so this should be called from
+        a background thread.
+
+        Args:
+            user_id (int): User database id (primary key).
+        Returns:
+            Number of queued images.
+        """
+
+        queued = 0
+
+        for card_name, set_code, image_uri in (
+            self._card_repository.get_user_card_image_uris(user_id)
+        ):
+            if image_uri and not self._card_repository.card_image_exists(
+                card_name, set_code
+            ):
+                self._image_download_queue.queue(image_uri, card_name, set_code)
+                queued += 1
+
+        return queued
+
+    def wait_for_images(self, timeout=None):
+        """Waits until the queued card images are downloaded.
+
+        Args:
+            timeout (float): Maximum wait in seconds, None waits forever.
+        Returns:
+            True if all downloads finished.
+        """
+
+        return self._image_download_queue.wait(timeout)
+
+    def add_image_listener(self, listener):
+        """Adds a function, which is called with arguments
+        (card_name, set_code, error) from the download thread after
+        every image download."""
+
+        self._image_download_queue.add_listener(listener)
+
+    def remove_image_listener(self, listener):
+        self._image_download_queue.remove_listener(listener)
+
+    def delete_usercard(self, card_name, set_code, user_id):
+        """Deletes card from the user, but not from database.
+        Deletion is based on card name and set. Case, punctuation and
+        accents of the name are ignored, but typos aren't corrected.
 
         Args:
             card_name (str):
             set_code (str):
+            user_id (int): User database id (primary key).
         Raises:
             CardNotFoundError:
         """
 
-        card_data, card = self._get_card(card_name, set_code)
+        precise_name, card = self._find_saved_card(card_name, set_code)
 
-        if card and self._card_repository.user_has_card(
-            self._user.user_id,
-            card.card_id
-        ):
-            self._card_repository.delete_card_from_user(
-                card.card_id,
-                self._user.user_id
-            )
-        else:
-            raise CardNotFoundError(
-                f"Card '{card_data['name']}'not in collection"
-            )
+        with self._card_repository.transaction():
+            if card and self._card_repository.user_has_card(user_id, card.card_id):
+                self._card_repository.delete_card_from_user(card.card_id, user_id)
+            else:
+                raise CardNotFoundError(
+                    f"Card '{precise_name}' not in collection"
+                )
+
+        self._notify_collection_change("removed", card, user_id)
 
     def logout(self):
         """Logout current user."""
@@ -1,24 +1,31 @@
 import unittest
-from unittest.mock import patch, Mock, mock_open
+from unittest.mock import patch, Mock
 import os
+import tempfile
 import requests.exceptions
 from utils.database.initialize_database import initialize_database
+from utils.database.database_connection import get_database_connection
 from utils import test_utils
 from repositories.card_repository import (
+    CardRepository,
     card_repository,
     IncorrectNameOrSetError,
-    SetsNotFoundError,
+    ScryfallUnavailableError,
     DatabaseCreateError,
     CardImageNotFoundError
 )
 from repositories.user_repository import user_repository
 from entities.user import User
+from utils.http.http_client import HttpClient, RetryPolicy
+from utils.http.rate_limiter import TokenBucket
+from utils.http.response_cache import ResponseCache, response_cache
 
 
 class TestCardRepository(unittest.TestCase):
     def setUp(self):
         self.mock_response = Mock()
         initialize_database()
+        response_cache.clear()
 
         self.fake_card = None
         self.card_id = None
@@ -38,7 +45,7 @@ class TestCardRepository(unittest.TestCase):
 
         return result
 
-    @patch("repositories.card_repository.requests.get")
+    @patch("utils.http.http_client.requests.Session.get")
     def test_fetch_card_by_name_and_set_with_valid_parameters(self, mock_get):
         self.mock_response.status_code = 200
         self.mock_response.json.return_value = {"name": "Lightning Bolt"}
@@ -50,7 +57,7 @@ class TestCardRepository(unittest.TestCase):
 
         self.assertEqual(result, {"name": "Lightning Bolt"})
 
-    @patch("repositories.card_repository.requests.get")
+    @patch("utils.http.http_client.requests.Session.get")
     def test_fetch_card_by_name_and_set_with_invalid_parameters(self, mock_get):
         self.mock_response.raise_for_status.side_effect = requests.exceptions.RequestException(
             "404 error"
@@ -62,31 +69,260 @@ class TestCardRepository(unittest.TestCase):
                 "Invalid card name", "m10"
             )
 
-    @patch("repositories.card_repository.requests.get")
-    def test_fetch_all_sets_returns_json(self, mock_get):
-        self.mock_response.status_code = 200
-        self.mock_response.json.return_value = {"data": ["set1", "set2"]}
-        mock_get.return_value = self.mock_response
+    def test_fetch_card_by_name_and_set_uses_pooled_client_and_api_url(self):
+        http_client_mock = Mock()
+        http_client_mock.get.return_value = self.mock_response
+        self.mock_response.json.return_value = {"name": "Lightning Bolt"}
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=http_client_mock,
+            api_url="http://localhost:8000/"
+        )
 
-        result = card_repository.fetch_all_sets()
+        repository.fetch_card_by_name_and_set("Lightning Bolt", "m10")
 
-        self.assertEqual(result, {"data": ["set1", "set2"]})
+        http_client_mock.get.assert_called_once_with(
+            "http://localhost:8000/cards/named",
+            params={"exact": "Lightning Bolt", "set": "m10"},
+            headers={"Accept": "application/json"}
+        )
 
-    @patch("repositories.card_repository.requests.get")
-    def test_fetch_all_sets_fails(self, mock_get):
-        self.mock_response.raise_for_status.side_effect = requests.exceptions.RequestException(
-            "404 error"
+    def test_fetch_card_by_name_and_set_serves_repeats_from_response_cache(self):
+        http_client_mock = Mock()
+        http_client_mock.get.return_value = self.mock_response
+        self.mock_response.json.return_value = {"name": "Lightning Bolt"}
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=http_client_mock,
+            response_cache=ResponseCache(get_database_connection())
+        )
+
+        first = repository.fetch_card_by_name_and_set("Lightning Bolt", "m10")
+        second = repository.fetch_card_by_name_and_set("Lightning Bolt", "m10")
+
+        self.assertEqual(first, second)
+        http_client_mock.get.assert_called_once()
+        self.assertEqual(repository.response_cache_stats()["memory_hits"], 1)
+
+    def create_response(self, status_code, headers=None):
+        response = Mock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.json.return_value = {"name": "Lightning Bolt"}
+        if status_code >= 400:
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+                f"{status_code} error", response=response
+            )
+        return response
+
+    @patch("utils.http.http_client.requests.Session.get")
+    def test_fetch_card_by_name_and_set_retries_transient_errors(self, mock_get):
+        mock_get.side_effect = [
+            self.create_response(503),
+            self.create_response(429),
+            self.create_response(200)
+        ]
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=HttpClient(
+                rate_limiter=None, retry_policy=RetryPolicy(backoff_base=0)
+            )
+        )
+
+        result = repository.fetch_card_by_name_and_set("Lightning Bolt", "m10")
+
+        self.assertEqual(result, {"name": "Lightning Bolt"})
+        self.assertEqual(repository.http_metrics()["requests"], 3)
+        self.assertEqual(repository.http_metrics()["retries"], 2)
+
+    @patch("utils.http.http_client.requests.Session.get")
+    def test_fetch_card_by_name_and_set_fails_when_retries_run_out(self, mock_get):
+        mock_get.return_value = self.create_response(503)
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=HttpClient(
+                rate_limiter=None,
+                retry_policy=RetryPolicy(max_retries=2, backoff_base=0)
+            )
         )
-        mock_get.return_value = self.mock_response
 
-        with self.assertRaises(SetsNotFoundError):
-            card_repository.fetch_all_sets()
+        with self.assertRaises(ScryfallUnavailableError):
+            repository.fetch_card_by_name_and_set("Lightning Bolt", "m10")
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch("utils.http.http_client.requests.Session.get")
+    def test_fetch_card_by_name_and_set_honours_retry_after(self, mock_get):
+        mock_get.side_effect = [
+            self.create_response(429, {"Retry-After": "2"}),
+            self.create_response(200)
+        ]
+        mock_sleep = Mock()
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=HttpClient(
+                rate_limiter=None,
+                retry_policy=RetryPolicy(backoff_base=0),
+                sleep=mock_sleep
+            )
+        )
+
+        repository.fetch_card_by_name_and_set("Lightning Bolt", "m10")
+
+        mock_sleep.assert_called_once_with(2.0)
+
+    @patch("utils.http.http_client.requests.Session.get")
+    def test_fetch_card_by_name_and_set_is_rate_limited(self, mock_get):
+        mock_get.return_value = self.create_response(200)
+        mock_sleep = Mock()
+        rate_limiter = TokenBucket(
+            rate=10,
+            capacity=1,
+            clock=lambda: 0.0,
+            sleep=mock_sleep
+        )
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=HttpClient(rate_limiter=rate_limiter)
+        )
+
+        repository.fetch_card_by_name_and_set("Lightning Bolt", "m10")
+        repository.fetch_card_by_name_and_set("Lightning Bolt", "m10")
+
+        self.assertAlmostEqual(repository.http_metrics()["limiter_wait"], 0.1)
+        mock_sleep.assert_called_once()
+
+    def test_fetch_cards_by_names_and_sets_splits_into_batches(self):
+        http_client_mock = Mock()
+        identifiers = [(f"Card {i}", "tst") for i in range(160)]
+
+        def post(url, json, headers):
+            response = Mock()
+            response.json.return_value = {
+                "not_found": [],
+                "data": [
+                    {"name": item["name"], "set": item["set"]}
+                    for item in json["identifiers"]
+                ]
+            }
+            return response
+
+        http_client_mock.post.side_effect = post
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=http_client_mock
+        )
+
+        results = repository.fetch_cards_by_names_and_sets(identifiers)
+
+        self.assertEqual(http_client_mock.post.call_count, 3)
+        self.assertEqual(len(results), 160)
+        self.assertEqual(results[159]["name"], "Card 159")
+
+    def test_fetch_cards_by_names_and_sets_maps_not_found_to_errors(self):
+        http_client_mock = Mock()
+        http_client_mock.post.return_value = self.mock_response
+        self.mock_response.json.return_value = {
+            "not_found": [{"name": "Invalid Card", "set": "m10"}],
+            "data": [
+                {"name": "Lightning Bolt", "set": "m10"},
+                {"name": "Firebolt", "set": "ema"}
+            ]
+        }
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=http_client_mock
+        )
+
+        results = repository.fetch_cards_by_names_and_sets([
+            ("lightning bolt", "m10"),
+            ("Invalid Card", "M10"),
+            ("Firebolt", "ema")
+        ])
+
+        self.assertEqual(results[0]["name"], "Lightning Bolt")
+        self.assertIsInstance(results[1], IncorrectNameOrSetError)
+        self.assertEqual(results[2]["name"], "Firebolt")
+
+    def test_fetch_cards_by_names_and_sets_returns_cards_in_database(self):
+        http_client_mock = Mock()
+        fake_card = test_utils.create_fake_magic_card()
+        card_id = card_repository.create(fake_card)
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=http_client_mock
+        )
+
+        results = repository.fetch_cards_by_names_and_sets([
+            (fake_card.name, fake_card.set_code)
+        ])
+
+        self.assertEqual(results[0].card_id, card_id)
+        http_client_mock.post.assert_not_called()
+
+    def test_close_closes_http_client(self):
+        http_client_mock = Mock()
+        repository = CardRepository(
+            get_database_connection(),
+            http_client=http_client_mock
+        )
+
+        repository.close()
+
+        http_client_mock.close.assert_called_once()
 
     def test_create_card(self):
         self.create_fake_card_and_user_and_assign()
 
         self.assertEqual(self.card_id, 1)
 
+    def test_create_card_fills_color_and_keyword_tables(self):
+        self.create_fake_card_and_user_and_assign()
+        connection = get_database_connection()
+
+        colors = connection.execute(
+            "SELECT color FROM CardColors WHERE card_id = ?", (self.card_id,)
+        ).fetchall()
+        keywords = connection.execute(
+            "SELECT keyword FROM CardKeywords WHERE card_id = ?", (self.card_id,)
+        ).fetchall()
+
+        self.assertEqual([row[0] for row in colors], ["Red"])
+        self.assertEqual([row[0] for row in keywords], ["Flying"])
+
+    def test_create_existing_card_returns_existing_id(self):
+        self.create_fake_card_and_user_and_assign()
+        same_card = test_utils.create_fake_magic_card()
+        same_card.name = "test_dragon"
+
+        card_id = card_repository.create(same_card)
+
+        self.assertEqual(card_id, self.card_id)
+        self.assertEqual(card_repository.get_card_names(), [(1, "Test_Dragon")])
+
+    def test_create_card_with_existing_scryfall_id_returns_existing_id(self):
+        card = test_utils.create_fake_magic_card()
+        card.scryfall_id = "e3285e6b-3e79-4d7c-bf96-d920f973b80f"
+        card_id = card_repository.create(card)
+        other_card = test_utils.create_fake_magic_card()
+        other_card.name = "Renamed_Dragon"
+        other_card.scryfall_id = card.scryfall_id
+
+        self.assertEqual(card_repository.create(other_card), card_id)
+
+    def test_create_card_in_failed_transaction_is_rolled_back(self):
+        with self.assertRaises(CardImageNotFoundError):
+            with card_repository.transaction():
+                card_repository.create(test_utils.create_fake_magic_card())
+                raise CardImageNotFoundError()
+
+        self.assertIsNone(card_repository.find_card_by_name_and_set("Test_Dragon", "TST"))
+
+    def test_find_card_by_name_and_set_ignores_case(self):
+        self.create_fake_card_and_user_and_assign()
+        card = card_repository.find_card_by_name_and_set("test_dragon", "TST")
+
+        self.assertEqual(card.card_id, self.card_id)
+
     def test_find_card_by_name_and_set(self):
         self.create_fake_card_and_user_and_assign()
         card = card_repository.find_card_by_name_and_set("Test_Dragon", "TST")
@@ -98,12 +334,75 @@ class TestCardRepository(unittest.TestCase):
 
         self.assertEqual(result, True)
 
+    def test_add_card_to_user_returns_false_for_card_in_collection(self):
+        self.create_fake_card_and_user_and_assign()
+
+        result = card_repository.add_card_to_user(self.user_id, self.card_id)
+
+        self.assertEqual(result, False)
+
     def test_add_card_to_user_fail(self):
         with self.assertRaises(DatabaseCreateError):
             card_repository.add_card_to_user(
                 "wrong_id", "wrong_id"
             )
 
+    def fake_cards(self, count):
+        for i in range(count):
+            card = test_utils.create_fake_magic_card()
+            card.name = f"Card {i}"
+            yield card
+
+    def test_create_many_returns_ids_in_order(self):
+        existing_id = card_repository.create(test_utils.create_fake_magic_card())
+        cards = list(self.fake_cards(3))
+        cards.insert(1, test_utils.create_fake_magic_card())
+        cards.append(cards[0])
+
+        card_ids = card_repository.create_many(cards, chunk_size=2)
+
+        self.assertEqual(len(set(card_ids)), 4)
+        self.assertEqual(card_ids[1], existing_id)
+        self.assertEqual(card_ids[4], card_ids[0])
+        self.assertEqual(len(card_repository.get_card_names()), 4)
+
+    def test_create_many_accepts_generator(self):
+        card_ids = card_repository.create_many(self.fake_cards(1200))
+
+        self.assertEqual(len(card_ids), 1200)
+        self.assertEqual(
+            card_repository.find_card_by_name_and_set("Card 1199", "TST").card_id,
+            card_ids[-1]
+        )
+
+    def test_add_cards_to_user_bulk_skips_cards_in_collection(self):
+        self.create_fake_card_and_user_and_assign()
+        card_ids = card_repository.create_many(self.fake_cards(3))
+
+        added = card_repository.add_cards_to_user_bulk(
+            self.user_id,
+            iter([self.card_id, *card_ids]),
+            chunk_size=2
+        )
+
+        self.assertEqual(added, 3)
+        self.assertEqual(
+            len(card_repository.get_user_card_ids_names_and_set_codes(self.user_id)),
+            4
+        )
+
+    def test_add_cards_to_user_bulk_fail_rolls_back(self):
+        self.create_fake_card_and_user_and_assign()
+        card_ids = card_repository.create_many(self.fake_cards(2))
+
+        with self.assertRaises(DatabaseCreateError):
+            card_repository.add_cards_to_user_bulk(self.user_id, [*card_ids, -1])
+
+        self.assertEqual(
+            len(card_repository.get_user_card_ids_names_and_set_codes(self.user_id)),
+            1
+        )
+
     def test_delete_card_from_user_success(self):
         self.create_fake_card_and_user_and_assign()
         response = card_repository.delete_card_from_user(
@@ -113,17 +412,32 @@ class TestCardRepository(unittest.TestCase):
 
         self.assertEqual(response, True)
 
-    def test_get_user_card_names_success(self):
+    def test_get_user_card_ids_names_and_set_codes(self):
         self.create_fake_card_and_user_and_assign()
-        result = card_repository.get_user_card_names_and_set_codes(
-            self.user_id)
 
-        self.assertEqual(result[0][0], "Test_Dragon")
+        result = card_repository.get_user_card_ids_names_and_set_codes(self.user_id)
+
+        self.assertEqual(result, [(self.card_id, "Test_Dragon", "TST")])
+
+    def test_get_user_card_image_uris(self):
+        self.create_fake_card_and_user_and_assign()
+        double_sided = test_utils.create_fake_magic_card()
+        double_sided.name = "Front // Back"
+        double_sided.image_uris = None
+        double_sided.card_faces = [
+            {"image_uris": {"small": "https://example.com/front_small.jpg"}},
+            {"image_uris": {"small": "https://example.com/back_small.jpg"}}
+        ]
+        card_repository.add_card_to_user(
+            self.user_id, card_repository.create(double_sided)
+        )
 
-    def test_get_user_card_names_returns_none(self):
-        result = card_repository.get_user_card_names_and_set_codes(-1)
+        result = card_repository.get_user_card_image_uris(self.user_id)
 
-        self.assertEqual(result, None)
+        self.assertEqual(sorted(result), [
+            ("Front // Back", "TST", "https://example.com/front_small.jpg"),
+            ("Test_Dragon", "TST", "https://example.com/card_small.jpg")
+        ])
 
     def test_user_has_card_success(self):
         self.create_fake_card_and_user_and_assign()
@@ -140,31 +454,53 @@ class TestCardRepository(unittest.TestCase):
 
         self.assertEqual(result, False)
 
-    @patch("repositories.card_repository.requests.get")
-    @patch("repositories.card_repository.open", new_callable=mock_open)
-    def test_save_card_image_successfully(self, mock_open_file, mock_get):
+    def create_repository_with_images_dir(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        repository = CardRepository(
+            get_database_connection(),
+            images_dir=directory.name
+        )
+        self.addCleanup(repository.close)
+
+        return repository, directory.name
+
+    @patch("utils.http.http_client.requests.Session.get")
+    def test_save_card_image_successfully(self, mock_get):
         self.mock_response.status_code = 200
-        self.mock_response.content = b"fake_image_data"
+        self.mock_response.iter_content.return_value = [b"fake_image", b"_data"]
         mock_get.return_value = self.mock_response
+        repository, images_dir = self.create_repository_with_images_dir()
 
-        image_uri = "http://example.com/card.png"
-        card_name = "Fake Card"
-        set_code = "FAKE"
-        dirname = os.path.dirname(__file__)
-        expected_path = os.path.abspath(
-            os.path.join(
-                dirname, "..", "..", "..", "images", "fake_card_FAKE.png"
-            )
+        repository.save_card_image(
+            "http://example.com/card.png", "Fake Card", "FAKE"
         )
 
-        card_repository.save_card_image(
-            image_uri, card_name, set_code
-        )
+        with open(os.path.join(images_dir, "fake_card_FAKE.png"), "rb") as f:
+            self.assertEqual(f.read(), b"fake_image_data")
+        self.assertEqual(os.listdir(images_dir), ["fake_card_FAKE.png"])
+        self.assertTrue(repository.card_image_exists("Fake Card", "FAKE"))
+        self.mock_response.close.assert_called_once()
+
+    @patch("utils.http.http_client.requests.Session.get")
+    def test_save_card_image_failed_download_leaves_no_file(self, mock_get):
+        def broken_body(chunk_size):
+            yield b"fake_image"
+            raise requests.exceptions.ConnectionError("Connection reset")
+
+        self.mock_response.status_code = 200
+        self.mock_response.iter_content.side_effect = broken_body
+        mock_get.return_value = self.mock_response
+        repository, images_dir = self.create_repository_with_images_dir()
+
+        with self.assertRaises(CardImageNotFoundError):
+            repository.save_card_image(
+                "http://example.com/card.png", "Fake Card", "FAKE"
+            )
 
-        mock_open_file.assert_called_once_with(expected_path, "wb")
-        mock_open_file().write.assert_called_once_with(b"fake_image_data")
+        self.assertEqual(os.listdir(images_dir), [])
 
-    @patch("repositories.card_repository.requests.get")
+    @patch("utils.http.http_client.requests.Session.get")
     def test_save_card_image_requests_error(self, mock_get):
         self.mock_response.raise_for_status.side_effect = requests.exceptions.RequestException(
             "404 error"
@@ -0,0 +1,185 @@
+import unittest
+from unittest.mock import patch
+import io
+import json
+import os
+import tempfile
+from utils.database.initialize_database import initialize_database
+from utils.database.database_connection import get_database_connection
+from utils.bulk_data import iter_json_array
+from utils import test_utils
+from repositories.catalog_repository import catalog_repository, CatalogImportError
+from repositories.card_repository import card_repository
+from repositories.user_repository import user_repository
+from entities.user import User
+
+
+FIXTURE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "fixtures", "default_cards.json"
+)
+
+
+class TestCatalogRepository(unittest.TestCase):
+    def setUp(self):
+        initialize_database()
+
+    def test_iter_json_array_reads_items_across_chunks(self):
+        file = io.StringIO('[\n{"name": "a"},\n{"name": "b, c]"}\n]\n')
+
+        items = list(iter_json_array(file, chunk_size=3))
+
+        self.assertEqual(items, [{"name": "a"}, {"name": "b, c]"}])
+
+    def test_iter_json_array_fails_on_truncated_file(self):
+        file = io.StringIO('[{"name": "a"}, {"name": ')
+
+        with self.assertRaises(ValueError):
+            list(iter_json_array(file, chunk_size=4))
+
+    def test_import_bulk_data_success(self):
+        imported = catalog_repository.import_bulk_data(FIXTURE_PATH)
+
+        self.assertEqual(imported, 4)
+        self.assertEqual(catalog_repository.count(), 4)
+
+    def test_import_bulk_data_twice_updates_cards(self):
+        catalog_repository.import_bulk_data(FIXTURE_PATH)
+        catalog_repository.import_bulk_data(FIXTURE_PATH, batch_size=2)
+
+        self.assertEqual(catalog_repository.count(), 4)
+
+    def test_import_bulk_data_updates_card_added_without_catalog(self):
+        fake_card = test_utils.create_fake_magic_card()
+        fake_card.name = "Lightning Bolt"
+        fake_card.set_code = "m10"
+        card_id = card_repository.create(fake_card)
+
+        catalog_repository.import_bulk_data(FIXTURE_PATH)
+        card = card_repository.find_card_by_name_and_set("Lightning Bolt", "m10")
+
+        self.assertEqual(card.card_id, card_id)
+        self.assertEqual(card.stats.type_line, "Instant")
+
+    def test_import_bulk_data_fails_on_missing_file(self):
+        with self.assertRaises(CatalogImportError):
+            catalog_repository.import_bulk_data("missing_file.json")
+
+    def write_changed_bulk_data(self):
+        with open(FIXTURE_PATH, encoding="utf-8") as file:
+            cards = json.load(file)
+
+        cards[0]["prices"]["usd"] = "9.99"
+        del cards[1]
+        cards.append({
+            "id": "0a4bff2b-8d27-4a3c-b6b0-53b3c1cbbd2e",
+            "name": "Firebolt",
+            "set": "ema",
+            "set_name": "Eternal Masters",
+            "image_uris": {"small": "https://cards.scryfall.io/small/firebolt.jpg"}
+        })
+
+        return self.write_bulk_data(cards)
+
+    def write_bulk_data(self, cards):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".json", delete=False, encoding="utf-8"
+        ) as file:
+            json.dump(cards, file)
+        self.addCleanup(os.remove, file.name)
+
+        return file.name
+
+    def test_sync_bulk_data_without_changes_writes_nothing(self):
+        catalog_repository.import_bulk_data(FIXTURE_PATH)
+        connection = get_database_connection()
+        statements = []
+        connection.set_trace_callback(statements.append)
+        self.addCleanup(connection.set_trace_callback, None)
+
+        report = catalog_repository.sync_bulk_data(FIXTURE_PATH)
+
+        self.assertEqual(report.unchanged, 4)
+        self.assertEqual(report.skipped, 1)
+        self.assertEqual(
+            (report.inserted, report.updated, report.deleted), (0, 0, 0)
+        )
+        self.assertEqual(
+            [sql for sql in statements if sql.lstrip().startswith(("INSERT", "UPDATE"))],
+            []
+        )
+
+    def test_sync_bulk_data_doesnt_count_ignored_update_as_updated(self):
+        catalog_repository.import_bulk_data(FIXTURE_PATH)
+        with open(FIXTURE_PATH, encoding="utf-8") as file:
+            cards = json.load(file)
+        # Renamed to the name of another card in the same set
+        cards[3]["name"] = "Lightning Bolt"
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".json", delete=False, encoding="utf-8"
+        ) as file:
+            json.dump(cards, file)
+        self.addCleanup(os.remove, file.name)
+
+        report = catalog_repository.sync_bulk_data(file.name)
+
+        self.assertEqual((report.updated, report.skipped), (0, 2))
+
+    def test_sync_bulk_data_applies_only_changes(self):
+        catalog_repository.import_bulk_data(FIXTURE_PATH)
+
+        report = catalog_repository.sync_bulk_data(self.write_changed_bulk_data())
+
+        self.assertEqual(
+            (report.inserted, report.updated, report.deleted, report.unchanged),
+            (1, 1, 1, 2)
+        )
+        self.assertEqual(
+            card_repository.find_card_by_name_and_set("Lightning Bolt", "m10").prices["usd"],
+            "9.99"
+        )
+        self.assertIsNone(
+            card_repository.find_card_by_name_and_set("Hunter's Talent", "blb")
+        )
+
+    def test_sync_bulk_data_replaces_deleted_printing_with_skipped_one(self):
+        catalog_repository.import_bulk_data(FIXTURE_PATH)
+        with open(FIXTURE_PATH, encoding="utf-8") as file:
+            cards = json.load(file)
+        stored_plains = card_repository.find_card_by_name_and_set("Plains", "m10")
+        del cards[3]
+
+        report = catalog_repository.sync_bulk_data(self.write_bulk_data(cards))
+
+        self.assertEqual(
+            (report.inserted, report.deleted, report.skipped), (1, 1, 0)
+        )
+        plains = card_repository.find_card_by_name_and_set("Plains", "m10")
+        self.assertEqual(plains.scryfall_id, cards[3]["id"])
+        self.assertNotEqual(plains.scryfall_id, stored_plains.scryfall_id)
+
+    def test_sync_bulk_data_keeps_deleted_card_in_collection(self):
+        catalog_repository.import_bulk_data(FIXTURE_PATH)
+        card = card_repository.find_card_by_name_and_set("Hunter's Talent", "blb")
+        user_id = user_repository.create(User("alfa", "1234alfa5678"))
+        card_repository.add_card_to_user(user_id, card.card_id)
+
+        report = catalog_repository.sync_bulk_data(self.write_changed_bulk_data())
+
+        self.assertEqual((report.deleted, report.kept), (0, 1))
+        self.assertTrue(card_repository.user_has_card(user_id, card.card_id))
+
+    def test_sync_bulk_data_fails_on_missing_file(self):
+        with self.assertRaises(CatalogImportError):
+            catalog_repository.sync_bulk_data("missing_file.json")
+
+    @patch("utils.http.http_client.requests.Session.get")
+    def test_fetch_card_by_name_and_set_answers_from_catalog(self, mock_get):
+        catalog_repository.import_bulk_data(FIXTURE_PATH)
+
+        card_data = card_repository.fetch_card_by_name_and_set(
+            "hunter's talent", "blb"
+        )
+
+        self.assertEqual(card_data["name"], "Hunter's Talent")
+        self.assertEqual(card_data["set"], "blb")
+        mock_get.assert_not_called()
@@ -0,0 +1,158 @@
+import unittest
+from utils.database.initialize_database import initialize_database
+from utils.database.database_connection import get_database_connection
+from utils import test_utils
+from repositories.card_repository import card_repository
+from repositories.user_repository import user_repository
+from repositories.search_repository import search_repository, to_match_query
+from services.card_query import card_query_compiler
+from entities.user import User
+
+
+def create_card(name, type_line, oracle_text, flavor_text=None, **fields):
+    card = test_utils.create_fake_magic_card()
+    card.name = name
+    card.stats.type_line = type_line
+    card.oracle_text = oracle_text
+    card.flavor_text = flavor_text
+    card.stats.colors = fields.get("colors", ["R"])
+    card.stats.cmc = fields.get("cmc", 5.0)
+    card.stats.keywords = fields.get("keywords", [])
+    card.rarity = fields.get("rarity", "rare")
+    card.set_code = fields.get("set_code", "tst")
+
+    return card
+
+
+class TestSearchRepository(unittest.TestCase):
+    def setUp(self):
+        initialize_database()
+        self.card_ids = card_repository.create_many([
+            create_card("Shivan Dragon", "Creature — Dragon", "Flying",
+                        cmc=6.0, keywords=["Flying"]),
+            create_card("Serra Angel", "Creature — Angel", "Flying, vigilance",
+                        colors=["W"], cmc=5.0, rarity="uncommon",
+                        keywords=["Flying", "Vigilance"]),
+            create_card("Dragon's Hoard", "Artifact", "Tap: Add one mana.",
+                        colors=[], cmc=3.0, set_code="m19"),
+            create_card("Lightning Bolt", "Instant", "Deals 3 damage.",
+                        "The sparkmage shrieked, calling on the rage of the storms.",
+                        cmc=1.0, rarity="common", set_code="m10"),
+            create_card("Boros Charm", "Instant", "Choose one.",
+                        colors=["R", "W"], cmc=2.0, rarity="uncommon")
+        ])
+
+    def names(self, cards):
+        return [card.name for card in cards]
+
+    def test_to_match_query_quotes_words_and_ignores_syntax(self):
+        self.assertEqual(to_match_query("flying drag"), '"flying" "drag"*')
+        self.assertEqual(to_match_query('"a" OR -b'), '"a" "OR" "b"*')
+        self.assertIsNone(to_match_query(" -- "))
+
+    def test_search_matches_all_words(self):
+        results = search_repository.search_cards("flying dragon")
+
+        self.assertEqual(self.names(results), ["Shivan Dragon"])
+
+    def test_search_ranks_name_matches_first(self):
+        results = search_repository.search_cards("dragon")
+
+        self.assertEqual(self.names(results)[0], "Shivan Dragon")
+        self.assertIn("Dragon's Hoard", self.names(results))
+
+    def test_search_finds_flavor_text_and_prefixes(self):
+        results = search_repository.search_cards("sparkma")
+
+        self.assertEqual(self.names(results), ["Lightning Bolt"])
+
+    def test_search_pages_results(self):
+        first = search_repository.search_cards("flying", limit=1)
+        second = search_repository.search_cards("flying", limit=1, offset=1)
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(self.names(first), self.names(second))
+
+    def test_search_is_limited_to_user_collection(self):
+        user_id = user_repository.create(User("alfa", "1234alfa5678"))
+        card_repository.add_card_to_user(user_id, self.card_ids[1])
+
+        results = search_repository.search_cards("flying", user_id=user_id)
+
+        self.assertEqual(self.names(results), ["Serra Angel"])
+
+    def test_index_follows_updates_and_deletes(self):
+        connection = get_database_connection()
+        with connection.transaction():
+            connection.execute(
+                "UPDATE Cards SET oracle_text = 'Trample' WHERE id = ?",
+                (self.card_ids[0],)
+            )
+            connection.execute("DELETE FROM Cards WHERE id = ?", (self.card_ids[1],))
+
+        self.assertEqual(search_repository.search_cards("flying"), [])
+        self.assertEqual(self.names(search_repository.search_cards("trample")), ["Shivan Dragon"])
+
+    def filter(self, query, user_id=None):
+        return self.names(search_repository.find_cards(
+            card_query_compiler.compile(query),
+            user_id=user_id
+        ))
+
+    def test_find_cards_by_color(self):
+        self.assertEqual(self.filter("c:r"), ["Boros Charm", "Lightning Bolt", "Shivan Dragon"])
+        self.assertEqual(self.filter("c=r"), ["Lightning Bolt", "Shivan Dragon"])
+        self.assertEqual(self.filter("c:rw"), ["Boros Charm"])
+        self.assertEqual(self.filter("c<=w"), ["Dragon's Hoard", "Serra Angel"])
+        self.assertEqual(self.filter("c:c"), ["Dragon's Hoard"])
+        self.assertEqual(self.filter("c:m"), ["Boros Charm"])
+
+    def test_find_double_faced_cards_by_colors_of_faces(self):
+        card = create_card("Delver of Secrets // Insectile Aberration",
+                           "Creature — Human Wizard // Creature — Human Insect",
+                           "", colors=None, cmc=1.0)
+        card.card_faces = [
+            {"name": "Delver of Secrets", "colors": ["U"]},
+            {"name": "Insectile Aberration", "colors": ["U"]}
+        ]
+        card_repository.create(card)
+
+        self.assertEqual(self.filter("c:u"), ["Delver of Secrets // Insectile Aberration"])
+        self.assertEqual(self.filter("c:c"), ["Dragon's Hoard"])
+
+    def test_find_cards_by_cmc_rarity_type_and_set(self):
+        self.assertEqual(self.filter("c:r cmc<=3 t:instant"), ["Boros Charm", "Lightning Bolt"])
+        self.assertEqual(self.filter("r>=rare"), ["Dragon's Hoard", "Shivan Dragon"])
+        self.assertEqual(self.filter("set:M10"), ["Lightning Bolt"])
+        self.assertEqual(self.filter("t:creature -r:uncommon"), ["Shivan Dragon"])
+
+    def test_find_cards_by_keyword_oracle_and_name(self):
+        self.assertEqual(self.filter("kw:vigilance"), ["Serra Angel"])
+        self.assertEqual(self.filter('o:"add one mana"'), ["Dragon's Hoard"])
+        self.assertEqual(self.filter("drag"), ["Dragon's Hoard", "Shivan Dragon"])
+        self.assertEqual(self.filter("t:angel or t:dragon"), ["Serra Angel", "Shivan Dragon"])
+
+    def test_find_cards_in_user_collection(self):
+        user_id = user_repository.create(User("alfa", "1234alfa5678"))
+        card_repository.add_card_to_user(user_id, self.card_ids[0])
+
+        self.assertEqual(self.filter("c:r", user_id=user_id), ["Shivan Dragon"])
+
+    def test_color_and_keyword_tables_follow_card_changes(self):
+        connection = get_database_connection()
+        with connection.transaction():
+            connection.execute(
+                """UPDATE Cards SET colors = '["G"]', keywords = '["Trample"]'
+                WHERE id = ?""",
+                (self.card_ids[0],)
+            )
+            connection.execute("DELETE FROM Cards WHERE id = ?", (self.card_ids[1],))
+
+        self.assertEqual(self.filter("c:g kw:trample"), ["Shivan Dragon"])
+        self.assertEqual(self.filter("kw:flying"), [])
+        rows = connection.execute(
+            "SELECT COUNT(*) FROM CardColors WHERE card_id = ?",
+            (self.card_ids[1],)
+        ).fetchone()[0]
+        self.assertEqual(rows, 0)
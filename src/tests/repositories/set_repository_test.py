@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import Mock, patch
+import requests.exceptions
+from utils.database.initialize_database import initialize_database
+from utils.database.database_connection import get_database_connection
+from repositories.card_repository import SetsNotFoundError
+from repositories.set_repository import SetRepository, set_repository
+from utils.http.http_client import scryfall_http_client
+
+
+class TestSetRepository(unittest.TestCase):
+    def setUp(self):
+        self.mock_response = Mock()
+        initialize_database()
+
+    def create_repository(self, *responses):
+        http_client_mock = Mock()
+        http_client_mock.get.side_effect = responses
+
+        return http_client_mock, SetRepository(
+            get_database_connection(),
+            http_client=http_client_mock
+        )
+
+    def test_sets_are_empty_before_revalidation(self):
+        self.assertEqual(set_repository.find_all(), [])
+        self.assertIsNone(set_repository.fetched_at())
+
+    def test_sets_are_fetched_with_shared_http_client(self):
+        self.mock_response.status_code = 304
+
+        with patch.object(
+            scryfall_http_client, "get", return_value=self.mock_response
+        ) as get_mock:
+            set_repository.revalidate()
+
+        get_mock.assert_called_once()
+
+    def test_revalidate_saves_sets_and_validators(self):
+        self.mock_response.status_code = 200
+        self.mock_response.headers = {"ETag": '"v1"'}
+        self.mock_response.json.return_value = {"data": [
+            {"code": "m10", "name": "Magic 2010", "set_type": "core"},
+            {"code": "ema", "name": "Eternal Masters", "released_at": "2016-06-10"}
+        ]}
+        http_client_mock, repository = self.create_repository(self.mock_response)
+
+        changed = repository.revalidate()
+
+        self.assertTrue(changed)
+        self.assertNotIn("If-None-Match", http_client_mock.get.call_args.kwargs["headers"])
+        self.assertEqual(
+            [card_set["code"] for card_set in repository.find_all()],
+            ["ema", "m10"]
+        )
+        self.assertIsNotNone(repository.fetched_at())
+
+    def test_revalidate_keeps_sets_when_not_modified(self):
+        self.mock_response.status_code = 200
+        self.mock_response.headers = {
+            "ETag": '"v1"',
+            "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"
+        }
+        self.mock_response.json.return_value = {"data": [
+            {"code": "m10", "name": "Magic 2010"}
+        ]}
+        not_modified = Mock(status_code=304, headers={})
+        http_client_mock, repository = self.create_repository(
+            self.mock_response,
+            not_modified
+        )
+        repository.revalidate()
+
+        changed = repository.revalidate()
+
+        headers = http_client_mock.get.call_args.kwargs["headers"]
+        self.assertFalse(changed)
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Wed, 01 Jan 2025 00:00:00 GMT")
+        self.assertEqual(len(repository.find_all()), 1)
+        not_modified.json.assert_not_called()
+
+    def test_revalidate_fails_without_changing_saved_sets(self):
+        self.mock_response.status_code = 200
+        self.mock_response.headers = {}
+        self.mock_response.json.return_value = {"data": [
+            {"code": "m10", "name": "Magic 2010"}
+        ]}
+        _, repository = self.create_repository(
+            self.mock_response,
+            requests.exceptions.ConnectionError("offline")
+        )
+        repository.revalidate()
+
+        with self.assertRaises(SetsNotFoundError):
+            repository.revalidate()
+
+        self.assertEqual(len(repository.find_all()), 1)
@@ -0,0 +1,66 @@
+import unittest
+from services.card_name_index import CardNameIndex, normalize_card_name
+
+
+class TestCardNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CardNameIndex()
+        for card_name in (
+            "Hunter's Talent",
+            "Lightning Bolt",
+            "Lightning Bolts",
+            "Delver of Secrets // Insectile Aberration",
+            "Jace, the Mind-Sculptor",
+            "Æther Vial"
+        ):
+            self.index.add(card_name)
+
+    def test_normalize_card_name(self):
+        self.assertEqual(
+            normalize_card_name("  Jace, the Mind-Sculptor "),
+            "jace the mind sculptor"
+        )
+
+    def test_resolve_ignores_case_and_punctuation(self):
+        self.assertEqual(self.index.resolve("hunters talent"), "Hunter's Talent")
+        self.assertEqual(
+            self.index.resolve("JACE THE MIND SCULPTOR"),
+            "Jace, the Mind-Sculptor"
+        )
+
+    def test_resolve_ignores_accents(self):
+        self.assertEqual(self.index.resolve("æther vial"), "Æther Vial")
+
+    def test_resolve_front_face_of_double_sided_card(self):
+        self.assertEqual(
+            self.index.resolve("delver of secrets"),
+            "Delver of Secrets // Insectile Aberration"
+        )
+
+    def test_resolve_doesnt_correct_typos(self):
+        self.index.add("Gush")
+
+        self.assertIsNone(self.index.resolve("Hush"))
+        self.assertIsNone(self.index.resolve("huntres talent"))
+
+    def test_resolve_typo(self):
+        self.assertEqual(self.index.resolve_typo("huntres talent"), "Hunter's Talent")
+        self.assertEqual(self.index.resolve_typo("hunters taent"), "Hunter's Talent")
+        self.assertEqual(self.index.resolve_typo("hunterss talent"), "Hunter's Talent")
+        self.assertEqual(self.index.resolve_typo("hunters tolent"), "Hunter's Talent")
+
+    def test_resolve_returns_none_for_unknown_name(self):
+        self.assertIsNone(self.index.resolve("Firebolt"))
+        self.assertIsNone(self.index.resolve_typo("hunters tolnet x"))
+        self.assertIsNone(self.index.resolve_typo("Firebolt"))
+
+    def test_resolve_prefers_exact_match(self):
+        self.assertEqual(self.index.resolve("lightning bolt"), "Lightning Bolt")
+
+    def test_resolve_typo_returns_none_for_ambiguous_typo(self):
+        self.assertIsNone(self.index.resolve_typo("lightning boltz"))
+
+    def test_add_same_name_twice(self):
+        self.index.add("Hunter's Talent")
+
+        self.assertEqual(len(self.index), 7)
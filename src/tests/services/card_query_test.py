@@ -0,0 +1,74 @@
+import unittest
+from services.card_query import (
+    CardQueryCompiler,
+    InvalidQueryError,
+    Term,
+    Not,
+    And,
+    Or,
+    parse_query
+)
+
+
+class TestParseQuery(unittest.TestCase):
+    def test_terms_are_combined_with_and(self):
+        tree = parse_query("c:r cmc<=3 t:creature")
+
+        self.assertEqual(tree, And((
+            Term("c", ":", "r"),
+            Term("cmc", "<=", "3"),
+            Term("t", ":", "creature")
+        )))
+
+    def test_or_negation_and_parentheses(self):
+        tree = parse_query('-r:common (t:dragon or o:"draw a card")')
+
+        self.assertEqual(tree, And((
+            Not(Term("r", ":", "common")),
+            Or((Term("t", ":", "dragon"), Term("o", ":", "draw a card")))
+        )))
+
+    def test_bare_word_is_a_name_term(self):
+        self.assertEqual(parse_query("bolt"), Term(None, ":", "bolt"))
+
+    def test_empty_query(self):
+        self.assertIsNone(parse_query("   "))
+
+    def test_key_without_value_raises_error(self):
+        for query in ("t:", "c:r T:", "cmc>= 3", "(set:)"):
+            with self.assertRaises(InvalidQueryError, msg=query):
+                parse_query(query)
+
+    def test_unknown_key_without_value_is_a_name_term(self):
+        self.assertEqual(parse_query("foo:"), Term(None, ":", "foo:"))
+
+    def test_invalid_queries_raise_error(self):
+        for query in ("(c:r", "c:r)", "or", "c:r or"):
+            with self.assertRaises(InvalidQueryError, msg=query):
+                parse_query(query)
+
+
+class TestCardQueryCompiler(unittest.TestCase):
+    def setUp(self):
+        self.compiler = CardQueryCompiler(cache_size=2)
+
+    def test_values_are_parameters(self):
+        query = self.compiler.compile("set:mh3 cmc>=2")
+
+        self.assertNotIn("mh3", query.where)
+        self.assertEqual(query.parameters, ("mh3", 2.0))
+
+    def test_empty_query_matches_all(self):
+        self.assertEqual(self.compiler.compile("").where, "1")
+
+    def test_invalid_terms_raise_error(self):
+        for query in ("foo:bar", "cmc:x", "r:legendary", "c:purple", "set>mh3", "t<dragon"):
+            with self.assertRaises(InvalidQueryError, msg=query):
+                self.compiler.compile(query)
+
+    def test_compiled_queries_are_cached(self):
+        first = self.compiler.compile("c:r  cmc<=3")
+        second = self.compiler.compile("c:r cmc<=3")
+
+        self.assertIs(first, second)
+        self.assertEqual(self.compiler.stats()["hits"], 1)
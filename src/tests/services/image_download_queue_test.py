@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import Mock
+import threading
+import requests.exceptions
+from repositories.card_repository import CardImageNotFoundError, CardImageWriteError
+from services.image_download_queue import ImageDownloadQueue
+
+
+class TestImageDownloadQueue(unittest.TestCase):
+    def setUp(self):
+        self.card_repository_mock = Mock()
+        self.image_queue = ImageDownloadQueue(self.card_repository_mock, max_workers=2)
+        self.addCleanup(self.image_queue.shutdown)
+        self.downloads = []
+        self.image_queue.add_listener(
+            lambda *download: self.downloads.append(download)
+        )
+
+    def test_images_are_downloaded_and_listeners_called(self):
+        self.image_queue.queue("http://example.com/a.jpg", "Card A", "TST")
+        self.image_queue.queue("http://example.com/b.jpg", "Card B", "TST")
+
+        self.assertTrue(self.image_queue.wait(5))
+
+        self.assertEqual(self.card_repository_mock.save_card_image.call_count, 2)
+        self.assertEqual(
+            sorted(self.downloads),
+            [("Card A", "TST", None), ("Card B", "TST", None)]
+        )
+        self.assertEqual(self.image_queue.pending(), 0)
+
+    def test_same_image_is_queued_once(self):
+        release = threading.Event()
+        self.card_repository_mock.save_card_image.side_effect = (
+            lambda *args: release.wait(5)
+        )
+
+        first = self.image_queue.queue("http://example.com/a.jpg", "Card A", "TST")
+        second = self.image_queue.queue("http://example.com/a.jpg", "Card A", "TST")
+        release.set()
+        self.image_queue.wait(5)
+
+        self.assertIs(first, second)
+        self.card_repository_mock.save_card_image.assert_called_once()
+
+    def test_failed_download_is_reported(self):
+        error = CardImageWriteError()
+        self.card_repository_mock.save_card_image.side_effect = error
+
+        self.image_queue.queue("http://example.com/a.jpg", "Card A", "TST")
+        self.image_queue.wait(5)
+
+        self.assertEqual(self.downloads, [("Card A", "TST", error)])
+        self.assertEqual(self.image_queue.failed, 1)
+
+    def test_failed_download_is_retried(self):
+        image_queue = ImageDownloadQueue(self.card_repository_mock, retry_delay=0)
+        self.addCleanup(image_queue.shutdown)
+        self.card_repository_mock.save_card_image.side_effect = [
+            CardImageNotFoundError(), CardImageNotFoundError(), None
+        ]
+
+        image_queue.queue("http://example.com/a.jpg", "Card A", "TST")
+        image_queue.wait(5)
+
+        self.assertEqual(self.card_repository_mock.save_card_image.call_count, 3)
+        self.assertEqual(image_queue.failed, 0)
+
+    def test_retries_are_bounded(self):
+        image_queue = ImageDownloadQueue(
+            self.card_repository_mock, max_retries=2, retry_delay=0
+        )
+        self.addCleanup(image_queue.shutdown)
+        self.card_repository_mock.save_card_image.side_effect = CardImageNotFoundError()
+
+        image_queue.queue("http://example.com/a.jpg", "Card A", "TST")
+        image_queue.wait(5)
+
+        self.assertEqual(self.card_repository_mock.save_card_image.call_count, 3)
+        self.assertEqual(image_queue.failed, 1)
+
+    def test_missing_image_isnt_retried(self):
+        image_queue = ImageDownloadQueue(self.card_repository_mock, retry_delay=0)
+        self.addCleanup(image_queue.shutdown)
+        not_found = requests.exceptions.HTTPError(response=Mock(status_code=404))
+        error = CardImageNotFoundError()
+        error.__cause__ = not_found
+        self.card_repository_mock.save_card_image.side_effect = error
+
+        image_queue.queue("http://example.com/a.jpg", "Card A", "TST")
+        image_queue.wait(5)
+
+        self.card_repository_mock.save_card_image.assert_called_once()
@@ -1,9 +1,14 @@
 import unittest
-from unittest.mock import Mock, patch
+import time
+from unittest.mock import Mock, MagicMock, patch
 from utils.database.initialize_database import initialize_database
 from utils import test_utils
 from repositories.user_repository import user_repository
-from repositories.card_repository import card_repository
+from repositories.card_repository import (
+    card_repository,
+    IncorrectNameOrSetError,
+    CardImageNotFoundError
+)
 from entities.user import User
 
 from services.magic_service import (
@@ -14,8 +19,10 @@ from services.magic_service import (
     UsernameTooShortError,
     PasswordTooShortError,
     CardExistsError,
-    CardNotFoundError
+    CardNotFoundError,
+    CollectionChange
 )
+from services.image_download_queue import ImageDownloadQueue
 
 
 class TestMagicService(unittest.TestCase):
@@ -29,10 +36,18 @@ class TestMagicService(unittest.TestCase):
 
         self.mock_response = Mock()
         self.user_repository_mock = Mock()
-        self.card_repository_mock = Mock()
+        self.card_repository_mock = MagicMock()
+        self.card_repository_mock.get_card_names.return_value = []
+        self.set_repository_mock = Mock()
+        self.search_repository_mock = Mock()
         self.magic_service = MagicService(
             user_repository=self.user_repository_mock,
-            card_repository=self.card_repository_mock
+            card_repository=self.card_repository_mock,
+            image_download_queue=ImageDownloadQueue(
+                self.card_repository_mock, retry_delay=0
+            ),
+            set_repository=self.set_repository_mock,
+            search_repository=self.search_repository_mock
         )
 
     def login_user(self):
@@ -104,16 +119,6 @@ class TestMagicService(unittest.TestCase):
             lambda: self.magic_service.login('alfa', 'invalid_password')
         )
 
-    def test_get_image_filenames_success(self):
-        self.card_repository_mock.get_user_card_names_and_set_codes.return_value = [
-            ("Test Card", "FAKE")
-        ]
-        result = self.magic_service.get_user_card_image_filenames(
-            self.user_id
-        )
-
-        self.assertEqual(result, ["test_card_FAKE.png"])
-
     @patch("services.magic_service.Card.from_scryfall_json")
     @patch.object(MagicService, "_assign_card_to_user")
     def test_fetch_card_success(self, mock_assign_card, mock_from_scryfall_json):
@@ -126,10 +131,115 @@ class TestMagicService(unittest.TestCase):
         mock_from_scryfall_json.return_value = self.fake_card
         self.card_repository_mock.create.return_value = 1
 
-        self.magic_service.fetch_card("Fake Card", "FAKE_SET")
+        self.magic_service.fetch_card("Fake Card", "FAKE_SET", self.user_alfa.user_id)
 
         mock_assign_card.assert_called_once_with(self.user_alfa.user_id, 1)
 
+    def test_get_user_card_images_are_ordered_by_filename(self):
+        self.card_repository_mock.get_user_card_ids_names_and_set_codes.return_value = [
+            (2, "Zombie", "TST"),
+            (1, "Angel", "TST")
+        ]
+
+        result = self.magic_service.get_user_card_images(self.user_id)
+
+        self.assertEqual(result, [(1, "angel_TST.png"), (2, "zombie_TST.png")])
+
+    def test_search_cards_returns_page_of_results(self):
+        self.search_repository_mock.search_cards.return_value = [self.fake_card]
+
+        results = self.magic_service.search_cards(
+            "flying dragon", user_id=self.user_id, limit=10, offset=20
+        )
+
+        self.assertEqual(results, [self.fake_card])
+        self.search_repository_mock.search_cards.assert_called_once_with(
+            "flying dragon", user_id=self.user_id, limit=10, offset=20
+        )
+
+    def test_filter_cards_runs_compiled_query(self):
+        self.search_repository_mock.find_cards.return_value = [self.fake_card]
+
+        results = self.magic_service.filter_cards("c:r cmc<=3", user_id=self.user_id)
+
+        query = self.search_repository_mock.find_cards.call_args.args[0]
+        self.assertEqual(results, [self.fake_card])
+        self.assertEqual(query.parameters, ("R", 3.0))
+
+    def test_get_card_sets_maps_names_to_codes(self):
+        self.set_repository_mock.find_all.return_value = [
+            {"code": "m10", "name": "Magic 2010"}
+        ]
+
+        self.assertEqual(self.magic_service.get_card_sets(), {"Magic 2010": "m10"})
+
+    def test_card_sets_are_stale(self):
+        self.set_repository_mock.fetched_at.return_value = None
+        self.assertTrue(self.magic_service.card_sets_are_stale())
+
+        self.set_repository_mock.fetched_at.return_value = time.time() - 60
+        self.assertFalse(self.magic_service.card_sets_are_stale(max_age=3600))
+        self.assertTrue(self.magic_service.card_sets_are_stale(max_age=30))
+
+    def test_refresh_card_sets_returns_none_when_unchanged(self):
+        self.set_repository_mock.revalidate.return_value = False
+
+        self.assertIsNone(self.magic_service.refresh_card_sets())
+
+    def test_refresh_card_sets_returns_new_sets(self):
+        self.set_repository_mock.revalidate.return_value = True
+        self.set_repository_mock.find_all.return_value = [
+            {"code": "m10", "name": "Magic 2010"}
+        ]
+
+        self.assertEqual(self.magic_service.refresh_card_sets(), {"Magic 2010": "m10"})
+
+    def test_fetch_card_notifies_collection_listeners(self):
+        self.login_user()
+        changes = []
+        self.magic_service.add_collection_listener(changes.append)
+        self.card_repository_mock.fetch_card_by_name_and_set.return_value = {
+            "name": "Test_Dragon"
+        }
+        self.card_repository_mock.find_card_by_name_and_set.return_value = None
+        self.card_repository_mock.create.return_value = 7
+
+        with patch("services.magic_service.Card.from_scryfall_json",
+                   return_value=self.fake_card):
+            self.magic_service.fetch_card("test_dragon", "TST", self.user_alfa.user_id)
+
+        self.assertEqual(
+            changes,
+            [CollectionChange("added", 7, "test_dragon_TST.png", self.user_alfa.user_id)]
+        )
+
+    def test_fetch_card_adds_card_to_given_user_after_logout(self):
+        self.login_user()
+        self.magic_service.logout()
+        changes = []
+        self.magic_service.add_collection_listener(changes.append)
+        self.card_repository_mock.find_card_by_name_and_set.return_value = self.fake_card
+        self.card_repository_mock.add_card_to_user.return_value = True
+
+        self.magic_service.fetch_card("Test_Dragon", "TST", 42)
+
+        self.card_repository_mock.add_card_to_user.assert_called_once_with(
+            42, self.fake_card.card_id
+        )
+        self.assertEqual(changes[0].user_id, 42)
+
+    def test_card_in_collection_doesnt_notify_collection_listeners(self):
+        self.login_user()
+        changes = []
+        self.magic_service.add_collection_listener(changes.append)
+        self.card_repository_mock.find_card_by_name_and_set.return_value = self.fake_card
+        self.card_repository_mock.add_card_to_user.return_value = False
+
+        with self.assertRaises(CardExistsError):
+            self.magic_service.fetch_card("Test_Dragon", "TST", self.user_alfa.user_id)
+
+        self.assertEqual(changes, [])
+
     def test_fetch_card_fails_on_card_exists(self):
         self.login_user()
 
@@ -137,50 +247,251 @@ class TestMagicService(unittest.TestCase):
             "name": "Fake Card"
         }
         self.card_repository_mock.find_card_by_name_and_set.return_value = self.fake_card
-        self.card_repository_mock.user_has_card.return_value = True
+        self.card_repository_mock.add_card_to_user.return_value = False
 
         self.assertRaises(
             CardExistsError,
             lambda: self.magic_service.fetch_card(
-                "Fake Card", "FAKE_SET_CODE"
+                "Fake Card", "FAKE_SET_CODE", self.user_alfa.user_id
             )
         )
 
-    @patch.object(MagicService, "_get_card")
-    def test_delete_usercard_success(self, mock_get_card):
+    def test_fetch_card_saves_missing_image_of_catalog_card(self):
         self.login_user()
 
-        mock_get_card.return_value = (
-            {"name": "Fake Card"},
-            self.fake_card
+        self.card_repository_mock.fetch_card_by_name_and_set.return_value = {
+            "name": "Test_Dragon"
+        }
+        self.card_repository_mock.find_card_by_name_and_set.return_value = self.fake_card
+        self.card_repository_mock.card_image_exists.return_value = False
+
+        self.magic_service.fetch_card("test_dragon", "TST", self.user_alfa.user_id)
+        self.magic_service.wait_for_images()
+
+        self.card_repository_mock.create.assert_not_called()
+        self.card_repository_mock.save_card_image.assert_called_once_with(
+            "https://example.com/card_small.jpg",
+            "Test_Dragon",
+            "TST"
         )
+
+    def test_fetch_card_runs_in_one_transaction(self):
+        self.login_user()
+
+        self.card_repository_mock.fetch_card_by_name_and_set.return_value = {
+            "name": "Test_Dragon"
+        }
+        self.card_repository_mock.find_card_by_name_and_set.return_value = None
+
+        with patch("services.magic_service.Card.from_scryfall_json",
+                   return_value=self.fake_card):
+            self.magic_service.fetch_card("test_dragon", "TST", self.user_alfa.user_id)
+
+        transaction = self.card_repository_mock.transaction.return_value
+        transaction.__enter__.assert_called_once()
+        transaction.__exit__.assert_called_once()
+
+    def test_fetch_card_is_saved_when_image_download_fails(self):
+        self.login_user()
+        self.card_repository_mock.fetch_card_by_name_and_set.return_value = {
+            "name": "Test_Dragon"
+        }
+        self.card_repository_mock.find_card_by_name_and_set.return_value = None
+        self.card_repository_mock.card_image_exists.return_value = False
+        self.card_repository_mock.save_card_image.side_effect = CardImageNotFoundError()
+        image_errors = []
+        self.magic_service.add_image_listener(
+            lambda name, set_code, error: image_errors.append(error)
+        )
+
+        with patch("services.magic_service.Card.from_scryfall_json",
+                   return_value=self.fake_card):
+            self.magic_service.fetch_card("test_dragon", "TST", self.user_alfa.user_id)
+        self.magic_service.wait_for_images()
+
+        self.card_repository_mock.add_card_to_user.assert_called_once()
+        self.assertIsInstance(image_errors[0], CardImageNotFoundError)
+
+    def test_queue_missing_images_queues_only_missing_images(self):
+        self.card_repository_mock.get_user_card_image_uris.return_value = [
+            ("Test_Dragon", "TST", "https://example.com/card_small.jpg"),
+            ("Other_Dragon", "TST", "https://example.com/card_small.jpg"),
+            ("No_Image", "TST", None)
+        ]
+        self.card_repository_mock.card_image_exists.side_effect = (
+            lambda name, set_code: name == "Test_Dragon"
+        )
+
+        queued = self.magic_service.queue_missing_images(self.user_alfa.user_id)
+        self.magic_service.wait_for_images()
+
+        self.assertEqual(queued, 1)
+        self.card_repository_mock.save_card_image.assert_called_once_with(
+            "https://example.com/card_small.jpg", "Other_Dragon", "TST"
+        )
+
+    def test_fetch_card_resolves_name_locally_without_api(self):
+        self.login_user()
+        self.card_repository_mock.get_card_names.return_value = [
+            (1, "Test_Dragon")
+        ]
+        self.card_repository_mock.find_card_by_name_and_set.return_value = self.fake_card
+        self.card_repository_mock.card_image_exists.return_value = True
+
+        self.magic_service.fetch_card("TEST_DRAGON", "TST", self.user_alfa.user_id)
+
+        self.card_repository_mock.find_card_by_name_and_set.assert_called_once_with(
+            "Test_Dragon", "TST"
+        )
+        self.card_repository_mock.fetch_card_by_name_and_set.assert_not_called()
+        self.card_repository_mock.add_card_to_user.assert_called_once_with(
+            self.user_alfa.user_id, self.fake_card.card_id
+        )
+
+    def test_fetch_card_doesnt_correct_valid_name(self):
+        self.login_user()
+        self.card_repository_mock.get_card_names.return_value = [(1, "Gush")]
+        self.card_repository_mock.find_card_by_name_and_set.return_value = None
+        self.card_repository_mock.fetch_card_by_name_and_set.return_value = {
+            "name": "Hush"
+        }
+
+        with patch("services.magic_service.Card.from_scryfall_json",
+                   return_value=self.fake_card):
+            self.magic_service.fetch_card("Hush", "TST", self.user_alfa.user_id)
+
+        self.card_repository_mock.fetch_card_by_name_and_set.assert_called_once_with(
+            "Hush", "TST"
+        )
+
+    def test_fetch_card_corrects_typo_of_unknown_name(self):
+        self.login_user()
+        self.card_repository_mock.get_card_names.return_value = [(1, "Lightning Bolt")]
+        self.card_repository_mock.find_card_by_name_and_set.side_effect = (
+            lambda name, set_code: self.fake_card if name == "Lightning Bolt" else None
+        )
+        self.card_repository_mock.fetch_card_by_name_and_set.side_effect = [
+            IncorrectNameOrSetError("Incorrect card name or set."),
+            {"name": "Lightning Bolt"}
+        ]
+
+        self.magic_service.fetch_card("lightning bolr", "TST", self.user_alfa.user_id)
+
+        self.assertEqual(
+            [c.args[0] for c in self.card_repository_mock.fetch_card_by_name_and_set.call_args_list],
+            ["lightning bolr", "Lightning Bolt"]
+        )
+        self.card_repository_mock.add_card_to_user.assert_called_once_with(
+            self.user_alfa.user_id, self.fake_card.card_id
+        )
+
+    def test_name_index_is_refreshed_incrementally(self):
+        self.login_user()
+        self.card_repository_mock.get_card_names.side_effect = [
+            [(1, "Test_Dragon"), (2, "Lightning Bolt")],
+            [(3, "Firebolt")]
+        ]
+        self.card_repository_mock.find_card_by_name_and_set.return_value = self.fake_card
+        self.card_repository_mock.add_card_to_user.return_value = False
+
+        for card_name in ("lightning bolt", "firebolt"):
+            with self.assertRaises(CardExistsError):
+                self.magic_service.fetch_card(card_name, "TST", self.user_alfa.user_id)
+
+        self.assertEqual(
+            [c.args[0] for c in self.card_repository_mock.get_card_names.call_args_list],
+            [0, 2]
+        )
+        self.card_repository_mock.find_card_by_name_and_set.assert_called_with(
+            "Firebolt", "TST"
+        )
+
+    @patch("services.magic_service.Card.from_scryfall_json")
+    def test_fetch_cards_adds_found_cards_and_returns_errors(self, mock_from_scryfall_json):
+        self.login_user()
+        not_found_error = IncorrectNameOrSetError("Incorrect card name or set.")
+        self.card_repository_mock.fetch_cards_by_names_and_sets.return_value = [
+            {"name": "Fake Card", "set": "fake"},
+            not_found_error
+        ]
+        mock_from_scryfall_json.return_value = self.fake_card
+        self.card_repository_mock.create.return_value = 1
+
+        errors = self.magic_service.fetch_cards([
+            ("fake card", "fake"),
+            ("Invalid Card", "fake")
+        ], self.user_alfa.user_id)
+
+        self.assertEqual(errors, {("Invalid Card", "fake"): not_found_error})
+        self.card_repository_mock.find_card_by_name_and_set.assert_not_called()
+        self.card_repository_mock.add_card_to_user.assert_called_once_with(
+            self.user_alfa.user_id, 1
+        )
+
+    def test_fetch_cards_returns_error_for_card_in_collection(self):
+        self.login_user()
+        self.card_repository_mock.fetch_cards_by_names_and_sets.return_value = [
+            self.fake_card
+        ]
+        self.card_repository_mock.add_card_to_user.return_value = False
+
+        errors = self.magic_service.fetch_cards([("Fake Card", "fake")], self.user_alfa.user_id)
+
+        self.assertIsInstance(errors[("Fake Card", "fake")], CardExistsError)
+        self.card_repository_mock.find_card_by_name_and_set.assert_not_called()
+        self.card_repository_mock.user_has_card.assert_not_called()
+        self.card_repository_mock.save_card_image.assert_not_called()
+
+    def test_delete_usercard_success(self):
+        self.login_user()
+
+        self.card_repository_mock.find_card_by_name_and_set.return_value = self.fake_card
         self.card_repository_mock.user_has_card.return_value = True
 
-        self.magic_service.delete_usercard("Fake Card", "FAKE_SET_CODE")
+        changes = []
+        self.magic_service.add_collection_listener(changes.append)
+
+        self.magic_service.delete_usercard("Fake Card", "FAKE_SET_CODE", self.user_alfa.user_id)
 
         self.card_repository_mock.delete_card_from_user.assert_called_once_with(
             self.fake_card.card_id,
             self.user_alfa.user_id
         )
+        self.assertEqual(
+            changes,
+            [CollectionChange(
+                "removed", self.fake_card.card_id, "test_dragon_TST.png", self.user_alfa.user_id
+            )]
+        )
 
-    @patch.object(MagicService, "_get_card")
-    def test_delete_usercard_fails_on_card_not_in_collection(self, mock_get_card):
+    def test_delete_usercard_fails_on_card_not_in_collection(self):
         self.login_user()
 
-        mock_get_card.return_value = (
-            {"name": "Fake Card"},
-            None
-        )
+        self.card_repository_mock.find_card_by_name_and_set.return_value = None
         self.card_repository_mock.user_has_card.return_value = False
 
         self.assertRaises(
             CardNotFoundError,
             lambda: self.magic_service.delete_usercard(
                 "Fake Card",
-                "FAKE_SET_CODE"
+                "FAKE_SET_CODE",
+                self.user_alfa.user_id
             )
         )
 
+    def test_delete_usercard_doesnt_correct_typos(self):
+        self.login_user()
+        self.card_repository_mock.get_card_names.return_value = [(1, "Gush")]
+        self.card_repository_mock.find_card_by_name_and_set.return_value = None
+
+        with self.assertRaises(CardNotFoundError):
+            self.magic_service.delete_usercard("Hush", "TST", self.user_alfa.user_id)
+
+        self.card_repository_mock.find_card_by_name_and_set.assert_called_once_with(
+            "Hush", "TST"
+        )
+        self.card_repository_mock.delete_card_from_user.assert_not_called()
+
     def test_logout_user_successfully(self):
         self.user_repository_mock.find_by_username.return_value = self.user_alfa
 
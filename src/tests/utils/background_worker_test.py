@@ -0,0 +1,93 @@
+import unittest
+import threading
+from utils.background_worker import BackgroundWorker
+
+
+class TestBackgroundWorker(unittest.TestCase):
+    def setUp(self):
+        self.worker = BackgroundWorker(max_workers=1)
+        self.addCleanup(self.worker.shutdown)
+        self.results = []
+
+    def wait_and_poll(self, *jobs):
+        for job in jobs:
+            job.future.exception(timeout=5)
+        self.worker.poll()
+
+    def test_callbacks_are_called_in_polling_thread(self):
+        job = self.worker.submit(
+            lambda job: threading.get_ident(),
+            on_done=lambda worker_thread: self.results.append(
+                (worker_thread, threading.get_ident())
+            )
+        )
+
+        self.assertEqual(self.results, [])
+        self.wait_and_poll(job)
+
+        worker_thread, polling_thread = self.results[0]
+        self.assertNotEqual(worker_thread, polling_thread)
+        self.assertEqual(polling_thread, threading.get_ident())
+        self.assertEqual(self.worker.pending(), 0)
+
+    def test_error_is_passed_to_on_error(self):
+        error = ValueError("Failed")
+
+        def fail(job):
+            raise error
+
+        job = self.worker.submit(fail, on_error=self.results.append)
+        self.wait_and_poll(job)
+
+        self.assertEqual(self.results, [error])
+
+    def test_progress_is_reported_before_done(self):
+        def task(job):
+            for step in range(3):
+                job.report_progress(step)
+            return "done"
+
+        job = self.worker.submit(
+            task,
+            on_done=self.results.append,
+            on_progress=self.results.append
+        )
+        self.wait_and_poll(job)
+
+        self.assertEqual(self.results, [0, 1, 2, "done"])
+
+    def test_jobs_are_queued_and_cancel_drops_queued_jobs(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking(job):
+            started.set()
+            release.wait(5)
+            return "first"
+
+        first = self.worker.submit(blocking, on_done=self.results.append)
+        self.worker.submit(lambda job: "second", on_done=self.results.append)
+        self.worker.submit(lambda job: "third", on_done=self.results.append)
+        started.wait(5)
+
+        self.assertEqual(self.worker.pending(), 3)
+        dropped = self.worker.cancel_all()
+        release.set()
+        self.wait_and_poll(first)
+
+        self.assertEqual(dropped, 2)
+        self.assertTrue(first.cancelled)
+        self.assertEqual(self.results, ["first"])
+        self.assertEqual(self.worker.pending(), 0)
+
+    def test_call_soon_calls_callback_in_polling_thread(self):
+        thread = threading.Thread(
+            target=lambda: self.worker.call_soon(self.results.append, "called")
+        )
+        thread.start()
+        thread.join()
+
+        self.assertEqual(self.results, [])
+        self.worker.poll()
+
+        self.assertEqual(self.results, ["called"])
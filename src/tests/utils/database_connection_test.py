@@ -0,0 +1,126 @@
+import unittest
+import os
+import threading
+import time
+import tempfile
+from utils.database.database_connection import (
+    create_connection,
+    UnknownPragmaProfileError
+)
+
+
+class TestDatabaseConnection(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "test.db")
+
+    def test_create_connection_with_wal_profile(self):
+        connection = create_connection(self.path, "wal")
+        self.addCleanup(connection.close)
+
+        self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(connection.execute("PRAGMA synchronous").fetchone()[0], 1)
+        self.assertEqual(connection.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+        self.assertEqual(connection.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+
+    def test_create_connection_with_default_profile(self):
+        connection = create_connection(self.path, "default")
+        self.addCleanup(connection.close)
+
+        self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+        self.assertEqual(connection.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+
+    def test_create_connection_with_unknown_profile(self):
+        with self.assertRaises(UnknownPragmaProfileError):
+            create_connection(self.path, "unknown")
+
+    def create_table(self):
+        connection = create_connection(self.path, "wal")
+        self.addCleanup(connection.close)
+        connection.execute("CREATE TABLE Items (name TEXT)")
+        connection.commit()
+
+        return connection
+
+    def count_items(self):
+        reader = create_connection(self.path, "wal")
+        self.addCleanup(reader.close)
+
+        return reader.execute("SELECT COUNT(*) FROM Items").fetchone()[0]
+
+    def test_transaction_commits_once_at_the_end(self):
+        connection = self.create_table()
+
+        with connection.transaction():
+            for name in ("a", "b"):
+                connection.execute("INSERT INTO Items VALUES (?)", (name,))
+                connection.commit()
+            self.assertEqual(self.count_items(), 0)
+
+        self.assertEqual(self.count_items(), 2)
+
+    def test_transaction_rolls_back_on_error(self):
+        connection = self.create_table()
+
+        with self.assertRaises(ValueError):
+            with connection.transaction():
+                connection.execute("INSERT INTO Items VALUES ('a')")
+                connection.commit()
+                raise ValueError()
+
+        self.assertEqual(self.count_items(), 0)
+        self.assertFalse(connection.in_transaction)
+
+    def test_failed_nested_transaction_rolls_back_only_its_own_changes(self):
+        connection = self.create_table()
+
+        with connection.transaction():
+            connection.execute("INSERT INTO Items VALUES ('a')")
+            try:
+                with connection.transaction():
+                    connection.execute("INSERT INTO Items VALUES ('b')")
+                    raise ValueError()
+            except ValueError:
+                pass
+
+        self.assertEqual(self.count_items(), 1)
+
+    def test_commit_without_transaction_works_as_before(self):
+        connection = self.create_table()
+
+        connection.execute("INSERT INTO Items VALUES ('a')")
+        connection.commit()
+
+        self.assertEqual(self.count_items(), 1)
+
+    def test_write_of_another_thread_isnt_rolled_back_with_transaction(self):
+        connection = self.create_table()
+        in_transaction = threading.Event()
+
+        def failing_job():
+            try:
+                with connection.transaction():
+                    connection.execute("INSERT INTO Items VALUES ('job')")
+                    in_transaction.set()
+                    # The other thread writes meanwhile
+                    time.sleep(0.1)
+                    raise ValueError()
+            except ValueError:
+                pass
+
+        def write():
+            in_transaction.wait(5)
+            connection.execute("INSERT INTO Items VALUES ('other')")
+            connection.commit()
+
+        threads = [threading.Thread(target=failing_job), threading.Thread(target=write)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(
+            [row[0] for row in connection.execute("SELECT name FROM Items")],
+            ["other"]
+        )
@@ -0,0 +1,47 @@
+import unittest
+from utils.grid_layout import GridLayout
+
+
+class TestGridLayout(unittest.TestCase):
+    def setUp(self):
+        self.layout = GridLayout(104, 144, overscan_rows=1)
+
+    def test_columns_fit_into_width(self):
+        self.assertEqual(self.layout.columns(520), 5)
+        self.assertEqual(self.layout.columns(519), 4)
+        self.assertEqual(self.layout.columns(10), 1)
+
+    def test_total_height_rounds_rows_up(self):
+        self.assertEqual(self.layout.total_height(0, 5), 0)
+        self.assertEqual(self.layout.total_height(10, 5), 2 * 144)
+        self.assertEqual(self.layout.total_height(11, 5), 3 * 144)
+
+    def test_position_fills_rows_left_to_right(self):
+        self.assertEqual(self.layout.position(0, 5), (0, 0))
+        self.assertEqual(self.layout.position(4, 5), (4 * 104, 0))
+        self.assertEqual(self.layout.position(5, 5), (0, 144))
+
+    def test_visible_range_at_top_includes_overscan_below(self):
+        visible = self.layout.visible_range(0, 300, 20_000, 5)
+
+        # Rows 0-2 are visible and row 3 is overscan
+        self.assertEqual(visible, range(0, 20))
+
+    def test_visible_range_in_the_middle(self):
+        visible = self.layout.visible_range(144 * 100, 300, 20_000, 5)
+
+        self.assertEqual(visible, range(99 * 5, 104 * 5))
+
+    def test_visible_range_is_limited_to_count(self):
+        visible = self.layout.visible_range(144 * 3, 300, 17, 5)
+
+        self.assertEqual(visible, range(10, 17))
+
+    def test_moved_cells_is_empty_when_columns_dont_change(self):
+        self.assertEqual(self.layout.moved_cells(range(100), 5, 5), [])
+
+    def test_moved_cells_keeps_cells_in_the_same_position(self):
+        moved = self.layout.moved_cells(range(12), 5, 6)
+
+        # Cells 0-4 stay in the first row
+        self.assertEqual(moved, list(range(5, 12)))
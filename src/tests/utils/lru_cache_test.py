@@ -0,0 +1,50 @@
+import unittest
+from utils.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(100)
+
+    def test_get_returns_value_and_counts_hits_and_misses(self):
+        self.cache.put("a", "value a", 10)
+
+        self.assertEqual(self.cache.get("a"), "value a")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["hit_rate"], 0.5)
+
+    def test_least_recently_used_entries_are_evicted_over_budget(self):
+        self.cache.put("a", 1, 40)
+        self.cache.put("b", 2, 40)
+        self.cache.get("a")
+
+        self.cache.put("c", 3, 40)
+
+        self.assertIn("a", self.cache)
+        self.assertNotIn("b", self.cache)
+        self.assertIn("c", self.cache)
+        self.assertEqual(self.cache.size, 80)
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_replacing_entry_updates_size(self):
+        self.cache.put("a", 1, 40)
+        self.cache.put("a", 2, 10)
+
+        self.assertEqual(self.cache.get("a"), 2)
+        self.assertEqual(self.cache.size, 10)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_entry_larger_than_budget_isnt_cached(self):
+        self.cache.put("a", 1, 40)
+        self.cache.put("huge", 2, 101)
+
+        self.assertNotIn("huge", self.cache)
+        self.assertIn("a", self.cache)
+
+    def test_pop_removes_entry(self):
+        self.cache.put("a", 1, 40)
+        self.cache.pop("a")
+        self.cache.pop("missing")
+
+        self.assertNotIn("a", self.cache)
+        self.assertEqual(self.cache.size, 0)
@@ -0,0 +1,122 @@
+import unittest
+import sqlite3
+from utils.database.migrations import (
+    Migration,
+    MIGRATIONS,
+    migrate,
+    get_schema_version
+)
+
+
+def create_baseline_database():
+    """Creates a database with the schema used before migrations."""
+
+    connection = sqlite3.connect(":memory:")
+    connection.executescript("""
+        CREATE TABLE Users (id INTEGER PRIMARY KEY, username TEXT, password TEXT);
+        CREATE TABLE Cards (
+            id INTEGER PRIMARY KEY, name TEXT, released_at TEXT, layout TEXT,
+            mana_cost TEXT, cmc REAL, colors JSON, color_identity JSON,
+            type_line TEXT, oracle_text TEXT, keywords JSON, card_faces JSON,
+            all_parts JSON, power TEXT, toughness TEXT, image_uris JSON,
+            set_code TEXT, set_name TEXT, rarity TEXT, flavor_text TEXT,
+            prices JSON
+        );
+        CREATE TABLE UserCards (
+            user_id INTEGER NOT NULL,
+            card_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, card_id),
+            FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE,
+            FOREIGN KEY (card_id) REFERENCES Cards(id) ON DELETE CASCADE
+        );
+        INSERT INTO Users (username, password) VALUES ('alfa', '1234alfa5678');
+        INSERT INTO Cards (name, set_code) VALUES ('Firebolt', 'ema');
+        INSERT INTO Cards (name, set_code) VALUES ('Firebolt', 'ema');
+        INSERT INTO Cards (name, set_code) VALUES ('Lightning Bolt', 'm10');
+        INSERT INTO UserCards (user_id, card_id) VALUES (1, 2);
+        INSERT INTO UserCards (user_id, card_id) VALUES (1, 3);
+    """)
+
+    return connection
+
+
+class TestMigrations(unittest.TestCase):
+    def test_migrate_empty_database(self):
+        connection = sqlite3.connect(":memory:")
+
+        applied = migrate(connection)
+
+        self.assertEqual(applied, [m.version for m in MIGRATIONS])
+        self.assertEqual(get_schema_version(connection), MIGRATIONS[-1].version)
+
+    def test_migrate_up_to_date_database_does_nothing(self):
+        connection = sqlite3.connect(":memory:")
+        migrate(connection)
+
+        self.assertEqual(migrate(connection), [])
+
+    def test_migrate_baseline_database_keeps_collections(self):
+        connection = create_baseline_database()
+
+        migrate(connection)
+
+        cards = connection.execute(
+            "SELECT id, name FROM Cards ORDER BY id"
+        ).fetchall()
+        user_cards = connection.execute(
+            "SELECT card_id FROM UserCards ORDER BY card_id"
+        ).fetchall()
+        self.assertEqual(cards, [(1, "Firebolt"), (3, "Lightning Bolt")])
+        self.assertEqual(user_cards, [(1,), (3,)])
+
+    def test_migrate_baseline_database_fills_card_value_tables(self):
+        connection = create_baseline_database()
+        connection.execute(
+            """UPDATE Cards SET colors = '["R"]', color_identity = '["R"]',
+            keywords = '["Haste"]' WHERE name = 'Lightning Bolt'"""
+        )
+
+        migrate(connection)
+
+        self.assertEqual(
+            connection.execute("SELECT card_id, color FROM CardColors").fetchall(),
+            [(3, "R")]
+        )
+        self.assertEqual(
+            connection.execute("SELECT card_id, keyword FROM CardKeywords").fetchall(),
+            [(3, "Haste")]
+        )
+
+    def test_migrate_baseline_database_fills_colors_of_card_faces(self):
+        connection = create_baseline_database()
+        connection.execute(
+            """UPDATE Cards SET colors = 'null',
+            card_faces = '[{"colors": ["U"]}, {"colors": ["U", "B"]}]'
+            WHERE name = 'Lightning Bolt'"""
+        )
+
+        migrate(connection)
+
+        self.assertEqual(
+            connection.execute(
+                "SELECT card_id, color FROM CardColors ORDER BY color"
+            ).fetchall(),
+            [(3, "B"), (3, "U")]
+        )
+
+    def test_failed_migration_is_rolled_back(self):
+        connection = sqlite3.connect(":memory:")
+        migrate(connection)
+
+        def failing_migration(cursor):
+            cursor.execute("CREATE TABLE Broken (id INTEGER PRIMARY KEY)")
+            raise sqlite3.OperationalError("Migration failed")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            migrate(connection, (*MIGRATIONS, Migration(99, "Broken", failing_migration)))
+
+        tables = connection.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'Broken'"
+        ).fetchall()
+        self.assertEqual(tables, [])
+        self.assertEqual(get_schema_version(connection), MIGRATIONS[-1].version)
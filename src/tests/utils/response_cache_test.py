@@ -0,0 +1,125 @@
+from sqlite3 import DatabaseError
+from unittest.mock import Mock
+import unittest
+from utils.database.initialize_database import initialize_database
+from utils.database.database_connection import get_database_connection
+from utils.http.response_cache import ResponseCache
+
+
+CARDS_URL = "https://api.scryfall.com/cards/named"
+PARAMS = {"set": "m10", "exact": "Lightning Bolt"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        initialize_database()
+        self.clock = FakeClock()
+        self.cache = self.create_cache()
+
+    def create_cache(self, max_bytes=10_000):
+        return ResponseCache(
+            get_database_connection(),
+            ttls={"/cards/named": 60},
+            max_bytes=max_bytes,
+            memory_max_bytes=1000,
+            clock=self.clock
+        )
+
+    def test_key_doesnt_depend_on_parameter_order(self):
+        self.assertEqual(
+            ResponseCache.key(CARDS_URL, {"exact": "a", "set": "b"}),
+            ResponseCache.key(CARDS_URL, {"set": "b", "exact": "a"})
+        )
+
+    def test_stored_response_is_found_in_memory(self):
+        self.cache.put(CARDS_URL, PARAMS, {"name": "Lightning Bolt"})
+
+        self.assertEqual(self.cache.get(CARDS_URL, PARAMS), {"name": "Lightning Bolt"})
+        self.assertEqual(self.cache.stats()["memory_hits"], 1)
+
+    def test_stored_response_is_found_in_database_after_restart(self):
+        self.cache.put(CARDS_URL, PARAMS, {"name": "Lightning Bolt"})
+        restarted = self.create_cache()
+
+        self.assertEqual(restarted.get(CARDS_URL, PARAMS), {"name": "Lightning Bolt"})
+        self.assertEqual(restarted.get(CARDS_URL, PARAMS), {"name": "Lightning Bolt"})
+        self.assertEqual(restarted.stats()["disk_hits"], 1)
+        self.assertEqual(restarted.stats()["memory_hits"], 1)
+
+    def test_response_expires_after_ttl(self):
+        self.cache.put(CARDS_URL, PARAMS, {"name": "Lightning Bolt"})
+        self.clock.now += 61
+
+        self.assertIsNone(self.cache.get(CARDS_URL, PARAMS))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_endpoint_without_ttl_isnt_cached(self):
+        url = "https://api.scryfall.com/cards/collection"
+        self.cache.put(url, None, {"data": []})
+
+        self.assertIsNone(self.cache.get(url))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_least_recently_used_responses_are_evicted_over_size_limit(self):
+        cache = self.create_cache(max_bytes=100)
+        for number in range(5):
+            self.clock.now += 1
+            cache.put(CARDS_URL, {"exact": f"Card {number}"}, {"name": "x" * 20})
+
+        stats = cache.stats()
+
+        self.assertLessEqual(stats["size"], 100)
+        self.assertEqual(stats["evictions"], 5 - stats["entries"])
+        restarted = self.create_cache()
+        self.assertIsNone(restarted.get(CARDS_URL, {"exact": "Card 0"}))
+        self.assertIsNotNone(restarted.get(CARDS_URL, {"exact": "Card 4"}))
+
+    def test_reading_response_doesnt_write_into_database(self):
+        self.cache.put(CARDS_URL, PARAMS, {"name": "Lightning Bolt"})
+        connection = get_database_connection()
+        changes = connection.total_changes
+
+        self.clock.now += 1
+        self.create_cache().get(CARDS_URL, PARAMS)
+
+        self.assertEqual(connection.total_changes, changes)
+
+    def test_read_responses_are_kept_over_older_responses(self):
+        cache = self.create_cache(max_bytes=120)
+        cache.put(CARDS_URL, {"exact": "Card 0"}, {"name": "x" * 20})
+        self.clock.now += 1
+        cache.put(CARDS_URL, {"exact": "Card 1"}, {"name": "x" * 20})
+        self.clock.now += 1
+        cache.get(CARDS_URL, {"exact": "Card 0"})
+
+        for number in range(2, 4):
+            self.clock.now += 1
+            cache.put(CARDS_URL, {"exact": f"Card {number}"}, {"name": "x" * 20})
+
+        restarted = self.create_cache()
+        self.assertIsNotNone(restarted.get(CARDS_URL, {"exact": "Card 0"}))
+        self.assertIsNone(restarted.get(CARDS_URL, {"exact": "Card 1"}))
+
+    def test_expired_responses_are_removed_when_storing(self):
+        self.cache.put(CARDS_URL, {"exact": "Card 0"}, {"name": "x"})
+        self.clock.now += 61
+        self.cache.put(CARDS_URL, {"exact": "Card 1"}, {"name": "x"})
+
+        stats = self.cache.stats()
+
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_stats_handle_database_error_as_empty_cache(self):
+        cache = ResponseCache(Mock(cursor=Mock(side_effect=DatabaseError)))
+
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["size"], 0)
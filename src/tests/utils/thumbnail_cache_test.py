@@ -0,0 +1,73 @@
+import unittest
+import os
+import tempfile
+from PIL import Image
+from utils.thumbnail_cache import ThumbnailCache
+
+
+class TestThumbnailCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.images_dir = os.path.join(directory.name, "images")
+        self.cache_dir = os.path.join(directory.name, "thumbnails")
+        os.makedirs(self.images_dir)
+        self.cache = ThumbnailCache(self.cache_dir, max_bytes=10**6)
+
+    def create_image(self, name, color="red", size=(146, 204)):
+        path = os.path.join(self.images_dir, name)
+        Image.new("RGB", size, color).save(path, "PNG")
+
+        return path
+
+    def test_thumbnail_is_created_once(self):
+        path = self.create_image("card.png")
+
+        first = self.cache.get(path, (100, 140))
+        second = self.cache.get(path, (100, 140))
+
+        self.assertEqual(first.size, (100, 140))
+        self.assertEqual(second.size, (100, 140))
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_changed_image_gets_new_thumbnail(self):
+        path = self.create_image("card.png", "red")
+        self.cache.get(path, (100, 140))
+        self.create_image("card.png", "blue", (150, 204))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        thumbnail = self.cache.get(path, (100, 140))
+
+        self.assertEqual(thumbnail.getpixel((0, 0)), (0, 0, 255))
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_different_size_is_cached_separately(self):
+        path = self.create_image("card.png")
+
+        self.cache.get(path, (100, 140))
+        thumbnail = self.cache.get(path, (50, 70))
+
+        self.assertEqual(thumbnail.size, (50, 70))
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_least_recently_used_thumbnails_are_evicted(self):
+        paths = [self.create_image(f"card_{i}.png") for i in range(4)]
+        for i, path in enumerate(paths):
+            self.cache.get(path, (100, 140))
+            thumbnail_path = self.cache._thumbnail_path(path, (100, 140))
+            os.utime(thumbnail_path, (i, i))
+        thumbnail_bytes = self.cache.size() // 4
+
+        self.cache.max_bytes = thumbnail_bytes * 4
+        self.cache.get(paths[0], (100, 140))
+        self.cache.get(self.create_image("card_4.png"), (100, 140))
+
+        self.assertLessEqual(self.cache.size(), self.cache.max_bytes)
+        self.assertTrue(os.path.exists(self.cache._thumbnail_path(paths[0], (100, 140))))
+        self.assertFalse(os.path.exists(self.cache._thumbnail_path(paths[1], (100, 140))))
+
+    def test_missing_source_image_raises_error(self):
+        with self.assertRaises(OSError):
+            self.cache.get(os.path.join(self.images_dir, "missing.png"), (100, 140))
@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import Mock
+import threading
+import time
+from utils.thumbnail_loader import ThumbnailLoader
+
+
+class TestThumbnailLoader(unittest.TestCase):
+    def setUp(self):
+        self.thumbnail_cache_mock = Mock()
+        self.thumbnail_cache_mock.get.side_effect = lambda path, size: f"thumbnail of {path}"
+        self.loader = ThumbnailLoader(
+            (100, 140),
+            max_workers=1,
+            thumbnail_cache=self.thumbnail_cache_mock
+        )
+        self.addCleanup(self.loader.shutdown)
+
+    def take_all(self, count):
+        finished = []
+        deadline = time.monotonic() + 5
+        while len(finished) < count and time.monotonic() < deadline:
+            finished.extend(self.loader.take_finished(count - len(finished)))
+            time.sleep(0.001)
+
+        return finished
+
+    def test_thumbnails_are_decoded_in_background(self):
+        self.loader.request("a.png")
+        self.loader.request("b.png")
+
+        finished = self.take_all(2)
+
+        self.assertEqual(
+            sorted(finished),
+            [("a.png", "thumbnail of a.png"), ("b.png", "thumbnail of b.png")]
+        )
+        self.thumbnail_cache_mock.get.assert_any_call("a.png", (100, 140))
+        self.assertEqual(self.loader.pending(), 0)
+
+    def test_finished_thumbnails_are_taken_in_batches(self):
+        for i in range(5):
+            self.loader.request(f"{i}.png")
+        self.take_all(0)
+        while self.loader.pending():
+            time.sleep(0.001)
+
+        self.assertEqual(len(self.loader.take_finished(3)), 3)
+        self.assertEqual(len(self.loader.take_finished(3)), 2)
+
+    def test_unreadable_image_returns_none(self):
+        self.thumbnail_cache_mock.get.side_effect = OSError()
+
+        self.loader.request("missing.png")
+
+        self.assertEqual(self.take_all(1), [("missing.png", None)])
+
+    def test_cancelled_thumbnail_isnt_decoded(self):
+        release = threading.Event()
+        self.thumbnail_cache_mock.get.side_effect = (
+            lambda path, size: release.wait(5) and path
+        )
+        self.loader.request("first.png")
+        self.loader.request("second.png")
+
+        self.loader.cancel("second.png")
+        release.set()
+
+        self.assertEqual(self.take_all(1), [("first.png", "first.png")])
+        self.assertEqual(self.loader.pending(), 0)
+        self.assertEqual(self.thumbnail_cache_mock.get.call_count, 1)
@@ -0,0 +1,44 @@
+import unittest
+from utils.ui_utils import Debouncer
+
+
+class FakeWidget:
+    def __init__(self):
+        self.scheduled = {}
+        self._next_id = 0
+
+    def after(self, delay, function, *args):
+        self._next_id += 1
+        self.scheduled[self._next_id] = (function, args)
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        del self.scheduled[after_id]
+
+    def run_scheduled(self):
+        scheduled, self.scheduled = self.scheduled, {}
+        for function, args in scheduled.values():
+            function(*args)
+
+
+class TestDebouncer(unittest.TestCase):
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.calls = []
+        self.debouncer = Debouncer(self.widget, 50, self.calls.append)
+
+    def test_burst_of_calls_runs_function_once_with_last_arguments(self):
+        for width in (600, 650, 700):
+            self.debouncer(width)
+
+        self.assertEqual(len(self.widget.scheduled), 1)
+        self.widget.run_scheduled()
+
+        self.assertEqual(self.calls, [700])
+
+    def test_cancel_drops_scheduled_call(self):
+        self.debouncer(600)
+        self.debouncer.cancel()
+        self.widget.run_scheduled()
+
+        self.assertEqual(self.calls, [])
@@ -1,27 +1,40 @@
+import bisect
 import os
-from tkinter import ttk, Canvas, constants, StringVar, messagebox
+import time
+from tkinter import ttk, Canvas, PhotoImage, constants, StringVar, messagebox
 from ttkwidgets.autocomplete import AutocompleteCombobox
-from PIL import Image, ImageTk
+from PIL import ImageTk
 from services.magic_service import (
     magic_service,
     CardExistsError,
     CardNotFoundError
 )
-from repositories.card_repository import (
-    card_repository,
-    IncorrectNameOrSetError,
-    SetsNotFoundError,
-    DatabaseCreateError,
-    DatabaseDeleteError,
-    DatabaseFindError,
-    CardImageNotFoundError,
-    CardImageWriteError
-)
-from utils.ui_utils import center_window
+from repositories.card_repository import IncorrectNameOrSetError
+from utils.ui_utils import center_window, Debouncer
+from utils.card_utils import card_name_to_png_filename
+from utils.background_worker import BackgroundWorker
+from utils.thumbnail_loader import ThumbnailLoader
+from utils.grid_layout import GridLayout
+from utils.lru_cache import LRUCache
+from config import PHOTO_CACHE_MAX_BYTES
+
+
+# Milliseconds between checks for decoded thumbnails
+THUMBNAIL_POLL_INTERVAL = 30
+# Maximum number of thumbnails shown per check, so the window stays responsive
+THUMBNAIL_BATCH_SIZE = 32
+
+# Decoded thumbnails shared by every card list: (image filename, size) -> PhotoImage.
+# Survives rebuilding the view and logging in again.
+photo_cache = LRUCache(PHOTO_CACHE_MAX_BYTES)
 
 
 class CardListView:
-    """View for listing card images."""
+    """View for listing card images. The grid is virtualized: canvas items
+    and images exist only for the rows in or near the visible area and
+    they are reused while scrolling, so memory use doesn't depend on
+    the size of the collection. Cards are inserted and removed one at
+    a time with insert_card() and remove_card()."""
 
     def __init__(self, root):
         """Class constructor. Creates a new card list view.
@@ -34,12 +47,24 @@ class CardListView:
         self._root = root
         self._user = magic_service.get_current_user()
         self._frame = None
-        self._content_frame = None
-        self._scrollable_frame = None
-        self._card_images = []
-        self._image_labels = []
+        self._canvas = None
+        # Cards ordered by image filename: (image_filename, card_id)
+        self._cards = []
+        self._filenames_by_id = {}
         self._images_dir = None
         self._thumbnail_size = None
+        self._placeholder = None
+        self._layout = None
+        self._columns = 1
+        # Visible cells: index -> (canvas item, PhotoImage)
+        self._visible = {}
+        # Canvas items of cells scrolled out of view, reused for new cells
+        self._free_items = []
+        self._relayout = None
+        self._thumbnail_loader = None
+        self._thumbnail_poll_id = None
+        # Instrumentation of _refresh_card_layout
+        self.layout_stats = {"relayouts": 0, "moved_cells": 0, "seconds": 0.0}
 
         self._initialize()
 
@@ -51,6 +76,9 @@ class CardListView:
     def destroy(self):
         """"Destroy current view."""
 
+        self._relayout.cancel()
+        self._canvas.after_cancel(self._thumbnail_poll_id)
+        self._thumbnail_loader.shutdown()
         self._frame.destroy()
 
     def _initialize(self):
@@ -61,89 +89,251 @@ class CardListView:
         dirname = os.path.dirname(__file__)
         self._images_dir = os.path.join(dirname, "..", "..", "images")
         self._thumbnail_size = (100, 140)
+        padding = 2
+        self._layout = GridLayout(
+            self._thumbnail_size[0] + 2*padding,
+            self._thumbnail_size[1] + 2*padding
+        )
 
-        canvas = Canvas(master=self._frame)
+        self._canvas = Canvas(master=self._frame, highlightthickness=0)
         scrollbar = ttk.Scrollbar(
             master=self._frame,
             orient="vertical",
-            command=canvas.yview
+            command=self._scroll
         )
-        canvas.configure(yscrollcommand=scrollbar.set)
+        self._canvas.configure(yscrollcommand=scrollbar.set)
 
-        self._content_frame = ttk.Frame(master=canvas)
-        canvas.create_window(
-            (0, 0),
-            window=self._content_frame,
-            anchor="nw"
+        # Shown until the image of the card is downloaded
+        self._placeholder = PhotoImage(
+            master=self._canvas,
+            width=self._thumbnail_size[0],
+            height=self._thumbnail_size[1]
         )
+        self._placeholder.put("#d9d9d9", to=(0, 0, *self._thumbnail_size))
 
-        canvas.grid(row=0, column=0, sticky="nsew")
+        # Thumbnails are decoded in background threads and shown in batches
+        self._thumbnail_loader = ThumbnailLoader(self._thumbnail_size)
+        self._thumbnail_poll_id = self._canvas.after(
+            THUMBNAIL_POLL_INTERVAL,
+            self._show_decoded_thumbnails
+        )
+
+        self._canvas.grid(row=0, column=0, sticky="nsew")
         scrollbar.grid(row=0, column=1, sticky="ns")
 
-        # Bind scrollregion and layout refresh with window resize event "<Configure>"
-        # NOTE: These binds need to be in different frames for scrollbar to work
-        self._content_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(
-                scrollregion=canvas.bbox("all")
-            )
-        )
-        self._frame.bind(
-            "<Configure>",
-            self._refresh_card_layout
-        )
+        # Window resize sends a burst of "<Configure>" events, the layout
+        # is refreshed once after the burst
+        self._relayout = Debouncer(self._canvas, 50, self._refresh_card_layout)
+        self._canvas.bind("<Configure>", self._relayout)
+        self._canvas.bind("<MouseWheel>", self._mouse_wheel)
+        self._canvas.bind("<Button-4>", lambda e: self._scroll("scroll", -1, "units"))
+        self._canvas.bind("<Button-5>", lambda e: self._scroll("scroll", 1, "units"))
 
         self._load_card_images()
-        self._refresh_card_layout()
 
     def _load_card_images(self):
-        """Loads card images into memory as thumbnails."""
+        """Loads the cards of the user. Thumbnails are loaded
+        only when their row is drawn."""
 
-        self._image_labels = []
-        image_filenames = magic_service.get_user_card_image_filenames(
-            self._user.user_id
-        )
-        for filename in sorted(image_filenames):
-            if filename.lower().endswith((".png", ".jpg", ".jpeg")):
-                path = os.path.join(self._images_dir, filename)
-                img = Image.open(path)
-                img.thumbnail(self._thumbnail_size)
-                photo = ImageTk.PhotoImage(img)
-                label = ttk.Label(self._content_frame, image=photo)
+        self._cards = [
+            (filename, card_id)
+            for card_id, filename in magic_service.get_user_card_images(
+                self._user.user_id
+            )
+        ]
+        self._filenames_by_id = {
+            card_id: filename for filename, card_id in self._cards
+        }
+
+    def insert_card(self, card_id, image_filename):
+        """Inserts a card into its position in the grid.
+
+        Args:
+            card_id (int): Card database id (primary key).
+            image_filename (str): Filename of the card image.
+        """
+
+        if card_id in self._filenames_by_id:
+            return
+
+        index = bisect.bisect_left(self._cards, (image_filename, card_id))
+        self._cards.insert(index, (image_filename, card_id))
+        self._filenames_by_id[card_id] = image_filename
+        self._shift_visible_cells(index, 1)
+
+    def remove_card(self, card_id):
+        """Removes a card from the grid.
 
-                # Only saves reference to photo -objects, so they arent't lost
-                self._card_images.append(photo)
+        Args:
+            card_id (int): Card database id (primary key).
+        """
 
-                self._image_labels.append(label)
+        image_filename = self._filenames_by_id.pop(card_id, None)
+        if image_filename is None:
+            return
+
+        index = bisect.bisect_left(self._cards, (image_filename, card_id))
+        if index in self._visible:
+            self._release_cell(index)
+        del self._cards[index]
+        self._shift_visible_cells(index + 1, -1)
+
+    def image_ready(self, image_filename):
+        """Replaces the placeholder of the card, when its image is on disk.
+
+        Args:
+            image_filename (str): Filename of the card image.
+        """
+
+        photo_cache.pop((image_filename, self._thumbnail_size))
+        for index in self._visible:
+            if self._cards[index][0] == image_filename:
+                self._thumbnail_loader.request(self._image_path(index))
+
+    def _show_decoded_thumbnails(self):
+        """Replaces placeholders with the thumbnails decoded since
+        the last call, at most THUMBNAIL_BATCH_SIZE at a time."""
+
+        finished = self._thumbnail_loader.take_finished(THUMBNAIL_BATCH_SIZE)
+        if finished:
+            visible = {
+                self._image_path(index): index for index in self._visible
+            }
+            for path, image in finished:
+                index = visible.get(path)
+                # Cell may have been scrolled out of view already
+                if index is None or image is None:
+                    continue
+                item, _ = self._visible[index]
+                photo = ImageTk.PhotoImage(image)
+                photo_cache.put(
+                    (self._cards[index][0], self._thumbnail_size),
+                    photo,
+                    image.width * image.height * 4
+                )
+                self._canvas.itemconfigure(item, image=photo)
+                self._visible[index] = (item, photo)
+
+        self._thumbnail_poll_id = self._canvas.after(
+            THUMBNAIL_POLL_INTERVAL,
+            self._show_decoded_thumbnails
+        )
+
+    def _shift_visible_cells(self, start, offset):
+        """Moves the visible cells from 'start' onwards by 'offset' positions
+        after an insert or a remove, and draws the cells, which came into view."""
+
+        shifted = {
+            (index + offset if index >= start else index): cell
+            for index, cell in self._visible.items()
+        }
+        self._visible = shifted
+        for index, (item, _) in shifted.items():
+            if index >= start + min(offset, 0):
+                self._canvas.coords(item, *self._cell_position(index))
+
+        self._update_scrollregion(self._canvas.winfo_width())
+        self._render_visible_cells()
+
+    def _scroll(self, *args):
+        self._canvas.yview(*args)
+        self._render_visible_cells()
+
+    def _mouse_wheel(self, event):
+        self._scroll("scroll", -1 if event.delta > 0 else 1, "units")
+
+    def _update_scrollregion(self, width):
+        height = self._layout.total_height(len(self._cards), self._columns)
+        self._canvas.configure(
+            scrollregion=(0, 0, width, height),
+            yscrollincrement=self._layout.cell_height // 4
+        )
 
     def _refresh_card_layout(self, event=None):
         """Dynamically creates layot for cards according to
-        current window size.
+        current window size. Only the visible cells, whose position
+        changes, are moved.
 
         Args:
             event: Window resize event
         """
 
-        for label in self._image_labels:
-            label.grid_forget()
+        start = time.perf_counter()
+        width = event.width if event else self._canvas.winfo_width()
+        columns = self._layout.columns(width)
+        moved = self._layout.moved_cells(self._visible, self._columns, columns)
+        self._columns = columns
 
-        # HACK: frame_width is shortened by 40 units to compensate for scrollbar
-        # and windows margins, since it's challenging to get self._content_frame
-        # width reliably
-        frame_width = (event.width if event else self._root.winfo_width()) - 40
-        padding = 2
-        thumb_width = self._thumbnail_size[0] + 2*padding
-        max_columns = max(1, ((frame_width) // thumb_width))
+        for index in moved:
+            item, _ = self._visible[index]
+            self._canvas.coords(item, *self._cell_position(index))
+
+        self._update_scrollregion(width)
+        self._render_visible_cells()
+
+        self.layout_stats["relayouts"] += 1
+        self.layout_stats["moved_cells"] += len(moved)
+        self.layout_stats["seconds"] += time.perf_counter() - start
+
+    def _cell_position(self, index):
+        x, y = self._layout.position(index, self._columns)
+        padding = (self._layout.cell_width - self._thumbnail_size[0]) // 2
+
+        return x + padding, y + padding
+
+    def _render_visible_cells(self):
+        """Draws the cells in or near the visible area and releases
+        the cells scrolled out of view."""
+
+        top = int(self._canvas.canvasy(0))
+        visible = self._layout.visible_range(
+            top,
+            self._canvas.winfo_height(),
+            len(self._cards),
+            self._columns
+        )
+
+        for index in [i for i in self._visible if i not in visible]:
+            self._release_cell(index)
+
+        for index in visible:
+            if index not in self._visible:
+                self._draw_cell(index)
+
+    def _release_cell(self, index):
+        item, _ = self._visible.pop(index)
+        self._canvas.itemconfigure(item, image="", state="hidden")
+        self._free_items.append(item)
+        self._thumbnail_loader.cancel(self._image_path(index))
+
+    def _image_path(self, index):
+        return os.path.join(self._images_dir, self._cards[index][0])
+
+    def _draw_cell(self, index):
+        """Draws the cached thumbnail into the cell. Otherwise draws
+        a placeholder and queues the thumbnail for decoding, so drawing
+        doesn't wait for the image."""
+
+        photo = photo_cache.get((self._cards[index][0], self._thumbnail_size))
+        cached = photo is not None
+        if not cached:
+            photo = self._placeholder
 
-        row = 0
-        col = 0
+        if self._free_items:
+            item = self._free_items.pop()
+            self._canvas.coords(item, *self._cell_position(index))
+            self._canvas.itemconfigure(item, image=photo, state="normal")
+        else:
+            item = self._canvas.create_image(
+                *self._cell_position(index),
+                image=photo,
+                anchor="nw"
+            )
 
-        for label in self._image_labels:
-            label.grid(row=row, column=col, padx=padding, pady=padding)
-            col += 1
-            if col >= max_columns:
-                col = 0
-                row += 1
+        # Only saves reference to photo -objects, so they arent't lost
+        self._visible[index] = (item, photo)
+        if not cached:
+            self._thumbnail_loader.request(self._image_path(index))
 
 
 class MagicCardView:
@@ -178,9 +368,21 @@ class MagicCardView:
         self._message_label = None
         self._message_variable = None
         self._card_list_view = None
+        self._progress_variable = None
+        self._cancel_button = None
+        self._worker = BackgroundWorker()
+        # Set refreshes and image scans aren't card operations, so they
+        # don't show in the progress, can't be cancelled and never hold up
+        # the card jobs
+        self._maintenance_worker = BackgroundWorker(max_workers=1)
 
         center_window(self._root, 900, 800)
         self._initialize()
+        self._worker.start_polling(self._frame)
+        self._maintenance_worker.start_polling(self._frame)
+        magic_service.add_collection_listener(self._collection_changed)
+        magic_service.add_image_listener(self._image_downloaded)
+        self._queue_missing_images()
 
     def pack(self):
         """Show current view."""
@@ -190,8 +392,23 @@ class MagicCardView:
     def destroy(self):
         """Destroy current view."""
 
+        magic_service.remove_collection_listener(self._collection_changed)
+        magic_service.remove_image_listener(self._image_downloaded)
+        self._worker.shutdown()
+        self._maintenance_worker.shutdown()
+        # Stops the thumbnail threads and the scheduled callbacks of the card list
+        if self._card_list_view:
+            self._card_list_view.destroy()
         self._frame.destroy()
 
+    def _queue_missing_images(self):
+        """Queues the images missing from disk. The collection is scanned
+        by the maintenance worker, so a large collection doesn't delay
+        the login."""
+
+        user_id = self._user.user_id
+        self._maintenance_worker.submit(lambda job: magic_service.queue_missing_images(user_id))
+
     def _logout_handler(self):
         """Logout current user."""
 
@@ -206,7 +423,8 @@ class MagicCardView:
 
     def _add_handler(self):
         """Fetch and save new card data into database
-        and save card image on disk."""
+        and save card image on disk. Fetching is done by a background
+        worker, so several cards can be queued without freezing the window."""
 
         card_and_set = self._get_card_name_and_set()
         if not card_and_set:
@@ -216,26 +434,51 @@ class MagicCardView:
             return
 
         card_name, set_code = card_and_set
+        # The job may still run after a logout, so the collection is
+        # chosen when the job is submitted
+        user_id = self._user.user_id
+
+        self._worker.submit(
+            lambda job: magic_service.fetch_card(card_name, set_code, user_id),
+            on_done=lambda _: self._card_added(),
+            on_error=self._card_add_failed
+        )
+        self._card_name_entry.delete(0, 'end')
+        self._card_name_entry.focus_set()
+        self._show_progress()
 
-        try:
-            magic_service.fetch_card(card_name, set_code)
-            self._initialize_card_list()
-            self._card_name_entry.delete(0, 'end')
-            self._card_name_entry.focus_set()
-            self._message_label.configure(foreground="green")
-            self._show_message("Card added to collection")
-        except (
-            CardExistsError,
-            IncorrectNameOrSetError
-        ) as e:
-            messagebox.showinfo("Info", e)
-        except (
-            DatabaseCreateError,
-            DatabaseFindError,
-            CardImageNotFoundError,
-            CardImageWriteError
-        ) as e:
-            messagebox.showerror("Error", e)
+    def _card_added(self):
+        self._show_progress()
+        self._message_label.configure(foreground="green")
+        self._show_message("Card added to collection")
+
+    def _collection_changed(self, change):
+        """Called from the thread, which changed the collection."""
+
+        if change.user_id == self._user.user_id:
+            self._worker.call_soon(self._update_card_list, change)
+
+    def _update_card_list(self, change):
+        if change.action == "added":
+            self._card_list_view.insert_card(change.card_id, change.image_filename)
+        else:
+            self._card_list_view.remove_card(change.card_id)
+
+    def _image_downloaded(self, card_name, set_code, error):
+        """Called from the image download thread."""
+
+        if not error:
+            self._worker.call_soon(
+                self._card_list_view.image_ready,
+                card_name_to_png_filename(card_name, set_code)
+            )
+
+    def _card_add_failed(self, error):
+        self._show_progress()
+        if isinstance(error, (CardExistsError, IncorrectNameOrSetError)):
+            messagebox.showinfo("Info", error)
+        else:
+            messagebox.showerror("Error", error)
 
     def _card_delete_handler(self):
         """Deletes card from current user, but not from database.
@@ -255,25 +498,42 @@ class MagicCardView:
         )
 
         if response:
-            try:
-                magic_service.delete_usercard(card_name, set_code)
-                self._initialize_card_list()
-                self._card_name_entry.delete(0, 'end')
-                self._card_name_entry.focus_set()
-                self._message_label.configure(foreground="red")
-                self._show_message("Card removed from collection")
-            except (
-                CardNotFoundError,
-                IncorrectNameOrSetError
-            ) as e:
-                messagebox.showinfo("Info", e)
-            except (
-                DatabaseFindError,
-                DatabaseDeleteError
-            ) as e:
-                messagebox.showerror("Error", e)
+            user_id = self._user.user_id
+            self._worker.submit(
+                lambda job: magic_service.delete_usercard(card_name, set_code, user_id),
+                on_done=lambda _: self._card_deleted(),
+                on_error=self._card_delete_failed
+            )
+            self._card_name_entry.delete(0, 'end')
+            self._card_name_entry.focus_set()
+            self._show_progress()
+
+    def _card_deleted(self):
+        self._show_progress()
+        self._message_label.configure(foreground="red")
+        self._show_message("Card removed from collection")
+
+    def _card_delete_failed(self, error):
+        self._show_progress()
+        if isinstance(error, (CardNotFoundError, IncorrectNameOrSetError)):
+            messagebox.showinfo("Info", error)
         else:
-            return
+            messagebox.showerror("Error", error)
+
+    def _cancel_handler(self):
+        """Cancels the queued card operations."""
+
+        self._worker.cancel_all()
+        self._show_progress()
+
+    def _show_progress(self):
+        pending = self._worker.pending()
+        if pending:
+            self._progress_variable.set(f"{pending} card(s) in progress")
+            self._cancel_button.grid()
+        else:
+            self._progress_variable.set("")
+            self._cancel_button.grid_remove()
 
     def _show_message(self, message):
         self._message_variable.set(message)
@@ -286,17 +546,30 @@ class MagicCardView:
     def initialize_sets(self):
         """Form a dictionary that can be used for populating a dropdown list for
         card set 'names' and also for fetching cards with 'code' in _add_handler().
-
-        Returns:
-            A dictionary with all currently available card sets, with key = 'name'
-            and value = 'code'.
+        Sets saved in database are shown immediately, stale sets are
+        revalidated in the background.
         """
 
-        try:
-            sets = card_repository.fetch_all_sets()
-            self._all_sets = {set["name"]: set["code"] for set in sets["data"]}
-        except SetsNotFoundError as e:
-            messagebox.showerror("Error", e)
+        self._all_sets = magic_service.get_card_sets()
+
+        if not self._all_sets or magic_service.card_sets_are_stale():
+            self._maintenance_worker.submit(
+                lambda job: magic_service.refresh_card_sets(),
+                on_done=self._sets_refreshed,
+                on_error=self._sets_refresh_failed
+            )
+
+    def _sets_refreshed(self, sets):
+        if sets is None:
+            return
+
+        self._all_sets = sets
+        self._set_list_dropdown.set_completion_list(sorted(list(self._all_sets)))
+
+    def _sets_refresh_failed(self, error):
+        # Saved sets are still usable offline
+        if not self._all_sets:
+            messagebox.showerror("Error", error)
 
     def initialize_label(self, top_frame):
         title_label = ttk.Label(
@@ -381,6 +654,30 @@ class MagicCardView:
             pady=(2, 0)
         )
 
+        # Progress of the queued card additions/removals
+        self._progress_variable = StringVar(center_frame)
+        progress_label = ttk.Label(
+            master=center_frame,
+            textvariable=self._progress_variable
+        )
+        self._cancel_button = ttk.Button(
+            master=center_frame,
+            text="Cancel",
+            command=self._cancel_handler
+        )
+        progress_label.grid(
+            row=3,
+            column=1,
+            pady=(2, 0)
+        )
+        self._cancel_button.grid(
+            row=3,
+            column=2,
+            padx=10,
+            pady=(2, 0)
+        )
+        self._cancel_button.grid_remove()
+
     def initialize_logout(self, top_frame):
         logout_button = ttk.Button(
             master=top_frame,
@@ -0,0 +1,193 @@
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+from config import BACKGROUND_WORKERS
+
+
+class Job:
+    """A task submitted to the BackgroundWorker.
+
+    The task is called with the Job -object, so it can report progress
+    with report_progress() and check the 'cancelled' flag between steps.
+
+    Attributes:
+        on_done: Called with the result of the task.
+        on_error: Called with the exception raised by the task.
+        on_progress: Called with the values given to report_progress().
+    """
+
+    def __init__(self, events, on_done=None, on_error=None, on_progress=None):
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.future = None
+        self._events = events
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Cancels the job. A job in the queue is never started, a running
+        job is only notified via the 'cancelled' flag.
+
+        Returns:
+            True if the job was still in the queue.
+        """
+
+        self._cancelled.set()
+
+        return self.future.cancel()
+
+    def report_progress(self, value):
+        """Reports progress of the task, called from the worker thread.
+
+        Args:
+            value: Passed to on_progress.
+        """
+
+        self._events.put((self, "progress", value))
+
+
+class BackgroundWorker:
+    """Runs slow tasks (HTTP requests, disk and database writes) in a thread
+    pool, so the user interface doesn't freeze. Callbacks of the jobs are
+    called in the thread, which calls poll(), e.g. the Tk main thread with
+    start_polling().
+
+    Attributes:
+        max_workers (int): Number of worker threads.
+    """
+
+    def __init__(self, max_workers=BACKGROUND_WORKERS):
+        """Class constructor. Creates a new background worker.
+
+        Args:
+            max_workers (int): Number of worker threads.
+        """
+
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="background-worker"
+        )
+        self._events = queue.SimpleQueue()
+        self._jobs = set()
+        self._poll_id = None
+        self._widget = None
+
+    def submit(self, task, on_done=None, on_error=None, on_progress=None):
+        """Adds a task into the queue.
+
+        Args:
+            task: Function, which takes the Job -object as argument.
+            on_done: Called with the result of the task.
+            on_error: Called with the exception raised by the task.
+            on_progress: Called with the progress values of the task.
+        Returns:
+            Job -object.
+        """
+
+        job = Job(self._events, on_done, on_error, on_progress)
+        self._jobs.add(job)
+        job.future = self._executor.submit(self._run, task, job)
+
+        return job
+
+    def _run(self, task, job):
+        try:
+            result = task(job)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self._events.put((job, "error", e))
+            return
+
+        self._events.put((job, "done", result))
+
+    def call_soon(self, callback, value=None):
+        """Calls the callback in the polling thread, can be called from
+        any thread.
+
+        Args:
+            callback: Function, which takes one argument.
+            value: Argument of the callback.
+        """
+
+        self._events.put((None, callback, value))
+
+    def pending(self):
+        """Returns the number of queued and running jobs."""
+
+        return len(self._jobs)
+
+    def cancel_all(self):
+        """Cancels all jobs. Jobs still in the queue are dropped without
+        callbacks.
+
+        Returns:
+            Number of jobs dropped from the queue.
+        """
+
+        dropped = 0
+
+        for job in list(self._jobs):
+            if job.cancel():
+                self._jobs.discard(job)
+                dropped += 1
+
+        return dropped
+
+    def poll(self):
+        """Calls the callbacks of the finished jobs and progress reports.
+
+        Returns:
+            Number of handled events.
+        """
+
+        handled = 0
+
+        while True:
+            try:
+                job, event, value = self._events.get_nowait()
+            except queue.Empty:
+                return handled
+
+            handled += 1
+            if job is None:
+                callback = event
+            elif event == "progress":
+                callback = job.on_progress
+            else:
+                self._jobs.discard(job)
+                callback = job.on_done if event == "done" else job.on_error
+
+            if callback:
+                callback(value)
+
+    def start_polling(self, widget, interval=50):
+        """Polls the finished jobs every 'interval' milliseconds in the
+        Tk main loop of the widget.
+
+        Args:
+            widget: Tk widget.
+            interval (int): Milliseconds between polls.
+        """
+
+        self._widget = widget
+
+        def tick():
+            self.poll()
+            self._poll_id = widget.after(interval, tick)
+
+        self._poll_id = widget.after(interval, tick)
+
+    def shutdown(self):
+        """Stops polling and cancels the queued jobs. Running jobs
+        finish in the background without callbacks."""
+
+        if self._poll_id is not None:
+            self._widget.after_cancel(self._poll_id)
+            self._poll_id = None
+
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
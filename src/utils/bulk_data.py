@@ -0,0 +1,94 @@
+import json
+
+
+def iter_json_array(file, chunk_size=1 << 16):
+    """Reads a json array from a file one item at a time, so that
+    files of hundreds of megabytes (e.g. Scryfall bulk data) never
+    have to be loaded into memory at once.
+
+    Args:
+        file: File -object opened in text mode.
+        chunk_size (int): Number of characters read at a time.
+    Yields:
+        Items of the array.
+    Raises:
+        ValueError: File isn't a valid json array.
+    """
+
+    reader = _JsonArrayReader(file, chunk_size)
+
+    if reader.peek() != "[":
+        raise ValueError("Bulk data must be a json array.")
+    reader.skip()
+
+    while reader.peek() != "]":
+        yield reader.decode()
+
+
+class _JsonArrayReader:
+    """Buffered reader of iter_json_array. Chunks are read from the file
+    only when the buffered text runs out."""
+
+    def __init__(self, file, chunk_size):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def _read_chunk(self):
+        if self._eof:
+            raise ValueError("Unexpected end of bulk data.")
+
+        chunk = self._file.read(self._chunk_size)
+        self._eof = not chunk
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+
+    def peek(self):
+        """Returns the next character, which isn't whitespace or a comma."""
+
+        while True:
+            while (self._position < len(self._buffer)
+                   and self._buffer[self._position] in " \t\r\n,"):
+                self._position += 1
+
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+
+            self._read_chunk()
+
+    def skip(self):
+        """Skips the next character."""
+
+        self._position += 1
+
+    def decode(self):
+        """Decodes the next json value."""
+
+        while True:
+            try:
+                item, self._position = self._decoder.raw_decode(
+                    self._buffer, self._position
+                )
+                return item
+            except json.JSONDecodeError:
+                # Item continues in the next chunk
+                if self._eof:
+                    raise
+                self._read_chunk()
+
+
+def iter_bulk_data_file(path, chunk_size=1 << 16):
+    """Reads cards from a Scryfall bulk data file (e.g. 'default_cards').
+
+    Args:
+        path (str): Path to the bulk data json file.
+        chunk_size (int): Number of characters read at a time.
+    Yields:
+        Card data in dict format.
+    """
+
+    with open(path, encoding="utf-8") as file:
+        yield from iter_json_array(file, chunk_size)
@@ -1,10 +1,180 @@
 import sqlite3
-from config import DATABASE_PATH
+import threading
+from contextlib import contextmanager
+from config import DATABASE_PATH, DATABASE_PRAGMA_PROFILE
 
 
-connection = sqlite3.connect(DATABASE_PATH)
-connection.row_factory = sqlite3.Row
-connection.execute("PRAGMA foreign_keys = ON;")
+class UnknownPragmaProfileError(Exception):
+    pass
+
+
+class TransactionalCursor(sqlite3.Cursor):
+    """Cursor of TransactionalConnection. Statements wait while another
+    thread has a transaction open, so they never become part of it."""
+
+    def execute(self, *args, **kwargs):
+        with self.connection.transaction_lock:
+            return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with self.connection.transaction_lock:
+            return super().executemany(*args, **kwargs)
+
+    def executescript(self, *args, **kwargs):
+        with self.connection.transaction_lock:
+            return super().executescript(*args, **kwargs)
+
+
+class TransactionalConnection(sqlite3.Connection):
+    """Database connection with explicit transactions (unit of work).
+
+    Inside transaction() the commit() and rollback() calls of repositories
+    do nothing, and all changes are committed once when the outermost
+    transaction ends, or rolled back if it fails. Nested transactions are
+    savepoints, so a failed inner transaction only undoes its own changes.
+    Outside a transaction commit() and rollback() work as usual.
+
+    NOTE: The connection is shared by the user interface and background
+    workers. Transactions of different threads run one at a time, and
+    statements and commits of other threads wait until the open transaction
+    has ended, so a rollback never undoes the changes of another thread.
+
+    Attributes:
+        transaction_lock: Lock held by the thread, which has a transaction
+            open or runs a statement.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transaction_lock = threading.RLock()
+        self._transaction_depth = 0
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TransactionalCursor)
+
+    def execute(self, *args, **kwargs):
+        return self.cursor().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self.cursor().executemany(*args, **kwargs)
+
+    def executescript(self, *args, **kwargs):
+        return self.cursor().executescript(*args, **kwargs)
+
+    @contextmanager
+    def transaction(self):
+        """Opens a transaction, or a savepoint inside an open transaction.
+
+        Yields:
+            The connection.
+        """
+
+        with self.transaction_lock:
+            depth = self._transaction_depth
+            self._begin(depth)
+            self._transaction_depth += 1
+
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                self._end(depth, failed=True)
+                raise
+
+            self._transaction_depth -= 1
+            self._end(depth, failed=False)
+
+    def _begin(self, depth):
+        if depth == 0:
+            super().commit()
+            self.execute("BEGIN")
+        else:
+            self.execute(f"SAVEPOINT transaction_{depth}")
+
+    def _end(self, depth, failed):
+        if depth == 0:
+            if failed:
+                super().rollback()
+            else:
+                super().commit()
+            return
+
+        if failed:
+            self.execute(f"ROLLBACK TO transaction_{depth}")
+        self.execute(f"RELEASE transaction_{depth}")
+
+    def commit(self):
+        with self.transaction_lock:
+            if self._transaction_depth == 0:
+                super().commit()
+
+    def rollback(self):
+        with self.transaction_lock:
+            if self._transaction_depth == 0:
+                super().rollback()
+
+
+# Connection settings, see https://www.sqlite.org/pragma.html
+# - default: SQLite defaults, rollback journal and an fsync on every commit
+# - safe: write-ahead log, readers don't block writers, fsync on every commit
+# - wal: write-ahead log with fsync only at checkpoints. A power loss may lose
+#   the latest commits, but never corrupts the database.
+PRAGMA_PROFILES = {
+    "default": {
+        "foreign_keys": "ON"
+    },
+    "safe": {
+        "foreign_keys": "ON",
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000
+    },
+    "wal": {
+        "foreign_keys": "ON",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000
+    }
+}
+
+
+def create_connection(path=DATABASE_PATH, profile=DATABASE_PRAGMA_PROFILE):
+    """Opens a new database connection with the pragmas of the given profile.
+
+    Args:
+        path (str): Path to the database file.
+        profile (str): Name of the pragma profile in PRAGMA_PROFILES.
+    Returns:
+        Connection -object for the database connection.
+    Raises:
+        UnknownPragmaProfileError:
+    """
+
+    if profile not in PRAGMA_PROFILES:
+        raise UnknownPragmaProfileError(
+            f"Unknown database pragma profile '{profile}'"
+        )
+
+    new_connection = sqlite3.connect(
+        path,
+        factory=TransactionalConnection,
+        check_same_thread=False
+    )
+    new_connection.row_factory = sqlite3.Row
+
+    for pragma, value in PRAGMA_PROFILES[profile].items():
+        new_connection.execute(f"PRAGMA {pragma} = {value};")
+
+    return new_connection
+
+
+connection = create_connection()
 
 
 def get_database_connection():
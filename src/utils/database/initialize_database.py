@@ -1,4 +1,5 @@
 from utils.database.database_connection import get_database_connection
+from utils.database.migrations import migrate
 
 
 def drop_tables(connection):
@@ -17,64 +18,32 @@ def drop_tables(connection):
         BEGIN;
         DROP TABLE IF EXISTS UserCards;
         DROP TABLE IF EXISTS Users;
+        DROP TABLE IF EXISTS CardColors;
+        DROP TABLE IF EXISTS CardColorIdentity;
+        DROP TABLE IF EXISTS CardKeywords;
+        DROP TABLE IF EXISTS CardsSearch;
         DROP TABLE IF EXISTS Cards;
+        DROP TABLE IF EXISTS CardSets;
+        DROP TABLE IF EXISTS CardSetsCache;
+        DROP TABLE IF EXISTS HttpResponseCache;
+        DROP TABLE IF EXISTS SchemaVersion;
         COMMIT;
     """)
 
 
 def create_tables(connection):
-    """Create database tables.
+    """Create database tables by applying all schema migrations.
 
     Args:
         connection:
             Connection -object for the database connection.
     """
 
-    cursor = connection.cursor()
-
-    cursor.executescript("""
-        BEGIN;
-        CREATE TABLE Users (
-            id INTEGER PRIMARY KEY,
-            username TEXT,
-            password TEXT
-        );
-        CREATE TABLE Cards (
-            id INTEGER PRIMARY KEY,
-            name TEXT,
-            released_at TEXT,
-            layout TEXT,
-            mana_cost TEXT,
-            cmc REAL,
-            colors JSON,
-            color_identity JSON,
-            type_line TEXT,
-            oracle_text TEXT,
-            keywords JSON,
-            card_faces JSON,
-            all_parts JSON,
-            power TEXT,
-            toughness TEXT,
-            image_uris JSON,
-            set_code TEXT,
-            set_name TEXT,
-            rarity TEXT,
-            flavor_text TEXT,
-            prices JSON
-        );
-        CREATE TABLE UserCards (
-            user_id INTEGER NOT NULL,
-            card_id INTEGER NOT NULL,
-            PRIMARY KEY (user_id, card_id),
-            FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE,
-            FOREIGN KEY (card_id) REFERENCES Cards(id) ON DELETE CASCADE
-        );
-        COMMIT;
-    """)
+    migrate(connection)
 
 
 def initialize_database():
-    """Initialize the database."""
+    """Initialize the database. All existing data is removed."""
 
     connection = get_database_connection()
 
@@ -84,5 +53,12 @@ def initialize_database():
     print("Database initialized.")
 
 
+def migrate_database():
+    """Apply pending schema migrations to the database. Existing data
+    is preserved."""
+
+    migrate(get_database_connection())
+
+
 if __name__ == "__main__":
     initialize_database()
@@ -0,0 +1,348 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A numbered schema change.
+
+    Attributes:
+        version (int): Schema version after the migration.
+        description (str): Short description of the change.
+        apply: Function, which takes a cursor and makes the change.
+            Must be safe to run on a database that already has the change.
+    """
+
+    version: int
+    description: str
+    apply: object
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute(f"PRAGMA table_info({table})")
+
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def _add_column(cursor, table, column, definition):
+    if not _column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _initial_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Users (
+            id INTEGER PRIMARY KEY,
+            username TEXT,
+            password TEXT
+        )""")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Cards (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            released_at TEXT,
+            layout TEXT,
+            mana_cost TEXT,
+            cmc REAL,
+            colors JSON,
+            color_identity JSON,
+            type_line TEXT,
+            oracle_text TEXT,
+            keywords JSON,
+            card_faces JSON,
+            all_parts JSON,
+            power TEXT,
+            toughness TEXT,
+            image_uris JSON,
+            set_code TEXT,
+            set_name TEXT,
+            rarity TEXT,
+            flavor_text TEXT,
+            prices JSON
+        )""")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS UserCards (
+            user_id INTEGER NOT NULL,
+            card_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, card_id),
+            FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE,
+            FOREIGN KEY (card_id) REFERENCES Cards(id) ON DELETE CASCADE
+        )""")
+
+
+def _card_catalog(cursor):
+    _add_column(cursor, "Cards", "scryfall_id", "TEXT")
+    _add_column(cursor, "Cards", "content_hash", "TEXT")
+
+    # Older databases may have the same card twice, collections are moved
+    # to the first copy before the duplicates are removed
+    cursor.execute("""
+        UPDATE OR IGNORE UserCards SET card_id = (
+            SELECT MIN(other.id)
+            FROM Cards card
+            JOIN Cards other
+                ON other.name = card.name COLLATE NOCASE
+                AND other.set_code IS card.set_code
+            WHERE card.id = UserCards.card_id
+        )""")
+    cursor.execute("""
+        DELETE FROM Cards WHERE id NOT IN (
+            SELECT MIN(id) FROM Cards GROUP BY name COLLATE NOCASE, set_code
+        )""")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS Cards_name_set_code_idx
+            ON Cards (name COLLATE NOCASE, set_code)""")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS Cards_scryfall_id_idx
+            ON Cards (scryfall_id)""")
+
+
+def _card_sets_cache(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS CardSets (
+            code TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            released_at TEXT,
+            set_type TEXT
+        )""")
+    # Single row: validators and fetch time of the cached set list
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS CardSetsCache (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL
+        )""")
+
+
+def _http_response_cache(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS HttpResponseCache (
+            key TEXT PRIMARY KEY,
+            body TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )""")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS HttpResponseCache_accessed_at_idx
+            ON HttpResponseCache (accessed_at)""")
+
+
+def _card_search(cursor):
+    # External content table: the text is read from Cards,
+    # only the full-text index is stored
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS CardsSearch USING fts5 (
+            name,
+            type_line,
+            oracle_text,
+            flavor_text,
+            content = 'Cards',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )""")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS Cards_search_insert AFTER INSERT ON Cards BEGIN
+            INSERT INTO CardsSearch (rowid, name, type_line, oracle_text, flavor_text)
+            VALUES (new.id, new.name, new.type_line, new.oracle_text, new.flavor_text);
+        END""")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS Cards_search_delete AFTER DELETE ON Cards BEGIN
+            INSERT INTO CardsSearch (
+                CardsSearch, rowid, name, type_line, oracle_text, flavor_text
+            )
+            VALUES (
+                'delete', old.id, old.name, old.type_line, old.oracle_text, old.flavor_text
+            );
+        END""")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS Cards_search_update
+        AFTER UPDATE OF name, type_line, oracle_text, flavor_text ON Cards BEGIN
+            INSERT INTO CardsSearch (
+                CardsSearch, rowid, name, type_line, oracle_text, flavor_text
+            )
+            VALUES (
+                'delete', old.id, old.name, old.type_line, old.oracle_text, old.flavor_text
+            );
+            INSERT INTO CardsSearch (rowid, name, type_line, oracle_text, flavor_text)
+            VALUES (new.id, new.name, new.type_line, new.oracle_text, new.flavor_text);
+        END""")
+    cursor.execute("INSERT INTO CardsSearch (CardsSearch) VALUES ('rebuild')")
+
+
+def _card_filter_indexes(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS Cards_cmc_idx ON Cards (cmc)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS Cards_rarity_idx ON Cards (rarity)")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS Cards_set_code_idx
+            ON Cards (set_code COLLATE NOCASE)""")
+
+
+# Side tables of the JSON array columns of Cards: (table, value column, Cards column)
+CARD_VALUE_TABLES = (
+    ("CardColors", "color", "colors"),
+    ("CardColorIdentity", "color", "color_identity"),
+    ("CardKeywords", "keyword", "keywords")
+)
+
+
+def _card_value_tables(cursor):
+    for table, column, source in CARD_VALUE_TABLES:
+        # The primary key covers lookups by value, the index lookups by card
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                card_id INTEGER NOT NULL,
+                {column} TEXT NOT NULL COLLATE NOCASE,
+                PRIMARY KEY ({column}, card_id),
+                FOREIGN KEY (card_id) REFERENCES Cards(id) ON DELETE CASCADE
+            ) WITHOUT ROWID""")
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS {table}_card_id_idx
+                ON {table} (card_id, {column})""")
+
+        insert_values = f"""
+            INSERT OR IGNORE INTO {table} (card_id, {column})
+            SELECT new.id, value FROM json_each(new.{source})
+            WHERE json_valid(new.{source}) AND type = 'text';"""
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS Cards_{source}_insert
+            AFTER INSERT ON Cards BEGIN {insert_values} END""")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS Cards_{source}_update
+            AFTER UPDATE OF {source} ON Cards BEGIN
+                DELETE FROM {table} WHERE card_id = old.id; {insert_values}
+            END""")
+
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO {table} (card_id, {column})
+            SELECT Cards.id, value FROM Cards, json_each(Cards.{source})
+            WHERE json_valid(Cards.{source}) AND type = 'text'""")
+
+
+def _face_colors_sql(card, tables=""):
+    """Returns a query for the colors of the faces of 'card', if it has
+    no colors of its own. Double faced cards (e.g. 'transform' and
+    'modal_dfc') have their colors only in card_faces."""
+
+    return f"""
+        SELECT {card}.id, color.value
+        FROM {tables}json_each({card}.card_faces) AS face,
+            json_each(face.value, '$.colors') AS color
+        WHERE json_valid({card}.card_faces)
+        AND CASE WHEN json_valid({card}.colors) THEN json_type({card}.colors) END
+            IS NOT 'array'
+        AND color.type = 'text'"""
+
+
+def _card_face_colors(cursor):
+    insert_values = f"""
+        INSERT OR IGNORE INTO CardColors (card_id, color)
+        SELECT new.id, value FROM json_each(new.colors)
+        WHERE json_valid(new.colors) AND type = 'text';
+        INSERT OR IGNORE INTO CardColors (card_id, color) {_face_colors_sql("new")};"""
+
+    cursor.execute("DROP TRIGGER IF EXISTS Cards_colors_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS Cards_colors_update")
+    cursor.execute(f"""
+        CREATE TRIGGER Cards_colors_insert
+        AFTER INSERT ON Cards BEGIN {insert_values} END""")
+    cursor.execute(f"""
+        CREATE TRIGGER Cards_colors_update
+        AFTER UPDATE OF colors, card_faces ON Cards BEGIN
+            DELETE FROM CardColors WHERE card_id = old.id; {insert_values}
+        END""")
+
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO CardColors (card_id, color)
+        {_face_colors_sql("Cards", "Cards, ")}""")
+
+
+def _http_response_cache_expiry_index(cursor):
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS HttpResponseCache_expires_at_idx
+            ON HttpResponseCache (expires_at)""")
+
+
+MIGRATIONS = (
+    Migration(1, "Initial schema", _initial_schema),
+    Migration(2, "Card catalog columns and unique card indexes", _card_catalog),
+    Migration(3, "Cached card set list", _card_sets_cache),
+    Migration(4, "Cached HTTP responses", _http_response_cache),
+    Migration(5, "Full-text search index of cards", _card_search),
+    Migration(6, "Indexes for card filters", _card_filter_indexes),
+    Migration(7, "Card colors, color identity and keywords tables", _card_value_tables),
+    Migration(8, "Expiry index of cached HTTP responses", _http_response_cache_expiry_index),
+    Migration(9, "Colors of double faced cards", _card_face_colors),
+)
+
+
+def get_schema_version(connection):
+    """Returns the current schema version of the database.
+
+    Args:
+        connection:
+            Connection -object for the database connection.
+    Returns:
+        Schema version, 0 for an empty database.
+    """
+
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS SchemaVersion (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )""")
+    cursor.execute("SELECT MAX(version) FROM SchemaVersion")
+
+    return cursor.fetchone()[0] or 0
+
+
+def migrate(connection, migrations=MIGRATIONS):
+    """Applies pending migrations in order. Every migration runs in its own
+    transaction, so a failed migration leaves the database in the previous
+    version. If the database is up to date, only the version is checked.
+
+    Args:
+        connection:
+            Connection -object for the database connection.
+        migrations:
+            Migration -objects ordered by version.
+    Returns:
+        List of applied versions.
+    """
+
+    current = get_schema_version(connection)
+    connection.commit()
+    pending = [m for m in migrations if m.version > current]
+    applied = []
+
+    for migration in pending:
+        cursor = connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we were waiting
+            cursor.execute("SELECT MAX(version) FROM SchemaVersion")
+            if (cursor.fetchone()[0] or 0) >= migration.version:
+                connection.rollback()
+                continue
+
+            migration.apply(cursor)
+            cursor.execute(
+                """INSERT INTO SchemaVersion (version, description, applied_at)
+                VALUES (?, ?, ?)""",
+                (
+                    migration.version,
+                    migration.description,
+                    datetime.now(timezone.utc).isoformat()
+                )
+            )
+        except BaseException:
+            connection.rollback()
+            raise
+
+        connection.commit()
+        applied.append(migration.version)
+
+    return applied
@@ -0,0 +1,83 @@
+class GridLayout:
+    """Positions of equally sized cells in a grid, which fills rows from
+    left to right. Used for virtualized rendering: only the cells in the
+    visible part of the grid are drawn.
+
+    Attributes:
+        cell_width (int): Width of a cell including padding.
+        cell_height (int): Height of a cell including padding.
+        overscan_rows (int): Rows drawn above and below the visible area,
+            so scrolling doesn't show empty cells.
+    """
+
+    def __init__(self, cell_width, cell_height, overscan_rows=1):
+        """Class constructor. Creates a new grid layout.
+
+        Args:
+            cell_width (int): Width of a cell including padding.
+            cell_height (int): Height of a cell including padding.
+            overscan_rows (int): Rows drawn above and below the visible area.
+        """
+
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.overscan_rows = overscan_rows
+
+    def columns(self, width):
+        """Returns the number of columns, which fit into the width."""
+
+        return max(1, width // self.cell_width)
+
+    def total_height(self, count, columns):
+        """Returns the height of the grid with 'count' cells."""
+
+        rows = -(-count // columns)
+
+        return rows * self.cell_height
+
+    def position(self, index, columns):
+        """Returns the (x, y) of the top left corner of the cell."""
+
+        row, column = divmod(index, columns)
+
+        return column * self.cell_width, row * self.cell_height
+
+    def visible_range(self, top, height, count, columns):
+        """Returns indexes of the cells in or near the visible area.
+
+        Args:
+            top (int): Y coordinate of the top of the visible area.
+            height (int): Height of the visible area.
+            count (int): Number of cells.
+            columns (int): Number of columns.
+        Returns:
+            range -object of cell indexes.
+        """
+
+        first_row = max(0, top // self.cell_height - self.overscan_rows)
+        last_row = (top + height) // self.cell_height + self.overscan_rows
+
+        return range(
+            min(count, first_row * columns),
+            min(count, (last_row + 1) * columns)
+        )
+
+    def moved_cells(self, indexes, old_columns, new_columns):
+        """Returns the cells, whose position changes when the number of
+        columns changes.
+
+        Args:
+            indexes: Iterable of cell indexes.
+            old_columns (int): Number of columns before the change.
+            new_columns (int): Number of columns after the change.
+        Returns:
+            List of cell indexes.
+        """
+
+        if old_columns == new_columns:
+            return []
+
+        return [
+            index for index in indexes
+            if divmod(index, old_columns) != divmod(index, new_columns)
+        ]
@@ -0,0 +1,276 @@
+import atexit
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from utils.http.rate_limiter import scryfall_rate_limiter
+from config import (
+    USER_AGENT,
+    HTTP_TIMEOUT,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_MAX_RETRIES
+)
+
+
+# Responses with these status codes are temporary and worth retrying
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+def is_transient_error(exception):
+    """Returns true if the request failed for a temporary reason
+    (connection problem, timeout, rate limit or server error)."""
+
+    if isinstance(exception, (requests.exceptions.ConnectionError,
+                              requests.exceptions.Timeout)):
+        return True
+
+    response = getattr(exception, "response", None)
+
+    return response is not None and response.status_code in RETRY_STATUSES
+
+
+def parse_retry_after(value):
+    """Parses the 'Retry-After' header, which is either seconds
+    or a HTTP date.
+
+    Args:
+        value (str): Header value.
+    Returns:
+        Seconds to wait or None if the value can't be parsed.
+    """
+
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How temporary failures are retried.
+
+    Attributes:
+        max_retries (int): How many times a temporary failure is retried.
+        backoff_base (float): Upper bound in seconds for the first retry
+            delay, doubled for every further retry.
+        backoff_max (float): Upper bound in seconds for a single retry delay.
+    """
+
+    max_retries: int = HTTP_MAX_RETRIES
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+
+
+class HttpClient:
+    """Class for a pooled HTTP session. Connections are kept alive and reused
+    between requests, so only the first request to a host pays for the
+    TCP and TLS handshakes. Requests are throttled with a shared rate limiter
+    and temporary failures are retried with jittered exponential backoff.
+
+    Attributes:
+        timeout (float): Timeout in seconds for a single request.
+        retry_policy: RetryPolicy -object for temporary failures.
+    """
+
+    def __init__(
+        self,
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        *,
+        timeout=HTTP_TIMEOUT,
+        user_agent=USER_AGENT,
+        rate_limiter=scryfall_rate_limiter,
+        retry_policy=RetryPolicy(),
+        sleep=time.sleep
+    ):
+        """Class constructor. Creates a new pooled HTTP session.
+
+        Args:
+            pool_connections (int):
+                Number of hosts which have their own connection pool.
+            pool_maxsize (int):
+                Maximum number of open connections per host.
+            timeout (float):
+                Timeout in seconds for a single request.
+            user_agent (str):
+                User-Agent header sent with every request.
+            rate_limiter:
+                TokenBucket -object shared by throttled requests.
+                None disables throttling.
+            retry_policy:
+                RetryPolicy -object for temporary failures.
+            sleep:
+                Function for waiting given seconds.
+        """
+
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self._rate_limiter = rate_limiter
+        self._sleep = sleep
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "requests": 0, "retries": 0, "limiter_wait": 0.0, "backoff_wait": 0.0
+        }
+
+        # NOTE: pool_block keeps the number of connections per host within
+        # pool_maxsize, extra requests wait for a free connection instead
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True
+        )
+        self._session = requests.Session()
+        self._session.mount("https://", self._adapter)
+        self._session.mount("http://", self._adapter)
+        self._session.headers.update({
+            "User-Agent": user_agent,
+            "Connection": "keep-alive"
+        })
+
+    def get(self, url, params=None, headers=None, stream=False, throttle=True):
+        """Sends a GET request using a pooled connection. Temporary failures
+        are retried, the response of the last attempt is returned.
+
+        Args:
+            url (str):
+            params (dict): Query parameters. Defaults to None.
+            headers (dict): Extra headers for this request. Defaults to None.
+            stream (bool): Don't download the body immediately. Defaults to False.
+            throttle (bool): Wait for the rate limiter. Defaults to True.
+        Returns:
+            requests.Response -object.
+        Raises:
+            requests.exceptions.RequestException:
+        """
+
+        return self._send(
+            self._session.get,
+            url,
+            throttle,
+            params=params,
+            headers=headers,
+            stream=stream,
+            timeout=self.timeout
+        )
+
+    def post(self, url, json=None, headers=None, throttle=True):
+        """Sends a POST request with a json body using a pooled connection.
+        Temporary failures are retried, the response of the last attempt
+        is returned.
+
+        Args:
+            url (str):
+            json: Request body, serialized as json. Defaults to None.
+            headers (dict): Extra headers for this request. Defaults to None.
+            throttle (bool): Wait for the rate limiter. Defaults to True.
+        Returns:
+            requests.Response -object.
+        Raises:
+            requests.exceptions.RequestException:
+        """
+
+        return self._send(
+            self._session.post,
+            url,
+            throttle,
+            json=json,
+            headers=headers,
+            timeout=self.timeout
+        )
+
+    def metrics(self):
+        """Returns request counters of this client.
+
+        Returns:
+            Dict with keys 'requests', 'retries', 'limiter_wait'
+            (seconds) and 'backoff_wait' (seconds).
+        """
+
+        with self._metrics_lock:
+            return dict(self._metrics)
+
+    def close(self):
+        """Closes all pooled connections."""
+
+        self._session.close()
+
+    def _send(self, method, url, throttle, **kwargs):
+        attempt = 0
+        max_retries = self.retry_policy.max_retries
+
+        while True:
+            if throttle and self._rate_limiter:
+                waited = self._rate_limiter.acquire()
+                self._count(limiter_wait=waited)
+            self._count(requests=1)
+
+            try:
+                response = method(url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if attempt >= max_retries or not is_transient_error(e):
+                    raise
+                self._backoff(attempt, None, throttle)
+                attempt += 1
+                continue
+
+            if attempt >= max_retries or response.status_code not in RETRY_STATUSES:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            response.close()
+            self._backoff(attempt, retry_after, throttle)
+            attempt += 1
+
+    def _backoff(self, attempt, retry_after, throttle):
+        """Waits before the next retry. The delay is a random value between
+        zero and an exponentially growing bound ("full jitter"). A delay
+        given by the server in 'Retry-After' is always respected."""
+
+        policy = self.retry_policy
+        bound = min(policy.backoff_max, policy.backoff_base * 2 ** attempt)
+        delay = random.uniform(0, bound)
+
+        if retry_after is not None:
+            if throttle and self._rate_limiter:
+                # The limiter makes every thread wait for the server,
+                # including this one on its next attempt
+                self._rate_limiter.defer(retry_after)
+            else:
+                delay = max(delay, retry_after)
+
+        self._count(retries=1, backoff_wait=delay)
+        if delay > 0:
+            self._sleep(delay)
+
+    def _count(self, **counts):
+        with self._metrics_lock:
+            for name, count in counts.items():
+                self._metrics[name] += count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# All Scryfall traffic of the application shares this session,
+# so the repositories reuse the same pooled connections
+scryfall_http_client = HttpClient()
+
+atexit.register(scryfall_http_client.close)
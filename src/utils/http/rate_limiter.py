@@ -0,0 +1,89 @@
+import threading
+import time
+from config import SCRYFALL_RATE_LIMIT
+
+
+class TokenBucket:  # pylint: disable=too-many-instance-attributes
+    """Thread safe token bucket rate limiter. Every request takes one token
+    and tokens are refilled at a constant rate, so short bursts up to
+    'capacity' are allowed but the long term rate stays at 'rate'.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens in the bucket.
+        total_wait (float): Total seconds callers have waited for tokens.
+        acquired (int): Number of tokens taken.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        """Class constructor. Creates a new full token bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens. Defaults to 'rate'.
+            clock: Function returning current time in seconds.
+            sleep: Function for waiting given seconds.
+        """
+
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.total_wait = 0.0
+        self.acquired = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Takes a token and returns how long the caller must wait for it.
+        Tokens may go negative, which queues the callers fairly."""
+
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._updated
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            self.acquired += 1
+
+            wait = 0.0
+            if self._tokens < 0:
+                wait = -self._tokens / self.rate
+            wait = max(wait, self._blocked_until - now)
+            self.total_wait += wait
+
+            return wait
+
+    def acquire(self):
+        """Waits until a token is available.
+
+        Returns:
+            Seconds waited.
+        """
+
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+        return wait
+
+    def defer(self, seconds):
+        """Blocks all callers for the given time, e.g. when the server
+        answers with 'Retry-After'.
+
+        Args:
+            seconds (float):
+        """
+
+        with self._lock:
+            self._blocked_until = max(
+                self._blocked_until,
+                self._clock() + seconds
+            )
+
+
+# api.scryfall.com asks clients to stay near 10 requests per second,
+# every HttpClient shares this bucket by default
+scryfall_rate_limiter = TokenBucket(rate=SCRYFALL_RATE_LIMIT)
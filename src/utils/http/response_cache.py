@@ -0,0 +1,329 @@
+from sqlite3 import DatabaseError
+from urllib.parse import urlencode, urlsplit
+import json
+import threading
+import time
+from utils.lru_cache import LRUCache
+from utils.database.database_connection import get_database_connection
+from config import (
+    HTTP_CACHE_MAX_BYTES,
+    HTTP_CACHE_MEMORY_MAX_BYTES,
+    HTTP_CACHE_CARDS_TTL
+)
+
+
+# Seconds the responses of an endpoint are reused. Endpoints, which
+# aren't listed, aren't cached. The set list is revalidated by
+# SetRepository with conditional requests instead (SETS_CACHE_TTL).
+DEFAULT_TTLS = {
+    "/cards/named": HTTP_CACHE_CARDS_TTL
+}
+
+# When the stored responses grow over the size limit, they are evicted
+# down to this share of the limit, so a full cache isn't scanned on every put
+EVICTION_TARGET = 0.9
+
+
+class ResponseCache:  # pylint: disable=too-many-instance-attributes
+    """Two level cache for JSON responses of GET requests: recently used
+    responses are kept in memory and all responses are stored in database,
+    so they survive restarts. Responses expire after the time to live of
+    their endpoint. When the stored responses grow over 'max_bytes', least
+    recently used responses are removed. Reads don't write into database,
+    their access times are saved with the next stored response.
+
+    The cache is best effort: a database error is handled as a cache miss.
+
+    Attributes:
+        ttls (dict): Time to live in seconds by endpoint path.
+        max_bytes (int): Maximum total size of the stored responses.
+    """
+
+    def __init__(
+        self,
+        connection,
+        ttls=None,
+        max_bytes=HTTP_CACHE_MAX_BYTES,
+        memory_max_bytes=HTTP_CACHE_MEMORY_MAX_BYTES,
+        clock=time.time
+    ):
+        """Class constructor. Creates a new response cache.
+
+        Args:
+            connection:
+                Connection -object for the database connection.
+            ttls (dict):
+                Time to live in seconds by endpoint path.
+                Defaults to DEFAULT_TTLS.
+            max_bytes (int):
+                Maximum total size of the stored responses.
+            memory_max_bytes (int):
+                Maximum total size of the responses kept in memory.
+            clock:
+                Function, which returns the current time in seconds.
+        """
+
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.max_bytes = max_bytes
+        self._connection = connection
+        self._memory = LRUCache(memory_max_bytes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        # memory_hits and disk_hits: responses found in memory or database,
+        # misses: responses not found or expired, evictions: stored responses
+        # removed for space or because they expired
+        self._counters = dict.fromkeys(
+            ("memory_hits", "disk_hits", "misses", "stores", "evictions"), 0
+        )
+        # Total size of the stored responses, None until counted
+        self._stored_bytes = None
+        # Access times of the responses read since the last put()
+        self._accessed = {}
+
+    def ttl(self, url):
+        """Returns the time to live of the responses of the url.
+
+        Args:
+            url (str):
+        Returns:
+            Seconds, 0 if the endpoint isn't cached.
+        """
+
+        path = urlsplit(url).path
+
+        for endpoint, ttl in self.ttls.items():
+            if path.endswith(endpoint):
+                return ttl
+
+        return 0
+
+    @staticmethod
+    def key(url, params=None):
+        """Returns the cache key of a request.
+
+        Args:
+            url (str):
+            params (dict): Query parameters.
+        Returns:
+            Url with the query parameters in a fixed order.
+        """
+
+        if not params:
+            return url
+
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def get(self, url, params=None):
+        """Returns the cached response of a request.
+
+        Args:
+            url (str):
+            params (dict): Query parameters.
+        Returns:
+            Response content, parsed from JSON, or None if the response
+            isn't cached or has expired.
+        """
+
+        if self.ttl(url) <= 0:
+            return None
+
+        key = self.key(url, params)
+        now = self._clock()
+
+        entry = self._memory.get(key)
+        if entry is not None and entry[0] > now:
+            self._count(memory_hits=1)
+            self._touch(key, now)
+            return json.loads(entry[1])
+
+        entry = self._load(key, now)
+        if entry is None:
+            self._count(misses=1)
+            return None
+
+        self._count(disk_hits=1)
+        self._touch(key, now)
+        self._memory.put(key, entry, len(entry[1]))
+
+        return json.loads(entry[1])
+
+    def _load(self, key, now):
+        cursor = self._connection.cursor()
+
+        try:
+            cursor.execute(
+                """SELECT expires_at, body FROM HttpResponseCache
+                WHERE key = ? AND expires_at > ?""",
+                (key, now)
+            )
+            row = cursor.fetchone()
+        except DatabaseError:
+            return None
+
+        return (row[0], row[1]) if row else None
+
+    def _touch(self, key, now):
+        """Remembers the access time of a response. Reads don't write into
+        database, the access times are saved with the next stored response,
+        before the least recently used responses are evicted."""
+
+        with self._lock:
+            self._accessed[key] = now
+
+    def _save_access_times(self, cursor):
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+
+        cursor.executemany(
+            "UPDATE HttpResponseCache SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in accessed.items()]
+        )
+
+    def put(self, url, params, content):
+        """Stores the response of a request, if its endpoint is cached.
+
+        Args:
+            url (str):
+            params (dict): Query parameters.
+            content: Response content, serializable to JSON.
+        """
+
+        ttl = self.ttl(url)
+        if ttl <= 0:
+            return
+
+        key = self.key(url, params)
+        now = self._clock()
+        body = json.dumps(content, separators=(",", ":"))
+        entry = (now + ttl, body)
+        self._memory.put(key, entry, len(body))
+
+        try:
+            with self._connection.transaction():
+                cursor = self._connection.cursor()
+                self._save_access_times(cursor)
+                stored_bytes = self._store(cursor, key, entry, now)
+                self._stored_bytes, evicted = self._evict(cursor, now, stored_bytes)
+        except DatabaseError:
+            # The stored size is counted again with the next response
+            self._stored_bytes = None
+            return
+
+        self._count(stores=1, evictions=evicted)
+
+    def _store(self, cursor, key, entry, now):
+        """Stores a response into database.
+
+        Returns:
+            Total size of the stored responses.
+        """
+
+        expires_at, body = entry
+        stored_bytes = self._get_stored_bytes(cursor)
+        cursor.execute("SELECT size FROM HttpResponseCache WHERE key = ?", (key,))
+        replaced = cursor.fetchone()
+        cursor.execute(
+            """INSERT OR REPLACE INTO HttpResponseCache
+            (key, body, size, expires_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?)""",
+            (key, body, len(body), expires_at, now)
+        )
+
+        return stored_bytes + len(body) - (replaced[0] if replaced else 0)
+
+    def _get_stored_bytes(self, cursor):
+        """Returns the total size of the stored responses. The size is
+        counted from database once and then kept up to date by put()."""
+
+        if self._stored_bytes is None:
+            cursor.execute("SELECT TOTAL(size) FROM HttpResponseCache")
+            self._stored_bytes = int(cursor.fetchone()[0])
+
+        return self._stored_bytes
+
+    def _evict(self, cursor, now, stored_bytes):
+        """Removes expired responses and, if the stored responses don't fit
+        into 'max_bytes', least recently used responses until they fit into
+        EVICTION_TARGET of 'max_bytes'. Expired responses are found with
+        an index, the stored responses are scanned only when over the limit.
+
+        Returns:
+            Tuple (total size of the stored responses, number of removed
+            responses).
+        """
+
+        cursor.execute(
+            "DELETE FROM HttpResponseCache WHERE expires_at <= ? RETURNING size",
+            (now,)
+        )
+        expired = [row[0] for row in cursor.fetchall()]
+        stored_bytes -= sum(expired)
+
+        if stored_bytes <= self.max_bytes:
+            return stored_bytes, len(expired)
+
+        cursor.execute(
+            """DELETE FROM HttpResponseCache WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (
+                        ORDER BY accessed_at DESC, key
+                    ) AS total
+                    FROM HttpResponseCache
+                ) WHERE total > ?
+            ) RETURNING size""",
+            (int(self.max_bytes * EVICTION_TARGET),)
+        )
+        evicted = len(cursor.fetchall())
+        cursor.execute("SELECT TOTAL(size) FROM HttpResponseCache")
+
+        return int(cursor.fetchone()[0]), len(expired) + evicted
+
+    def clear(self):
+        """Removes all responses."""
+
+        self._memory.clear()
+
+        with self._connection.transaction():
+            self._connection.cursor().execute("DELETE FROM HttpResponseCache")
+            self._stored_bytes = 0
+
+        with self._lock:
+            self._accessed = {}
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                self._counters[name] += count
+
+    def stats(self):
+        """Returns the counters of the cache for tuning the limits.
+
+        Returns:
+            Dict with memory_hits, disk_hits, misses, hit_rate, stores,
+            evictions, the counters of the memory cache ('memory') and
+            the number and size of the stored responses.
+        """
+
+        try:
+            cursor = self._connection.cursor()
+            cursor.execute("SELECT COUNT(*), TOTAL(size) FROM HttpResponseCache")
+            entries, size = cursor.fetchone()
+        except DatabaseError:
+            entries, size = 0, 0
+
+        with self._lock:
+            counters = dict(self._counters)
+
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+
+        return {
+            **counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size": int(size),
+            "memory": self._memory.stats()
+        }
+
+
+response_cache = ResponseCache(get_database_connection())
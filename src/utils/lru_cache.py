@@ -0,0 +1,130 @@
+from collections import OrderedDict
+import threading
+
+
+class LRUCache:
+    """Thread safe least recently used cache with a size budget. The size
+    of an entry is given when it's added, e.g. bytes of a decoded image,
+    or 1 to limit the number of entries.
+
+    Attributes:
+        max_size (int): Maximum total size of the entries.
+        hits (int): Number of found entries.
+        misses (int): Number of missing entries.
+        evictions (int): Number of entries removed to keep under the budget.
+    """
+
+    def __init__(self, max_size):
+        """Class constructor. Creates a new empty cache.
+
+        Args:
+            max_size (int): Maximum total size of the entries.
+        """
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    @property
+    def size(self):
+        """Total size of the entries."""
+
+        return self._size
+
+    def get(self, key, default=None):
+        """Returns the value of the key and marks it as recently used.
+
+        Args:
+            key: Key of the entry.
+            default: Returned if the key isn't in the cache.
+        Returns:
+            Value of the entry or default.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=1):
+        """Adds an entry and removes least recently used entries, if the
+        cache is over its budget. An entry larger than the whole budget
+        isn't cached.
+
+        Args:
+            key: Key of the entry.
+            value: Value of the entry.
+            size (int): Size of the entry.
+        """
+
+        with self._lock:
+            self._remove(key)
+            if size > self.max_size:
+                return
+
+            self._entries[key] = (value, size)
+            self._size += size
+
+            while self._size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key):
+        """Removes an entry, e.g. when it has changed.
+
+        Args:
+            key: Key of the entry.
+        """
+
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def clear(self):
+        """Removes all entries."""
+
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Returns the counters of the cache for tuning its budget.
+
+        Returns:
+            Dict with entries, size, max_size, hits, misses,
+            evictions and hit_rate.
+        """
+
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "entries": len(self._entries),
+                "size": self._size,
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
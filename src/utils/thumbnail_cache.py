@@ -0,0 +1,163 @@
+import hashlib
+import os
+import tempfile
+import threading
+from PIL import Image
+from config import THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES
+
+
+class ThumbnailCache:
+    """Cache of card image thumbnails on disk. Thumbnails are keyed by the
+    path, modification time and size of the source image and the target
+    size, so a changed image gets a new thumbnail automatically. Thumbnails
+    are stored uncompressed (PPM), because decoding them is an order of
+    magnitude faster than decoding and resizing the source image.
+
+    When the cache grows over 'max_bytes', least recently used thumbnails
+    are removed. Stale thumbnails are never used again, so they are the
+    first ones to go.
+
+    Attributes:
+        cache_dir (str): Directory of the thumbnails.
+        max_bytes (int): Maximum total size of the thumbnails.
+    """
+
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        """Class constructor. Creates a new thumbnail cache.
+
+        Args:
+            cache_dir (str): Directory of the thumbnails.
+            max_bytes (int): Maximum total size of the thumbnails.
+        """
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.hits = 0
+        self.misses = 0
+
+    def _thumbnail_path(self, path, size):
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+        return os.path.join(self.cache_dir, f"{digest}.ppm")
+
+    def get(self, path, size):
+        """Returns a thumbnail of the image, from the cache if possible.
+
+        Args:
+            path (str): Path to the source image.
+            size (tuple): Maximum (width, height) of the thumbnail.
+        Returns:
+            PIL Image -object.
+        Raises:
+            OSError: Source image can't be read.
+        """
+
+        thumbnail_path = self._thumbnail_path(path, size)
+
+        try:
+            with Image.open(thumbnail_path) as cached:
+                cached.load()
+            # Access time is tracked with mtime, atime is often disabled
+            os.utime(thumbnail_path)
+            with self._lock:
+                self.hits += 1
+            return cached
+        except OSError:
+            pass
+
+        with Image.open(path) as image:
+            image.thumbnail(size)
+            thumbnail = image.convert("RGB")
+
+        with self._lock:
+            self.misses += 1
+        self._store(thumbnail, thumbnail_path)
+
+        return thumbnail
+
+    def _store(self, thumbnail, thumbnail_path):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=self.cache_dir,
+                suffix=".part",
+                delete=False
+            ) as f:
+                thumbnail.save(f, "PPM")
+            os.replace(f.name, thumbnail_path)
+            stored_bytes = os.path.getsize(thumbnail_path)
+        except OSError:
+            # The cache is only an optimization
+            return
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += stored_bytes
+            if self._cache_bytes() > self.max_bytes:
+                self._evict()
+
+    def _cache_bytes(self):
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, _, size in self._entries())
+
+        return self._total_bytes
+
+    def _entries(self):
+        """Returns (last_used, path, size) of every cached thumbnail."""
+
+        entries = []
+
+        try:
+            with os.scandir(self.cache_dir) as files:
+                for entry in files:
+                    if entry.name.endswith(".ppm"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.path, stat.st_size))
+        except OSError:
+            pass
+
+        return entries
+
+    def _evict(self):
+        """Removes least recently used thumbnails, until the cache
+        is 10 % under its size limit, so eviction doesn't run again
+        after every new thumbnail."""
+
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+        self._total_bytes = total
+
+    def size(self):
+        """Returns the total size of the cached thumbnails in bytes."""
+
+        with self._lock:
+            return self._cache_bytes()
+
+    def clear(self):
+        """Removes all cached thumbnails."""
+
+        with self._lock:
+            for _, path, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+
+thumbnail_cache = ThumbnailCache()
@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+from config import THUMBNAIL_DECODE_WORKERS
+from utils.thumbnail_cache import thumbnail_cache as default_thumbnail_cache
+
+
+class ThumbnailLoader:
+    """Decodes and resizes card images in a thread pool. PIL releases the
+    GIL while decoding, so several images are decoded at the same time
+    and the user interface thread only creates the Tk images.
+
+    Finished thumbnails are collected with take_finished() in batches,
+    e.g. from the Tk main loop.
+
+    Attributes:
+        size (tuple): Maximum (width, height) of the thumbnails.
+        max_workers (int): Number of decoding threads.
+    """
+
+    def __init__(
+        self,
+        size,
+        max_workers=THUMBNAIL_DECODE_WORKERS,
+        thumbnail_cache=default_thumbnail_cache
+    ):
+        """Class constructor. Creates a new thumbnail loader.
+
+        Args:
+            size (tuple): Maximum (width, height) of the thumbnails.
+            max_workers (int): Number of decoding threads.
+            thumbnail_cache: ThumbnailCache -object for the thumbnails.
+        """
+
+        self.size = size
+        self.max_workers = max_workers
+        self._thumbnail_cache = thumbnail_cache
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="thumbnail-decode"
+        )
+        self._finished = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def request(self, path):
+        """Queues a thumbnail for decoding, unless it's queued already.
+
+        Args:
+            path (str): Path to the source image.
+        """
+
+        with self._lock:
+            if path not in self._pending:
+                self._pending[path] = self._executor.submit(self._decode, path)
+
+    def cancel(self, path):
+        """Drops a queued thumbnail, which isn't needed anymore, e.g. because
+        its row was scrolled out of view. Decoding already started finishes.
+
+        Args:
+            path (str): Path to the source image.
+        """
+
+        with self._lock:
+            future = self._pending.get(path)
+            if future and future.cancel():
+                del self._pending[path]
+
+    def _decode(self, path):
+        try:
+            image = self._thumbnail_cache.get(path, self.size)
+        except OSError:
+            image = None
+
+        self._finished.put((path, image))
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def pending(self):
+        """Returns the number of queued and running decodes."""
+
+        with self._lock:
+            return len(self._pending)
+
+    def take_finished(self, max_count):
+        """Returns finished thumbnails.
+
+        Args:
+            max_count (int): Maximum number of thumbnails returned.
+        Returns:
+            List of tuples (path, PIL Image -object or None if the image
+            couldn't be read).
+        """
+
+        finished = []
+
+        while len(finished) < max_count:
+            try:
+                finished.append(self._finished.get_nowait())
+            except queue.Empty:
+                break
+
+        return finished
+
+    def shutdown(self):
+        """Drops queued decodes."""
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -13,3 +13,44 @@ def center_window(root, width, height):
     x = (root.winfo_screenwidth() // 2) - (width // 2)
     y = (root.winfo_screenheight() // 2) - (height // 2)
     root.geometry(f'{width}x{height}+{x}+{y}')
+
+
+class Debouncer:
+    """Calls a function once after a burst of calls has settled, e.g. after
+    the last "<Configure>" event of a window resize. Only the arguments
+    of the last call are used.
+
+    Attributes:
+        widget: Tk widget, which schedules the call.
+        delay (int): Milliseconds without calls before the function is called.
+        function: Debounced function.
+    """
+
+    def __init__(self, widget, delay, function):
+        """Class constructor. Creates a new debouncer.
+
+        Args:
+            widget: Tk widget, which schedules the call.
+            delay (int): Milliseconds without calls before the function is called.
+            function: Debounced function.
+        """
+
+        self.widget = widget
+        self.delay = delay
+        self.function = function
+        self._after_id = None
+
+    def __call__(self, *args):
+        self.cancel()
+        self._after_id = self.widget.after(self.delay, self._run, *args)
+
+    def _run(self, *args):
+        self._after_id = None
+        self.function(*args)
+
+    def cancel(self):
+        """Cancels the scheduled call."""
+
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
@@ -29,3 +29,16 @@ def build(ctx):
 @task
 def lint(ctx):
     ctx.run("pylint src", pty=True)
+
+
+@task
+def benchmark(ctx, name):
+    ctx.run(f"python3 -m benchmarks.{name}", env={"PYTHONPATH": "src"}, pty=True)
+
+
+@task
+def import_catalog(ctx, path, sync=False):
+    ctx.run(
+        f"python3 src/import_catalog.py {path}{' --sync' if sync else ''}",
+        pty=True
+    )